@@ -0,0 +1,28 @@
+"""Add User.tokenVersion
+
+Revision ID: 3f1c9a7d2b40
+Revises: aa534e4fd60c
+Create Date: 2026-10-19 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c9a7d2b40'
+down_revision: Union[str, Sequence[str], None] = 'aa534e4fd60c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('User', sa.Column('tokenVersion', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('User', 'tokenVersion')
@@ -0,0 +1,40 @@
+"""Add IdempotencyKey for Idempotency-Key replays
+
+Revision ID: 5d0c7e3a9b18
+Revises: e9d3b6a0f4c2
+Create Date: 2026-10-19 16:05:42.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d0c7e3a9b18'
+down_revision: Union[str, Sequence[str], None] = 'e9d3b6a0f4c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('IdempotencyKey',
+    sa.Column('userId', sa.String(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('fingerprint', sa.LargeBinary(), nullable=False),
+    sa.Column('statusCode', sa.Integer(), nullable=True),
+    sa.Column('contentType', sa.String(), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('createdAt', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('expiresAt', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('userId', 'key')
+    )
+    op.create_index(op.f('ix_IdempotencyKey_expiresAt'), 'IdempotencyKey', ['expiresAt'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_IdempotencyKey_expiresAt'), table_name='IdempotencyKey')
+    op.drop_table('IdempotencyKey')
@@ -0,0 +1,42 @@
+"""Add LeadCounter summary table
+
+Revision ID: 7b2e4d91c5a3
+Revises: 3f1c9a7d2b40
+Create Date: 2026-10-19 10:03:47.502114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4d91c5a3'
+down_revision: Union[str, Sequence[str], None] = '3f1c9a7d2b40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('LeadCounter',
+    sa.Column('pipelineStatus', postgresql.ENUM('Unassigned', 'Email_Sent', 'Client_Replied', 'Plan_Sent', 'Rate_Finalized', 'Docs_Signed', 'Testing', 'Approved', 'Rejected', name='PipelineStatus', create_type=False), nullable=False),
+    sa.Column('assignedEmployeeId', sa.String(), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('pipelineStatus', 'assignedEmployeeId')
+    )
+    # Backfill from existing leads; '' stands for unassigned
+    op.execute(
+        '''
+        INSERT INTO "LeadCounter" ("pipelineStatus", "assignedEmployeeId", "count")
+        SELECT "pipelineStatus", COALESCE("assignedEmployeeId", ''), COUNT(*)
+        FROM "Lead"
+        GROUP BY "pipelineStatus", COALESCE("assignedEmployeeId", '')
+        '''
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('LeadCounter')
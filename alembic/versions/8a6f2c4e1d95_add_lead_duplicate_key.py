@@ -0,0 +1,39 @@
+"""Add LeadDuplicateKey for fuzzy duplicate detection
+
+Revision ID: 8a6f2c4e1d95
+Revises: 5d0c7e3a9b18
+Create Date: 2026-10-19 17:12:08.554907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a6f2c4e1d95'
+down_revision: Union[str, Sequence[str], None] = '5d0c7e3a9b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Run scripts/rebuild_lead_duplicate_keys.py afterwards to index existing
+    leads.
+    """
+    op.create_table('LeadDuplicateKey',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('leadId', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['leadId'], ['Lead.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('key', 'leadId')
+    )
+    op.create_index(op.f('ix_LeadDuplicateKey_leadId'), 'LeadDuplicateKey', ['leadId'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_LeadDuplicateKey_leadId'), table_name='LeadDuplicateKey')
+    op.drop_table('LeadDuplicateKey')
@@ -0,0 +1,57 @@
+"""Store User and Lead ids as native UUIDs
+
+Revision ID: b61e0d3f7a28
+Revises: 8a6f2c4e1d95
+Create Date: 2026-10-19 19:40:31.208415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61e0d3f7a28'
+down_revision: Union[str, Sequence[str], None] = '8a6f2c4e1d95'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Converted columns per table, referenced tables first
+_ID_COLUMNS = (
+    ('User', ['id']),
+    ('Lead', ['id', 'assignedEmployeeId']),
+    ('LeadDuplicateKey', ['leadId']),
+)
+_FOREIGN_KEYS = (
+    ('Lead_assignedEmployeeId_fkey', 'Lead', 'User', ['assignedEmployeeId'], 'SET NULL'),
+    ('LeadDuplicateKey_leadId_fkey', 'LeadDuplicateKey', 'Lead', ['leadId'], 'CASCADE'),
+)
+
+
+def _convert(type_name: str) -> None:
+    for name, table, _, _, _ in _FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_='foreignkey')
+    for table, columns in _ID_COLUMNS:
+        # One statement per table: a single rewrite of the table and its indexes
+        op.execute(f'ALTER TABLE "{table}" ' + ', '.join(
+            f'ALTER COLUMN "{column}" TYPE {type_name} USING "{column}"::{type_name}' for column in columns
+        ))
+    for name, table, referred, columns, ondelete in _FOREIGN_KEYS:
+        op.create_foreign_key(name, table, referred, columns, ['id'], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing ids keep their (uuid4) values; new rows get time-ordered
+    (uuid7) ids from the application. Every id must already be a UUID
+    string, which is all the application ever generated. Takes an ACCESS
+    EXCLUSIVE lock on each table while it is rewritten.
+    """
+    _convert('uuid')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _convert('text')
@@ -0,0 +1,40 @@
+"""Add LeadDailyStat rollup table
+
+Revision ID: c4a81f2e6d17
+Revises: 7b2e4d91c5a3
+Create Date: 2026-10-19 11:27:15.840392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a81f2e6d17'
+down_revision: Union[str, Sequence[str], None] = '7b2e4d91c5a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Run scripts/backfill_lead_daily_stats.py afterwards to populate history
+    for existing leads.
+    """
+    op.create_table('LeadDailyStat',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('pipelineStatus', postgresql.ENUM('Unassigned', 'Email_Sent', 'Client_Replied', 'Plan_Sent', 'Rate_Finalized', 'Docs_Signed', 'Testing', 'Approved', 'Rejected', name='PipelineStatus', create_type=False), nullable=False),
+    sa.Column('assignedEmployeeId', sa.String(), nullable=False),
+    sa.Column('created', sa.BigInteger(), nullable=False),
+    sa.Column('entered', sa.BigInteger(), nullable=False),
+    sa.Column('assigned', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'pipelineStatus', 'assignedEmployeeId')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('LeadDailyStat')
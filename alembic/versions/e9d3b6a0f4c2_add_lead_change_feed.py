@@ -0,0 +1,43 @@
+"""Add Lead.changeSeq and LeadTombstone for the change feed
+
+Revision ID: e9d3b6a0f4c2
+Revises: c4a81f2e6d17
+Create Date: 2026-10-19 12:48:31.206655
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9d3b6a0f4c2'
+down_revision: Union[str, Sequence[str], None] = 'c4a81f2e6d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('lead_change_seq')))
+    # The volatile default numbers existing rows while the column is added
+    op.add_column('Lead', sa.Column('changeSeq', sa.BigInteger(), server_default=sa.text("nextval('lead_change_seq')"), nullable=False))
+    op.create_index(op.f('ix_Lead_changeSeq'), 'Lead', ['changeSeq'], unique=False)
+    op.create_table('LeadTombstone',
+    sa.Column('seq', sa.BigInteger(), server_default=sa.text("nextval('lead_change_seq')"), nullable=False),
+    sa.Column('leadId', sa.String(), nullable=False),
+    sa.Column('reason', sa.String(), nullable=False),
+    sa.Column('previousEmployeeId', sa.String(), nullable=True),
+    sa.Column('currentEmployeeId', sa.String(), nullable=True),
+    sa.Column('createdAt', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('seq')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('LeadTombstone')
+    op.drop_index(op.f('ix_Lead_changeSeq'), table_name='Lead')
+    op.drop_column('Lead', 'changeSeq')
+    op.execute(sa.schema.DropSequence(sa.Sequence('lead_change_seq')))
@@ -0,0 +1,52 @@
+"""Add LeadArchive for closed leads
+
+Revision ID: f2a9c7e4b813
+Revises: b61e0d3f7a28
+Create Date: 2026-10-19 21:05:44.617093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a9c7e4b813'
+down_revision: Union[str, Sequence[str], None] = 'b61e0d3f7a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('LeadArchive',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('frn', sa.String(), nullable=False),
+    sa.Column('company_name', sa.String(), nullable=False),
+    sa.Column('contact_email', sa.String(), nullable=True),
+    sa.Column('contact_phone', sa.String(), nullable=True),
+    sa.Column('service_type', sa.String(), nullable=True),
+    sa.Column('website', sa.String(), nullable=True),
+    sa.Column('notes', sa.Text(), nullable=True),
+    sa.Column('pipelineStatus', postgresql.ENUM('Unassigned', 'Email_Sent', 'Client_Replied', 'Plan_Sent', 'Rate_Finalized', 'Docs_Signed', 'Testing', 'Approved', 'Rejected', name='PipelineStatus', create_type=False), nullable=False),
+    sa.Column('history', postgresql.ARRAY(sa.Text()), nullable=False),
+    sa.Column('assignedEmployeeId', sa.Uuid(), nullable=True),
+    sa.Column('createdAt', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updatedAt', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('changeSeq', sa.BigInteger(), nullable=False),
+    sa.Column('archivedAt', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['assignedEmployeeId'], ['User.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_LeadArchive_assignedEmployeeId'), 'LeadArchive', ['assignedEmployeeId'], unique=False)
+    op.create_index(op.f('ix_LeadArchive_frn'), 'LeadArchive', ['frn'], unique=True)
+    op.create_index('ix_Lead_closed_updatedAt', 'Lead', ['updatedAt'], unique=False, postgresql_where=sa.text("\"pipelineStatus\" IN ('Approved', 'Rejected')"))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_Lead_closed_updatedAt', table_name='Lead', postgresql_where=sa.text("\"pipelineStatus\" IN ('Approved', 'Rejected')"))
+    op.drop_index(op.f('ix_LeadArchive_frn'), table_name='LeadArchive')
+    op.drop_index(op.f('ix_LeadArchive_assignedEmployeeId'), table_name='LeadArchive')
+    op.drop_table('LeadArchive')
@@ -1,4 +1,6 @@
-from typing import AsyncGenerator, Optional
+import secrets
+from contextvars import ContextVar
+from typing import Optional, Tuple
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
@@ -6,7 +8,10 @@ from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core import security
 from app.core.config import settings
-from app.core.database import async_session_factory
+# Re-exported so endpoints and test overrides share a single session dependency
+from app.core.database import get_db
+from app.core.replica import get_read_db as _get_replica_read_db, replica_router
+from app.core.token_versions import token_versions
 from app.crud.user import user_crud
 from app.models.user import User, Role
 from app.schemas.user import TokenData
@@ -15,43 +20,62 @@ reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_factory() as session:
-        try:
-            yield session
-        finally:
-            await session.close()
+# Session dependency for read-only endpoints. Without a replica it is get_db
+# itself, so overriding get_db covers reads too.
+get_read_db = _get_replica_read_db if replica_router.enabled else get_db
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_db),
+# (token, principal) authenticated by a POST /batch; its sub-requests carry the
+# same token and reuse the principal instead of checking it again
+batch_principal: ContextVar[Optional[Tuple[str, TokenData]]] = ContextVar("batch_principal", default=None)
+
+async def get_current_principal(
     token: str = Depends(reusable_oauth2)
-) -> User:
+) -> TokenData:
+    """
+    Authenticate from the token alone. The signature proves the claims, and the
+    token version is checked against the in-memory revocation map, so no User
+    row is loaded.
+    """
+    batch = batch_principal.get()
+    if batch is not None and secrets.compare_digest(batch[0], token):
+        return batch[1]
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-    except JWTError:
+        token_data = TokenData(**payload)
+    except (JWTError, ValidationError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
+        )
+
+    if not token_data.sub:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Tokens issued before role/version claims existed cannot be checked for revocation
+    if token_data.role is None or token_data.ver is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
-    # In token we stored "sub" as string (email or id? in security.py we used str(subject))
-    # In security.py: to_encode = {"exp": expire, "sub": str(subject)}
-    # We usually use ID as subject.
-    
-    # But wait, TokenData schema has email: Optional[str].
-    # Let's check how we create token.
-    
-    # If we store ID in sub, then token_data.sub? No TokenData has email.
-    # I should probably update TokenData to have sub or id.
-    
-    # Let's assume we use user ID as subject.
-    user_id = payload.get("sub")
-    if not user_id:
-         raise HTTPException(status_code=404, detail="User not found")
-         
-    user = await user_crud.get(db, id=user_id)
+
+    if await token_versions.get(token_data.sub) != token_data.ver:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token has been revoked",
+        )
+    return token_data
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_db),
+    token_data: TokenData = Depends(get_current_principal),
+) -> User:
+    """
+    Load the full User row. Only needed by endpoints that return user fields
+    not carried in the token.
+    """
+    user = await user_crud.get(db, id=token_data.sub)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -63,11 +87,31 @@ async def get_current_active_user(
     return current_user
 
 async def get_current_admin(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: TokenData = Depends(get_current_principal),
+) -> TokenData:
     if current_user.role != Role.ADMIN:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges",
         )
     return current_user
+
+async def principal_from_authorization(authorization: Optional[str]) -> Optional[TokenData]:
+    """
+    The principal of a valid, unrevoked token in an Authorization header, if
+    any. For checks made outside FastAPI's dependency injection (middleware).
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return await get_current_principal(token)
+    except HTTPException:
+        return None
+
+async def is_admin_authorization(authorization: Optional[str]) -> bool:
+    """
+    Whether an Authorization header carries a valid, unrevoked admin token.
+    """
+    principal = await principal_from_authorization(authorization)
+    return principal is not None and principal.role == Role.ADMIN
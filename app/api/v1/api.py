@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, leads, admin
+from app.api.v1.endpoints import auth, leads, admin, batch
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(leads.router, prefix="/leads", tags=["leads"])
 api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
+api_router.include_router(batch.router, prefix="/batch", tags=["batch"])
@@ -1,35 +1,47 @@
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Set, Tuple
+import asyncio
 import shutil
 from pathlib import Path
 import uuid
-from datetime import datetime, UTC
+from datetime import date, datetime, UTC
 
-from fastapi import APIRouter, Body, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Response, UploadFile, File
+from fastapi.responses import FileResponse
 from fastapi.encoders import jsonable_encoder
 from pydantic import EmailStr
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func, select
+from sqlalchemy import select
 
 from app.api import deps
+from app.core import telemetry
+from app.core.cache import SingleFlightCache
+from app.core.config import settings
+from app.core.database import get_pool_status, replica_engine
+from app.core.profiling import profile_store
+from app.core.replica import replica_router
+from app.core.response_cache import lead_list_cache
+from app.crud.lead_archive import archived_frns
+from app.crud.lead_duplicates import find_duplicates, lead_signature
+from app.crud.lead_stats import get_lead_metrics, get_lead_timeseries
+from app.crud.projections import user_rows
 from app.crud.user import user_crud
-from app.models.user import User
 from app.models.lead import Lead, PipelineStatus
-from app.schemas.user import UserCreate, UserResponse, UserUpdate
+from app.schemas.user import TokenData, UserCreate, UserResponse, UserUpdate
 from app.utils.csv_parser import parse_csv
 
 router = APIRouter()
 
 @router.get("/users", response_model=List[UserResponse])
 async def read_users(
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     skip: int = 0,
     limit: int = 100,
-    current_user: User = Depends(deps.get_current_admin),
+    current_user: TokenData = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Retrieve users.
     """
-    users = await user_crud.get_multi(db, skip=skip, limit=limit)
+    users = await user_rows(db, skip=skip, limit=limit)
     return users
 
 @router.post("/users", response_model=UserResponse)
@@ -37,7 +49,7 @@ async def create_user(
     *,
     db: AsyncSession = Depends(deps.get_db),
     user_in: UserCreate,
-    current_user: User = Depends(deps.get_current_admin),
+    current_user: TokenData = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Create new user.
@@ -57,7 +69,7 @@ async def update_user(
     db: AsyncSession = Depends(deps.get_db),
     user_id: str,
     user_in: UserUpdate,
-    current_user: User = Depends(deps.get_current_admin),
+    current_user: TokenData = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Update a user.
@@ -71,58 +83,115 @@ async def update_user(
     user = await user_crud.update(db, db_obj=user, obj_in=user_in)
     return user
 
+@router.get("/db/pool")
+async def get_db_pool_status(
+    current_user: TokenData = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Live connection pool statistics for this worker: connections checked out,
+    overflow in use, checkout wait times and timeouts.
+    """
+    status = {"primary": get_pool_status()}
+    if replica_engine is not None:
+        status["replica"] = {
+            **get_pool_status(replica_engine),
+            "usable": await replica_router.replica_usable(),
+            "lagSeconds": replica_router.lag,
+        }
+    return status
+
+@router.get("/cache")
+async def get_cache_status(
+    current_user: TokenData = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Lead list response cache statistics for this worker: hits, misses, hit
+    ratio and (in-process backend) entries and bytes held.
+    """
+    return {"leads": lead_list_cache.stats()}
+
+@router.get("/profiles")
+async def list_profiles(
+    current_user: TokenData = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Stored request profiles on this worker, newest first.
+    """
+    return await asyncio.to_thread(profile_store.list)
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user: TokenData = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Download a profile: `.speedscope.json` (open in https://www.speedscope.app)
+    or `.pstats` (load with `pstats.Stats` or snakeviz).
+    """
+    path = profile_store.path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, filename=path.name, media_type="application/octet-stream")
+
 # Metrics Endpoint
+metrics_cache = SingleFlightCache(
+    ttl=settings.METRICS_CACHE_TTL_SECONDS,
+    max_stale=settings.METRICS_CACHE_MAX_STALE_SECONDS,
+)
+
+async def _load_metrics() -> Dict[str, Any]:
+    # Runs detached from any one request (it may finish after the caller is
+    # gone), so it uses its own session, on the replica when usable
+    session_factory = await replica_router.session_factory()
+    async with session_factory() as session:
+        return await get_lead_metrics(session)
+
 @router.get("/metrics")
 async def get_metrics(
-    db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_admin),
+    response: Response,
+    current_user: TokenData = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Get admin metrics:
     - Leads by status
     - Leads by employee
-    """
-    # Leads by Status
-    status_query = select(Lead.pipelineStatus, func.count(Lead.id)).group_by(Lead.pipelineStatus)
-    status_result = await db.execute(status_query)
-    leads_by_status = {status.value: count for status, count in status_result.all()}
-    
-    # Ensure all statuses are present with 0 count if missing
-    for status in PipelineStatus:
-        if status.value not in leads_by_status:
-            leads_by_status[status.value] = 0
-
-    # Leads by Employee
-    employee_query = select(
-        User.name, 
-        func.count(Lead.id)
-    ).join(
-        Lead, Lead.assignedEmployeeId == User.id
-    ).group_by(User.name)
-    
-    employee_result = await db.execute(employee_query)
-    leads_by_employee = {name: count for name, count in employee_result.all()}
-
-    # Unassigned count
-    unassigned_query = select(func.count(Lead.id)).where(Lead.assignedEmployeeId == None)
-    unassigned_result = await db.execute(unassigned_query)
-    unassigned_count = unassigned_result.scalar_one_or_none() or 0
-    leads_by_employee["Unassigned"] = unassigned_count
 
-    status_data = [{"name": k, "value": v} for k, v in leads_by_status.items()]
-    employee_data = [{"name": k, "value": v} for k, v in leads_by_employee.items()]
+    Served from memory; concurrent misses share one computation and expired
+    values are served while a background refresh runs.
+    """
+    result = await metrics_cache.get("metrics", _load_metrics)
+    response.headers["X-Cache"] = result.status
+    response.headers["Age"] = str(int(result.age))
+    return result.value
 
-    return {
-        "totalLeads": sum(leads_by_status.values()),
-        "statusData": status_data,
-        "employeeData": employee_data,
-    }
+@router.get("/metrics/timeseries")
+async def get_metrics_timeseries(
+    db: AsyncSession = Depends(deps.get_read_db),
+    start: date = Query(..., alias="from"),
+    end: date = Query(..., alias="to"),
+    granularity: str = Query("day", pattern="^(day|week|month)$"),
+    current_user: TokenData = Depends(deps.get_current_admin),
+) -> Any:
+    """
+    Lead funnel analytics over a date range, served from daily rollups:
+    - Leads created and stage transitions per period
+    - Conversion rates between pipeline stages
+    - Per-employee throughput
+    """
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (end - start).days > settings.METRICS_TIMESERIES_MAX_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range cannot exceed {settings.METRICS_TIMESERIES_MAX_DAYS} days",
+        )
+    return await get_lead_timeseries(db, start=start, end=end, granularity=granularity)
 
 # Upload CSV
 @router.post("/upload-csv")
 async def upload_csv(
     file: UploadFile = File(...),
-    current_user: User = Depends(deps.get_current_admin),
+    current_user: TokenData = Depends(deps.get_current_admin),
 ) -> Any:
     """
     Upload a CSV file for processing.
@@ -141,18 +210,74 @@ async def upload_csv(
         
     return {"file_id": file_id, "filename": file.filename, "path": str(file_path.absolute())}
 
+# Bind parameters per lookup; asyncpg allows at most 32767 per statement
+FRN_LOOKUP_CHUNK = 5000
+
+async def _existing_frns(db: AsyncSession, frns: Set[str]) -> Set[str]:
+    """
+    The FRNs from `frns` that already have a lead, hot or archived, in one
+    query per table and chunk rather than one per CSV row.
+    """
+    ordered = sorted(frns)
+    existing: Set[str] = set()
+    for i in range(0, len(ordered), FRN_LOOKUP_CHUNK):
+        chunk = ordered[i:i + FRN_LOOKUP_CHUNK]
+        result = await db.execute(select(Lead.frn).where(Lead.frn.in_(chunk)))
+        existing.update(result.scalars().all())
+        existing.update(await archived_frns(db, set(chunk) - existing))
+    return existing
+
+async def _possible_duplicates(db: AsyncSession, imported: List[Tuple[int, Lead]]) -> List[Dict[str, Any]]:
+    """
+    Imported rows that look like an existing lead or an earlier row of the
+    same file under a different FRN. They are imported anyway; this is a
+    report for review.
+    """
+    # Without autoflush the pending leads (and their keys) stay out of the
+    # lookups, so rows are not reported as duplicates of themselves
+    with db.no_autoflush:
+        matches = await find_duplicates(
+            db, [lead_signature(lead) for _, lead in imported], within_batch=True, limit=3
+        )
+    report = []
+    for (row, lead), row_matches in zip(imported, matches):
+        if not row_matches:
+            continue
+        report.append({
+            "row": row,
+            "frn": lead.frn,
+            "matches": [
+                {
+                    "id": match.lead.id, "frn": match.lead.frn, "company_name": match.lead.company_name,
+                    "score": match.score, "reasons": match.reasons,
+                }
+                if match.lead is not None else
+                {
+                    "row": imported[match.index][0], "frn": imported[match.index][1].frn,
+                    "company_name": imported[match.index][1].company_name,
+                    "score": match.score, "reasons": match.reasons,
+                }
+                for match in row_matches
+            ],
+        })
+    return report
+
 # Process CSV
 @router.post("/process-csv")
 async def process_csv(
     file_path: str = Body(..., embed=True),
+    check_duplicates: bool = Body(True, embed=True),
     db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_admin),
+    current_user: TokenData = Depends(deps.get_current_admin),
 ) -> Any:
     """
-    Process an uploaded CSV file.
+    Process an uploaded CSV file. Unless `check_duplicates` is false, the
+    response lists imported rows that may duplicate an existing lead (or an
+    earlier row) under a different FRN.
     """
     path = Path(file_path)
     if not path.exists():
+        telemetry.csv_imports.inc(("file_not_found",))
         raise HTTPException(status_code=404, detail="File not found")
         
     content = path.read_bytes()
@@ -160,11 +285,16 @@ async def process_csv(
     try:
         records = parse_csv(content)
     except Exception as e:
+        telemetry.csv_imports.inc(("parse_error",))
         raise HTTPException(status_code=400, detail=f"Error parsing CSV: {str(e)}")
         
     processed_count = 0
     errors = []
+    imported: List[Tuple[int, Lead]] = []
     seen_frns = set()
+    existing_frns = await _existing_frns(
+        db, {(record.get("frn") or "").strip() for record in records} - {""}
+    )
     
     for idx, record in enumerate(records):
         try:
@@ -179,8 +309,7 @@ async def process_csv(
                 continue
 
             # Check for existing FRN in database
-            existing_lead = await db.execute(select(Lead).where(Lead.frn == frn))
-            if existing_lead.scalar_one_or_none():
+            if frn in existing_frns:
                 errors.append(f"Row {idx+1}: Duplicate FRN in DB {frn}")
                 continue
                 
@@ -207,20 +336,28 @@ async def process_csv(
             
             new_lead = Lead(**lead_data)
             db.add(new_lead)
+            imported.append((idx + 1, new_lead))
             seen_frns.add(frn)
             processed_count += 1
             
         except Exception as e:
             errors.append(f"Row {idx+1}: {str(e)}")
             
+    telemetry.import_rows_rejected.inc(amount=len(errors))
+    possible_duplicates = await _possible_duplicates(db, imported) if check_duplicates else []
     try:
         await db.commit()
     except Exception as e:
         await db.rollback()
         errors.append(f"Commit failed: {str(e)}")
+        telemetry.csv_imports.inc(("commit_failed",))
+    else:
+        telemetry.csv_imports.inc(("completed",))
+        telemetry.leads_imported.inc(amount=processed_count)
 
     return {
         "message": "CSV processing complete",
         "processed_count": processed_count,
-        "errors": errors
+        "errors": errors,
+        "possible_duplicates": possible_duplicates,
     }
@@ -7,14 +7,29 @@ from jose import jwt
 from fastapi import Request
 
 from app.api import deps
-from app.core import security
+from app.core import security, telemetry
 from app.core.config import settings
 from app.crud.user import user_crud
 from app.schemas.user import Token, UserResponse, UserCreate
-from app.models.user import Role
+from app.models.user import Role, User
 
 router = APIRouter()
 
+def _issue_token(user: User) -> dict:
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return {
+        "access_token": security.create_access_token(
+            user.id,
+            expires_delta=access_token_expires,
+            extra_claims={
+                "role": user.role.value,
+                "name": user.name,
+                "ver": user.tokenVersion,
+            },
+        ),
+        "token_type": "bearer",
+    }
+
 @router.post("/login", response_model=Token)
 async def login_access_token(
     db: AsyncSession = Depends(deps.get_db),
@@ -27,15 +42,11 @@ async def login_access_token(
         db, email=form_data.username, password=form_data.password
     )
     if not user:
+        telemetry.logins.inc(("failure",))
         raise HTTPException(status_code=400, detail="Incorrect email or password")
-    
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+
+    telemetry.logins.inc(("success",))
+    return _issue_token(user)
 
 @router.get("/debug-token")
 async def debug_token(
@@ -75,10 +86,4 @@ async def dev_login(
         )
         user = await user_crud.create(db, obj_in=user_in)
         
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    return _issue_token(user)
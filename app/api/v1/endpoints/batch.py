@@ -0,0 +1,146 @@
+from typing import Any, Dict, List
+import asyncio
+import json
+import logging
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+
+from app.api import deps
+from app.core.config import settings
+from app.core.replica import SAFE_METHODS, replica_router
+from app.schemas.batch import BatchRequest, BatchRequestItem, BatchResponse, BatchResponseItem
+from app.schemas.user import TokenData
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+# Never finish (event stream) or would recurse
+EXCLUDED_PATHS = {f"{settings.API_V1_STR}/batch", f"{settings.API_V1_STR}/leads/events"}
+# Request headers a sub-request does not inherit from the batch
+_OWN_HEADERS = {b"content-length", b"content-type", b"idempotency-key"}
+
+def _sub_scope(scope: Dict[str, Any], item: BatchRequestItem, path: str, query: str, body: bytes) -> Dict[str, Any]:
+    headers = [(name, value) for name, value in scope["headers"] if name not in _OWN_HEADERS]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+    sub_scope = {
+        key: value for key, value in scope.items() if key not in ("route", "endpoint", "path_params")
+    }
+    sub_scope.update(
+        method=item.method,
+        path=path,
+        raw_path=path.encode(),
+        query_string=query.encode(),
+        headers=headers,
+    )
+    return sub_scope
+
+async def _dispatch(request: Request, item: BatchRequestItem) -> BatchResponseItem:
+    """
+    Run one sub-request through the app's routes (not its middleware), in
+    this process, and capture its response.
+    """
+    path, _, query = item.url.partition("?")
+    path = settings.API_V1_STR + path
+    if path in EXCLUDED_PATHS:
+        return BatchResponseItem(id=item.id, status=400, body={"detail": "Not allowed in a batch"})
+    body = json.dumps(item.body).encode() if item.body is not None else b""
+    finished = asyncio.Event()
+    request_sent = False
+    response: Dict[str, Any] = {"status": 500, "headers": [], "body": []}
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+
+    try:
+        await request.app.router(_sub_scope(request.scope, item, path, query, body), receive, send)
+    except Exception:
+        logger.exception("Batch sub-request %s %s failed", item.method, item.url)
+        return BatchResponseItem(id=item.id, status=500, body={"detail": "Internal Server Error"})
+    finally:
+        finished.set()
+
+    headers = {
+        name.decode("latin-1"): value.decode("latin-1")
+        for name, value in response["headers"]
+        if name != b"content-length"
+    }
+    content = b"".join(response["body"])
+    if not content:
+        parsed = None
+    elif headers.get("content-type", "").startswith("application/json"):
+        parsed = json.loads(content)
+    else:
+        parsed = content.decode("utf-8", errors="replace")
+    if item.method not in SAFE_METHODS and response["status"] < 400 and replica_router.enabled:
+        # Reads later in the batch must see this write, as ReadYourWritesMiddleware does between requests
+        authorization = request.headers.get("authorization")
+        if authorization:
+            replica_router.record_write(authorization)
+    return BatchResponseItem(id=item.id, status=response["status"], headers=headers, body=parsed)
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+    request: Request,
+    response: Response,
+    batch: BatchRequest,
+    token: str = Depends(deps.reusable_oauth2),
+    current_user: TokenData = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Run several API requests in one round-trip, e.g. everything a screen
+    loads. The caller is authenticated once for the whole batch.
+
+    Consecutive GETs run concurrently (up to BATCH_MAX_CONCURRENCY at a time);
+    any other method runs alone, after everything before it and before
+    everything after it. Each sub-request gets its own status, so one failing
+    does not fail the batch. Idempotency-Key is not applied to sub-requests.
+    """
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"A batch may hold at most {settings.BATCH_MAX_REQUESTS} requests",
+        )
+    semaphore = asyncio.Semaphore(settings.BATCH_MAX_CONCURRENCY)
+
+    async def read(item: BatchRequestItem) -> BatchResponseItem:
+        async with semaphore:
+            return await _dispatch(request, item)
+
+    async def run_reads(items: List[BatchRequestItem]) -> List[BatchResponseItem]:
+        return await asyncio.gather(*(read(item) for item in items))
+
+    reset = deps.batch_principal.set((token, current_user))
+    try:
+        responses: List[BatchResponseItem] = []
+        reads: List[BatchRequestItem] = []
+        for item in batch.requests:
+            if item.method == "GET":
+                reads.append(item)
+                continue
+            responses += await run_reads(reads)
+            reads = []
+            responses.append(await _dispatch(request, item))
+        responses += await run_reads(reads)
+    finally:
+        deps.batch_principal.reset(reset)
+    if replica_router.enabled and any(
+        item.method not in SAFE_METHODS and result.status < 400
+        for item, result in zip(batch.requests, responses)
+    ):
+        # ReadYourWritesMiddleware skips /batch; carry its writes to the other workers
+        response.headers.append("set-cookie", replica_router.sticky_cookie())
+    return {"responses": responses}
@@ -1,55 +1,71 @@
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
+import asyncio
 import csv
 import io
+import json
 from datetime import datetime, UTC
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, or_
+from sqlalchemy import func, select, or_
 
 from app.api import deps
+from app.core import telemetry
+from app.core.config import settings
+from app.core.database import replica_engine
+from app.core.events import lead_events
+from app.core.response_cache import (
+    ALL_LEADS_SCOPE,
+    UNASSIGNED_SCOPE,
+    employee_scope,
+    lead_list_cache,
+    response_cache_enabled,
+)
 from app.crud.lead import lead_crud
-from app.models.user import User, Role
-from app.models.lead import Lead, PipelineStatus
-from app.schemas.lead import LeadCreate, LeadUpdate, LeadResponse
+from app.crud.lead_archive import archived_frns, get_lead
+from app.crud.lead_duplicates import find_duplicates, lead_signature
+from app.crud.projections import lead_export_query, lead_responses, lead_rows, lead_rows_query
+from app.models.user import Role
+from app.models.lead import Lead, LeadArchive, PipelineStatus
+from app.schemas.lead import DuplicateCandidate, LeadChangesResponse, LeadCreate, LeadUpdate, LeadResponse
+from app.schemas.user import TokenData
 
 router = APIRouter()
 
-@router.get("/", response_model=List[LeadResponse])
-async def read_leads(
-    db: AsyncSession = Depends(deps.get_db),
-    skip: int = 0,
-    limit: int = 100,
-    current_user: User = Depends(deps.get_current_user),
-    status: Optional[PipelineStatus] = None,
-    search: Optional[str] = None,
-    assigned_to: Optional[str] = Query(None, alias="assignedTo"),
-) -> Any:
+_lead_list = TypeAdapter(List[LeadResponse])
+
+def _filter_leads(
+    query,
+    model,
+    *,
+    current_user: TokenData,
+    status: Optional[PipelineStatus],
+    search: Optional[str],
+    assigned_to: Optional[str],
+):
     """
-    Retrieve leads with filtering.
+    Apply the lead list filters to a query over `model` (Lead or LeadArchive).
     """
-    query = select(Lead)
-
-    # Apply filters
     if status:
-        query = query.filter(Lead.pipelineStatus == status)
-    
+        query = query.filter(model.pipelineStatus == status)
+
     if search:
         search_term = f"%{search}%"
         query = query.filter(
             or_(
-                Lead.company_name.ilike(search_term),
-                Lead.frn.ilike(search_term),
-                Lead.contact_email.ilike(search_term)
+                model.company_name.ilike(search_term),
+                model.frn.ilike(search_term),
+                model.contact_email.ilike(search_term)
             )
         )
 
     if assigned_to:
         if assigned_to == "unassigned":
-            query = query.filter(Lead.assignedEmployeeId == None)
+            query = query.filter(model.assignedEmployeeId == None)
         else:
-            query = query.filter(Lead.assignedEmployeeId == assigned_to)
+            query = query.filter(model.assignedEmployeeId == assigned_to)
 
     # RBAC: If not admin, can only see own leads or unassigned?
     # Or maybe employees can see all leads but only edit own?
@@ -61,30 +77,159 @@ async def read_leads(
         # Let's allow seeing own + unassigned.
         query = query.filter(
             or_(
-                Lead.assignedEmployeeId == current_user.id,
-                Lead.assignedEmployeeId == None
+                model.assignedEmployeeId == current_user.id,
+                model.assignedEmployeeId == None
             )
         )
+    return query
 
-    # Pagination
-    query = query.offset(skip).limit(limit)
-    
-    result = await db.execute(query)
-    leads = result.scalars().all()
-    return leads
+@router.get("/", response_model=List[LeadResponse])
+async def read_leads(
+    db: AsyncSession = Depends(deps.get_read_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: TokenData = Depends(deps.get_current_principal),
+    status: Optional[PipelineStatus] = None,
+    search: Optional[str] = None,
+    assigned_to: Optional[str] = Query(None, alias="assignedTo"),
+    include_archived: bool = Query(False, alias="includeArchived"),
+) -> Any:
+    """
+    Retrieve leads with filtering. With `includeArchived`, archived leads
+    follow the working ones.
+
+    Responses are cached per caller visibility scope and invalidated by lead
+    writes (see app.crud.lead_cache); X-Cache tells HIT from MISS.
+    """
+    def filtered(query, model):
+        return _filter_leads(
+            query, model, current_user=current_user, status=status, search=search, assigned_to=assigned_to
+        )
+
+    async def load() -> bytes:
+        leads = await lead_rows(db, filtered(lead_rows_query(Lead), Lead).offset(skip).limit(limit))
+
+        if include_archived and len(leads) < limit:
+            archive_skip = 0
+            if not leads and skip:
+                # The page starts past the working leads
+                hot_count = await db.scalar(filtered(select(func.count()).select_from(Lead), Lead))
+                archive_skip = max(skip - hot_count, 0)
+            leads += await lead_rows(
+                db, filtered(lead_rows_query(LeadArchive), LeadArchive).offset(archive_skip).limit(limit - len(leads))
+            )
+
+        return _lead_list.dump_json(lead_responses(leads), by_alias=True)
+
+    if not response_cache_enabled():
+        return Response(await load(), media_type="application/json")
+    if current_user.role == Role.ADMIN:
+        scopes = [ALL_LEADS_SCOPE]
+    else:
+        scopes = [employee_scope(current_user.id), UNASSIGNED_SCOPE]
+    params = {
+        "status": status.value if status else None,
+        # ILIKE ignores case, so case variants share an entry
+        "search": search.lower() if search else None,
+        "assignedTo": assigned_to,
+        "includeArchived": include_archived,
+        "skip": skip,
+        "limit": limit,
+    }
+    # Replica reads may lag the generation bump; don't keep them longer than the lag allowed
+    ttl = settings.DB_REPLICA_MAX_LAG_SECONDS if db.bind is replica_engine else None
+    result = await lead_list_cache.get(scopes, params, load, ttl=ttl)
+    return Response(result.value, media_type="application/json", headers={"X-Cache": result.status})
+
+def _event_visible_to(event: Dict[str, Any], user: TokenData) -> bool:
+    # Same rule as read_leads: employees see their own and unassigned leads,
+    # plus the event that takes a lead away from them
+    if user.role == Role.ADMIN or "leadId" not in event:
+        return True
+    visible_to = (None, user.id)
+    return (
+        event.get("assignedEmployeeId") in visible_to
+        or event.get("previousEmployeeId") in visible_to
+    )
+
+@router.get("/events")
+async def stream_lead_events(
+    request: Request,
+    current_user: TokenData = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Stream lead changes (created, claimed, status_changed, reassigned, ...) as
+    Server-Sent Events, filtered to the leads the caller may see.
+
+    A "resync" event means events may have been missed and the client should
+    refetch; "bulk" means many leads changed at once (e.g. a CSV import).
+    """
+    queue = await lead_events.subscribe()
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if _event_visible_to(event, current_user):
+                    yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            lead_events.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/changes", response_model=LeadChangesResponse)
+async def read_lead_changes(
+    db: AsyncSession = Depends(deps.get_read_db),
+    since: int = Query(0, ge=0, description="Cursor from the previous page; 0 for a full sync"),
+    limit: int = Query(500, ge=1, le=settings.CHANGE_FEED_MAX_LIMIT),
+    current_user: TokenData = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Incremental change feed for client-side replicas.
+
+    Returns leads created or modified after `since` and tombstones for leads
+    deleted or moved out of the caller's view, in cursor order. Pass the
+    returned `cursor` as `since` on the next call until `hasMore` is false.
+    """
+    employee_id = None if current_user.role == Role.ADMIN else current_user.id
+    leads, tombstones, has_more = await lead_crud.get_changes(
+        db, since=since, limit=limit, employee_id=employee_id
+    )
+    cursor = max(
+        [lead.changeSeq for lead in leads] + [tombstone.seq for tombstone in tombstones],
+        default=since,
+    )
+    return {
+        "changes": leads,
+        "deleted": [
+            {"id": tombstone.leadId, "seq": tombstone.seq, "reason": tombstone.reason}
+            for tombstone in tombstones
+        ],
+        "cursor": cursor,
+        "hasMore": has_more,
+    }
 
 @router.post("/", response_model=LeadResponse)
 async def create_lead(
     *,
     db: AsyncSession = Depends(deps.get_db),
     lead_in: LeadCreate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: TokenData = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Create new lead.
     """
     lead = await lead_crud.get_by_frn(db, frn=lead_in.frn)
-    if lead:
+    if lead or await archived_frns(db, {lead_in.frn}):
         raise HTTPException(
             status_code=400,
             detail="The lead with this FRN already exists in the system.",
@@ -94,14 +239,17 @@ async def create_lead(
 
 @router.get("/export")
 async def export_leads(
-    db: AsyncSession = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_admin),
+    db: AsyncSession = Depends(deps.get_read_db),
+    current_user: TokenData = Depends(deps.get_current_admin),
+    include_archived: bool = Query(False, alias="includeArchived"),
 ) -> Any:
     """
-    Export all leads to CSV (Admin only).
+    Export all leads to CSV (Admin only). With `includeArchived`, archived
+    leads follow and an "Archived At" column tells them apart.
     """
-    result = await db.execute(select(Lead))
-    leads = result.scalars().all()
+    leads = list((await db.execute(lead_export_query(Lead))).all())
+    if include_archived:
+        leads.extend((await db.execute(lead_export_query(LeadArchive))).all())
 
     output = io.StringIO()
     writer = csv.writer(output)
@@ -112,11 +260,13 @@ async def export_leads(
         "Service Type", "Website", "Pipeline Status", "Assigned Employee ID",
         "Created At", "Updated At"
     ]
+    if include_archived:
+        headers.append("Archived At")
     writer.writerow(headers)
 
     # Rows
     for lead in leads:
-        writer.writerow([
+        row = [
             str(lead.id),
             lead.frn,
             lead.company_name,
@@ -128,7 +278,10 @@ async def export_leads(
             str(lead.assignedEmployeeId) if lead.assignedEmployeeId else "",
             lead.createdAt.isoformat() if lead.createdAt else "",
             lead.updatedAt.isoformat() if lead.updatedAt else ""
-        ])
+        ]
+        if include_archived:
+            row.append(lead.archivedAt.isoformat() if lead.archivedAt else "")
+        writer.writerow(row)
 
     output.seek(0)
     return StreamingResponse(
@@ -142,16 +295,19 @@ async def claim_lead(
     *,
     db: AsyncSession = Depends(deps.get_db),
     lead_id: str = Query(..., description="ID of the lead to claim"),
-    current_user: User = Depends(deps.get_current_user),
+    current_user: TokenData = Depends(deps.get_current_principal),
 ) -> Any:
     """
     Claim an unassigned lead.
     """
-    lead = await lead_crud.get(db, id=lead_id)
+    # Locked, so a concurrent claim waits and then sees this one's assignee
+    lead = await lead_crud.get_for_update(db, id=lead_id)
     if not lead:
+        telemetry.lead_claims.inc(("not_found",))
         raise HTTPException(status_code=404, detail="Lead not found")
     
     if lead.assignedEmployeeId is not None:
+        telemetry.lead_claims.inc(("already_assigned",))
         raise HTTPException(status_code=400, detail="Lead is already assigned")
     
     if lead.pipelineStatus != PipelineStatus.Unassigned:
@@ -173,20 +329,21 @@ async def claim_lead(
     
     db.add(lead)
     await db.commit()
+    telemetry.lead_claims.inc(("claimed",))
     await db.refresh(lead)
     return lead
 
 @router.get("/{lead_id}", response_model=LeadResponse)
 async def read_lead(
     *,
-    db: AsyncSession = Depends(deps.get_db),
+    db: AsyncSession = Depends(deps.get_read_db),
     lead_id: str,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: TokenData = Depends(deps.get_current_principal),
 ) -> Any:
     """
-    Get lead by ID.
+    Get lead by ID, including archived leads.
     """
-    lead = await lead_crud.get(db, id=lead_id)
+    lead = await get_lead(db, lead_id)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
@@ -197,18 +354,49 @@ async def read_lead(
 
     return lead
 
+@router.get("/{lead_id}/duplicates", response_model=List[DuplicateCandidate])
+async def read_lead_duplicates(
+    *,
+    db: AsyncSession = Depends(deps.get_read_db),
+    lead_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    current_user: TokenData = Depends(deps.get_current_principal),
+) -> Any:
+    """
+    Leads that may be the same organisation under another FRN (similar
+    company name, shared email/website domain or phone number), best first.
+    Employees only see candidates they could open themselves.
+    """
+    lead = await get_lead(db, lead_id)
+    if not lead:
+        raise HTTPException(status_code=404, detail="Lead not found")
+
+    visible = None
+    if current_user.role != Role.ADMIN:
+        if lead.assignedEmployeeId != current_user.id and lead.assignedEmployeeId is not None:
+             raise HTTPException(status_code=403, detail="Not authorized to view this lead")
+        visible = or_(Lead.assignedEmployeeId.is_(None), Lead.assignedEmployeeId == current_user.id)
+
+    [matches] = await find_duplicates(
+        db, [lead_signature(lead)], exclude={lead.id}, visible=visible, limit=limit
+    )
+    return [
+        DuplicateCandidate(**match.lead._mapping, score=match.score, reasons=match.reasons)
+        for match in matches
+    ]
+
 @router.put("/{lead_id}", response_model=LeadResponse)
 async def update_lead(
     *,
     db: AsyncSession = Depends(deps.get_db),
     lead_id: str,
     lead_in: LeadUpdate,
-    current_user: User = Depends(deps.get_current_user),
+    current_user: TokenData = Depends(deps.get_current_principal),
 ) -> Any:
     """
-    Update a lead.
+    Update a lead. Archived leads are read-only.
     """
-    lead = await lead_crud.get(db, id=lead_id)
+    lead = await get_lead(db, lead_id, for_update=True)
     if not lead:
         raise HTTPException(status_code=404, detail="Lead not found")
     
@@ -217,6 +405,9 @@ async def update_lead(
         if lead.assignedEmployeeId != current_user.id:
              raise HTTPException(status_code=403, detail="Not authorized to update this lead")
 
+    if isinstance(lead, LeadArchive):
+        raise HTTPException(status_code=409, detail="Archived leads cannot be updated")
+
     # Update logic with history
     update_data = lead_in.model_dump(exclude_unset=True)
     
@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, List
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.api.v1.endpoints.leads import read_leads
+from app.core.response_cache import bypass_response_cache
+from app.core.token_versions import token_versions
+from app.crud.lead import lead_crud
+from app.crud.lead_stats import get_lead_metrics
+from app.crud.user import user_crud
+from app.models.user import Role
+from app.schemas.user import TokenData
+
+logger = logging.getLogger(__name__)
+
+# Matches nothing: warm-up statements must compile the real SQL but return no rows
+_NO_ID = str(uuid.UUID(int=0))
+_ADMIN = TokenData(sub=_NO_ID, role=Role.ADMIN, name="warmup", ver=0)
+_EMPLOYEE = TokenData(sub=_NO_ID, role=Role.EMPLOYEE, name="warmup", ver=0)
+
+WarmStatement = Callable[[AsyncSession], Awaitable[object]]
+
+def _read_leads(user: TokenData) -> WarmStatement:
+    return lambda db: read_leads(
+        db=db, skip=0, limit=0, current_user=user, status=None, search=None, assigned_to=None,
+        include_archived=False,
+    )
+
+# The statements behind the busiest endpoints, built by the same code, so the
+# compiled SQL cache key and the prepared statement text match real requests
+HOT_STATEMENTS: List[WarmStatement] = [
+    lambda db: user_crud.get_by_email(db, email=""),
+    lambda db: user_crud.get(db, id=_NO_ID),
+    lambda db: lead_crud.get(db, id=_NO_ID),
+    lambda db: lead_crud.get_by_frn(db, frn=""),
+    _read_leads(_ADMIN),
+    _read_leads(_EMPLOYEE),
+    get_lead_metrics,
+]
+
+async def warm_up(session_factory: async_sessionmaker, connections: int) -> None:
+    """
+    Open `connections` pool connections at once and run the hot statements on
+    each, so the first requests after startup find open connections,
+    compiled SQL and (per connection) asyncpg prepared statements. Also loads
+    the token revocation map every authenticated request needs.
+
+    The response cache is bypassed: a cached lead list would skip its queries.
+    """
+    start = time.perf_counter()
+    await token_versions.refresh()
+    # All sessions must hold their connection at the same time, or the pool
+    # would hand the same one out again
+    opened = asyncio.Barrier(connections) if connections > 1 else None
+
+    async def warm_connection() -> None:
+        async with session_factory() as session:
+            try:
+                for statement in HOT_STATEMENTS:
+                    await statement(session)
+            except BaseException:
+                if opened is not None:
+                    await opened.abort()
+                raise
+            if opened is not None:
+                await opened.wait()
+
+    with bypass_response_cache():
+        await asyncio.gather(*(warm_connection() for _ in range(connections)))
+    logger.info(
+        "Warmed %d database connections and %d statements in %.0f ms",
+        connections, len(HOT_STATEMENTS), (time.perf_counter() - start) * 1000,
+    )
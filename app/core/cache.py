@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+HIT = "HIT"
+STALE = "STALE"
+MISS = "MISS"
+
+@dataclass
+class CacheResult(Generic[T]):
+    value: T
+    status: str  # HIT, STALE or MISS
+    age: float  # seconds since the value was computed
+
+@dataclass
+class _Entry:
+    value: Any
+    computed_at: float
+
+class SingleFlightCache:
+    """
+    In-memory TTL cache with request coalescing and stale-while-revalidate.
+
+    - Fresh entries (younger than `ttl`) are returned as HIT.
+    - Expired entries younger than `max_stale` are returned as STALE straight
+      away while one background task recomputes them.
+    - Missing (or too stale) entries are computed once; concurrent callers for
+      the same key await the same in-flight task (MISS).
+    """
+
+    def __init__(self, ttl: float, max_stale: float):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def _refresh(
+        self, key: Hashable, loader: Callable[[], Awaitable[T]], background: bool = False
+    ) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(self._load(key, loader))
+            if background:
+                # Nobody awaits a background refresh, so report its failure here
+                task.add_done_callback(_log_refresh_failure)
+            self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> T:
+        try:
+            value = await loader()
+            self._entries[key] = _Entry(value, time.monotonic())
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[T]]) -> CacheResult[T]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry.computed_at
+            if age <= self.ttl:
+                return CacheResult(entry.value, HIT, age)
+            if age <= self.max_stale:
+                self._refresh(key, loader, background=True)
+                return CacheResult(entry.value, STALE, age)
+
+        # Shielded so a caller that goes away does not cancel the shared computation
+        value = await asyncio.shield(self._refresh(key, loader))
+        return CacheResult(value, MISS, 0.0)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+def _log_refresh_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Background cache refresh failed", exc_info=task.exception())
@@ -0,0 +1,119 @@
+"""
+Stop database work nobody is waiting for, so slow requests cannot hold pool
+connections that other requests need:
+
+- Statement timeouts per route (DB_STATEMENT_TIMEOUT_SECONDS, overridden per
+  route template by DB_ROUTE_STATEMENT_TIMEOUTS): every transaction an API
+  request opens starts with `SET LOCAL statement_timeout`, so Postgres
+  cancels a statement that runs too long and the request fails with 504.
+- Cancellation on client disconnect (DB_CANCEL_ON_DISCONNECT): a GET whose
+  client goes away before the response is complete is cancelled. asyncpg
+  cancels the query in flight on the server and the session returns its
+  connection to the pool.
+
+Both are counted in telemetry. SQLite has no statement timeout; requests on
+it are still cancelled on disconnect.
+"""
+import asyncio
+import logging
+from contextvars import ContextVar
+from typing import Iterable, Optional
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from app.core import telemetry
+from app.core.config import settings
+from app.core.dialects import is_postgresql
+
+logger = logging.getLogger(__name__)
+
+# SQLSTATE of a statement cancelled by statement_timeout (or by a cancel request)
+QUERY_CANCELED = "57014"
+# Status recorded for requests cancelled because the client went away (nginx's convention)
+CLIENT_CLOSED_REQUEST = 499
+
+# Statement timeout, in seconds, of the current request's transactions
+statement_timeout: ContextVar[Optional[float]] = ContextVar("statement_timeout", default=None)
+
+def route_statement_timeout(route: str) -> Optional[float]:
+    seconds = settings.DB_ROUTE_STATEMENT_TIMEOUTS.get(route, settings.DB_STATEMENT_TIMEOUT_SECONDS)
+    return seconds if seconds > 0 else None
+
+async def apply_statement_timeout(request: Request) -> None:
+    """
+    Router dependency: sets the statement timeout of the matched route for
+    the rest of the request. Runs before the endpoint's own dependencies, so
+    it covers their queries too.
+    """
+    statement_timeout.set(route_statement_timeout(telemetry.route_template(request.scope)))
+
+@event.listens_for(Session, "after_begin")
+def _set_statement_timeout(session, transaction, connection) -> None:
+    seconds = statement_timeout.get()
+    if seconds is not None and is_postgresql(connection):
+        # LOCAL: reverts at commit or rollback, before the connection goes back to the pool
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {round(seconds * 1000)}")
+
+def is_statement_timeout(exc: DBAPIError) -> bool:
+    return getattr(exc.orig, "pgcode", None) == QUERY_CANCELED
+
+class CancelOnDisconnectMiddleware:
+    """
+    Runs GET/HEAD requests in a task of their own and cancels it when the
+    client disconnects before the response is complete. Other methods are
+    left to finish: a write the client stopped waiting for should still
+    either happen or not, not stop halfway.
+    """
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ()):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or scope["path"] in self.exclude_paths
+        ):
+            return await self.app(scope, receive, send)
+
+        messages: asyncio.Queue = asyncio.Queue()
+        started = finished = False
+
+        async def watch() -> None:
+            # Forwards the request's messages to the app; returns on disconnect
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        async def send_wrapper(message):
+            nonlocal started, finished
+            if message["type"] == "http.response.start":
+                started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                finished = True
+            await send(message)
+
+        handler = asyncio.ensure_future(self.app(scope, messages.get, send_wrapper))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            done, _ = await asyncio.wait((handler, watcher), return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            handler.cancel()
+            raise
+        finally:
+            watcher.cancel()
+        if handler in done or finished:
+            # Also when only background tasks are left after a complete response
+            return await handler
+
+        handler.cancel()
+        await asyncio.gather(handler, return_exceptions=True)
+        telemetry.http_requests_cancelled.inc((scope["method"], telemetry.route_template(scope)))
+        logger.info("Cancelled %s %s: the client disconnected", scope["method"], scope["path"])
+        if not started:
+            # Never reaches the client, which is gone; it labels the request in telemetry
+            await send({"type": "http.response.start", "status": CLIENT_CLOSED_REQUEST, "headers": []})
@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Optional, Union
 from pydantic import AnyHttpUrl, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,16 +10,113 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # seconds to wait for a connection before failing
+    DB_POOL_RECYCLE: int = 1800  # seconds; -1 keeps connections forever
+    DB_POOL_PRE_PING: bool = True
+    DB_QUERY_CACHE_SIZE: int = 500  # compiled SQL statements cached by SQLAlchemy
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = 100  # per connection; 0 behind pgbouncer
+    DB_WARMUP_CONNECTIONS: int = 2  # opened and primed at startup (capped at DB_POOL_SIZE); 0 disables
+    DB_WARMUP_TIMEOUT_SECONDS: float = 10.0  # startup continues cold past this
+    # Statement timeouts for API requests (Postgres), by route template as
+    # labelled in /metrics; 0 = none. Exceeding one fails the request with 504
+    DB_STATEMENT_TIMEOUT_SECONDS: float = 0.0  # routes not listed below
+    DB_ROUTE_STATEMENT_TIMEOUTS: Dict[str, float] = {
+        "/api/v1/leads/": 15.0,  # searches scan the whole table
+        "/api/v1/leads/export": 300.0,
+    }
+    DB_CANCEL_ON_DISCONNECT: bool = True  # cancel GETs (and their queries) whose client went away
+
+    # Read replica (optional): read-only endpoints are routed here when healthy
+    DATABASE_REPLICA_URL: Optional[str] = None
+    DB_REPLICA_MAX_LAG_SECONDS: float = 5.0  # fall back to the primary beyond this
+    DB_REPLICA_CHECK_INTERVAL_SECONDS: float = 2.0  # how long a health/lag check is trusted
+    DB_REPLICA_RETRY_SECONDS: float = 30.0  # primary-only period after the replica fails
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0  # reads stick to the primary after a write
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    TOKEN_VERSION_REFRESH_SECONDS: int = 30  # how stale the revocation map may get
+
+    # Password hashing (argon2)
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 102400  # KiB
+    ARGON2_PARALLELISM: int = 8
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_LIMIT: int = 64  # in-flight + waiting jobs before 503
     
+    # Admin metrics cache
+    METRICS_CACHE_TTL_SECONDS: float = 5.0
+    METRICS_CACHE_MAX_STALE_SECONDS: float = 300.0  # older values are recomputed inline
+    METRICS_TIMESERIES_MAX_DAYS: int = 731
+
+    # Live lead events (Server-Sent Events over LISTEN/NOTIFY)
+    LEAD_EVENTS_CHANNEL: str = "lead_events"
+    SSE_KEEPALIVE_SECONDS: float = 15.0
+
+    # Lead list response cache, invalidated by lead writes
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_SECONDS: float = 300.0  # upper bound on staleness from writes the cache can't see
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # per worker, for the in-process backend
+    RESPONSE_CACHE_URL: Optional[str] = None  # redis://... for a cache shared by all workers
+
+    # Idempotency-Key support for lead creation, claims and CSV imports
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # how long a completed response is replayed
+    IDEMPOTENCY_LOCK_SECONDS: int = 900  # a request still running after this (worker died) may be retried
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 60.0  # per worker, between deletes of expired keys
+
+    # POST /batch: several API requests in one round-trip
+    BATCH_MAX_REQUESTS: int = 20
+    BATCH_MAX_CONCURRENCY: int = 4  # GETs of one batch in flight at once; each may hold a DB connection
+
+    # Lead change feed
+    CHANGE_FEED_MAX_LIMIT: int = 1000
+
+    # Archiving of closed (Approved/Rejected) leads out of the Lead table
+    LEAD_ARCHIVE_ENABLED: bool = False  # background passes in every worker; one archives at a time
+    LEAD_ARCHIVE_AFTER_DAYS: float = 90.0  # closed and untouched for this long
+    LEAD_ARCHIVE_INTERVAL_SECONDS: float = 3600.0  # between passes
+    LEAD_ARCHIVE_BATCH_SIZE: int = 1000  # leads moved per transaction
+    LEAD_ARCHIVE_BATCH_PAUSE_SECONDS: float = 1.0  # between batches, to leave room for live traffic
+
+    # Prometheus-format telemetry at /metrics
+    TELEMETRY_ENABLED: bool = True
+    TELEMETRY_SCRAPE_TOKEN: Optional[str] = None  # require "Authorization: Bearer <token>" to scrape
+
+    # Per-request query tracking (Server-Timing header, N+1 and slow query logs)
+    QUERY_TRACKING_ENABLED: bool = True
+    SLOW_QUERY_SECONDS: float = 0.5  # statements slower than this are logged
+    QUERY_REPEAT_WARN_THRESHOLD: int = 10  # same statement more often than this in one request
+    QUERY_BUDGET_WARN: int = 50  # statements per request before a warning
+
+    # Opt-in request profiling (admins send X-Profile: 1, or a sampled share of requests)
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_PERCENT: float = 0.0
+    PROFILING_MODE: str = "sampling"  # "sampling" (speedscope, includes await time) or "cprofile" (pstats)
+    PROFILING_INTERVAL_SECONDS: float = 0.005  # sampling period
+    PROFILING_DIR: str = "profiles"
+    PROFILING_MAX_PROFILES: int = 50  # oldest profiles are deleted beyond this
+
+    # Server (python -m app.server)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WEB_CONCURRENCY: int = 0  # worker processes; 0 = one per available CPU
+    DB_CONNECTION_BUDGET: Optional[int] = None  # primary connections for all workers together; splits the pool
+    WEB_MAX_REQUESTS: int = 0  # recycle a worker after this many requests; 0 = never
+    WEB_MAX_REQUESTS_JITTER: int = 0  # random extra requests, so workers don't recycle together
+    WEB_GRACEFUL_TIMEOUT_SECONDS: int = 30  # in-flight requests get this long on stop/restart
+    WORKER_ID: Optional[str] = None  # set per process by app.server; labels /metrics series
+
     # CORS
     CORS_ORIGINS: List[str] = []
 
-    @field_validator("DATABASE_URL", mode="before")
+    @field_validator("DATABASE_URL", "DATABASE_REPLICA_URL", mode="before")
     def ensure_asyncpg(cls, v: Union[str, List[str]]):
         if isinstance(v, str):
             if v.startswith("postgresql://") and "+asyncpg" not in v:
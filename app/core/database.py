@@ -1,12 +1,102 @@
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import time
+from typing import Any, AsyncGenerator, Dict
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
 from app.core.config import settings
+from app.core.dialects import is_sqlite_url
+
+class PoolStats:
+    """
+    Cumulative checkout statistics for the connection pool. Together with
+    the pool's live counters these show whether pool_size/max_overflow fit
+    the worker's concurrency.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_checkout(self, wait: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += wait
+        if wait > self.wait_seconds_max:
+            self.wait_seconds_max = wait
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool that records how long each checkout waits (including
+    opening a new connection and pre-ping) and how many checkouts time out.
+
+    `stats` is a class attribute so it survives the pool being recreated by
+    `engine.dispose()`; use `instrumented_pool()` to get one per engine.
+    """
+    stats: PoolStats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record_checkout(time.perf_counter() - start)
+
+def instrumented_pool(stats: PoolStats) -> type:
+    return type("InstrumentedQueuePool", (InstrumentedQueuePool,), {"stats": stats})
+
+pool_stats = PoolStats()
+replica_pool_stats = PoolStats()
+
+def _create_engine(url: str, stats: PoolStats) -> AsyncEngine:
+    if is_sqlite_url(url):
+        return _create_sqlite_engine(url, stats)
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        future=True,
+        poolclass=instrumented_pool(stats),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        # SQLAlchemy's compiled SQL cache, shared by all connections
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        # asyncpg prepared statements kept per connection (set to 0 behind
+        # pgbouncer in transaction pooling mode)
+        connect_args={"prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE},
+    )
+
+def _create_sqlite_engine(url: str, stats: PoolStats) -> AsyncEngine:
+    """
+    SQLite (aiosqlite) engine for tests, benchmarks and local development. An
+    in-memory database exists once per connection, so it gets a single
+    shared connection.
+    """
+    if url.rstrip("/").endswith(":memory:") or url.rstrip("/") == "sqlite+aiosqlite:":
+        return create_async_engine(url, echo=settings.DB_ECHO, poolclass=StaticPool)
+    return create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=instrumented_pool(stats),
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+    )
 
 # Create Async Engine
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=settings.ENVIRONMENT == "development",
-    future=True
+engine = _create_engine(settings.DATABASE_URL, pool_stats)
+
+# Optional read replica, used by read-only endpoints (see app.core.replica)
+replica_engine = (
+    _create_engine(settings.DATABASE_REPLICA_URL, replica_pool_stats)
+    if settings.DATABASE_REPLICA_URL else None
 )
 
 # Create Session Factory
@@ -17,14 +107,40 @@ async_session_factory = async_sessionmaker(
     autoflush=False
 )
 
+replica_session_factory = async_sessionmaker(
+    bind=replica_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False
+) if replica_engine is not None else None
+
 # Base Class for Models
 class Base(DeclarativeBase):
     pass
 
 # Dependency for FastAPI
-async def get_db() -> AsyncSession:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_factory() as session:
         try:
             yield session
         finally:
             await session.close()
+
+def get_pool_status(db_engine: AsyncEngine = engine) -> Dict[str, Any]:
+    pool = db_engine.pool
+    stats = pool.stats
+    return {
+        "size": pool.size(),
+        "checkedOut": pool.checkedout(),
+        "checkedIn": pool.checkedin(),
+        # QueuePool counts unopened pool slots as negative overflow
+        "overflow": max(pool.overflow(), 0),
+        "maxOverflow": settings.DB_MAX_OVERFLOW,
+        "timeout": pool.timeout(),
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "waitSecondsTotal": round(stats.wait_seconds_total, 6),
+        "waitSecondsMax": round(stats.wait_seconds_max, 6),
+        "waitSecondsAvg": round(stats.wait_seconds_total / stats.checkouts, 6)
+        if stats.checkouts else 0.0,
+    }
@@ -0,0 +1,124 @@
+"""
+Database backends. Postgres is the production database; SQLite (aiosqlite)
+also runs the models and CRUD layer, so tests and benchmarks need no
+server. Code with a Postgres-only fast path (array parameters, NOTIFY,
+advisory locks, LOCK TABLE) checks `is_postgresql` and otherwise runs
+portable SQL.
+
+The driver's own transaction handling is switched off on SQLite connections
+and SQLAlchemy emits BEGIN itself; otherwise a SAVEPOINT opened before any
+write would start (and its RELEASE commit) the outer transaction, which
+breaks the rollback-per-test fixture.
+
+SQLite has no sequences: `nextval('<name>')` is emulated with a function
+registered on each connection, counting up from the largest value stored in
+the columns the sequence feeds. The counter is per process, which is fine
+for the single-process uses SQLite is meant for here.
+"""
+import sqlite3
+import threading
+from typing import Any, Dict, Tuple
+from sqlalchemy import Sequence, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.sqlite.aiosqlite import AsyncAdapt_aiosqlite_connection
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import next_value
+
+def dialect_name(bind: Any) -> str:
+    """
+    Name of the dialect behind a session, connection or engine.
+    """
+    if isinstance(bind, (Session, AsyncSession)):
+        bind = bind.get_bind()
+    return bind.dialect.name
+
+def is_postgresql(bind: Any) -> bool:
+    return dialect_name(bind) == "postgresql"
+
+def dialect_insert(bind: Any):
+    """
+    The `insert` with ON CONFLICT support (`on_conflict_do_update`) for the
+    database behind `bind`; Postgres and SQLite share the same API.
+    """
+    return postgresql.insert if is_postgresql(bind) else sqlite.insert
+
+def is_sqlite_url(url: str) -> bool:
+    return url.startswith("sqlite")
+
+@compiles(next_value, "sqlite")
+def _sqlite_next_value(element, compiler, **kw) -> str:
+    return f"nextval('{element.sequence.name}')"
+
+class _SQLiteSequences:
+    """
+    Last value handed out per (database, sequence), shared by all connections
+    of this process to the same database file.
+    """
+
+    def __init__(self):
+        self._last: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def install(self, dbapi_connection) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            cursor.execute("PRAGMA database_list")
+            path = next(row[2] for row in cursor.fetchall() if row[1] == "main")
+            # Each connection to an in-memory database has its own database
+            database = path or f"memory-{id(dbapi_connection)}"
+            for sequence, columns in _sequence_columns().items():
+                stored = 0
+                for table, column in columns:
+                    try:
+                        cursor.execute(f'SELECT MAX("{column}") FROM "{table}"')
+                    except Exception:
+                        continue  # schema not created yet
+                    stored = max(stored, cursor.fetchone()[0] or 0)
+                with self._lock:
+                    key = (database, sequence)
+                    self._last[key] = max(self._last.get(key, 0), stored)
+        finally:
+            cursor.close()
+
+        def nextval(sequence: str) -> int:
+            with self._lock:
+                key = (database, sequence)
+                self._last[key] = self._last.get(key, 0) + 1
+                return self._last[key]
+
+        dbapi_connection.create_function("nextval", 1, nextval)
+
+_sqlite_sequences = _SQLiteSequences()
+
+def _sequence_columns() -> Dict[str, list]:
+    from app.core.database import Base
+
+    columns: Dict[str, list] = {}
+    for table in Base.metadata.tables.values():
+        for column in table.columns:
+            default = column.server_default.arg if column.server_default is not None else None
+            sequence = column.default if isinstance(column.default, Sequence) else getattr(default, "sequence", None)
+            if sequence is not None:
+                columns.setdefault(sequence.name, []).append((table.name, column.name))
+    return columns
+
+@event.listens_for(Engine, "connect")
+def _prepare_sqlite_connection(dbapi_connection, connection_record) -> None:
+    if not isinstance(dbapi_connection, (sqlite3.Connection, AsyncAdapt_aiosqlite_connection)):
+        return
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    # Off by default in SQLite; the models rely on ON DELETE CASCADE / SET NULL
+    cursor.execute("PRAGMA foreign_keys = ON")
+    # Readers are not blocked by a writer (ignored for in-memory databases)
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.close()
+    _sqlite_sequences.install(dbapi_connection)
+
+@event.listens_for(Engine, "begin")
+def _begin_sqlite_transaction(connection) -> None:
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql("BEGIN")
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Set
+import asyncpg
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Sent to subscribers whose view may have missed events (queue overflow or a
+# lost LISTEN connection); clients should refetch
+RESYNC_EVENT: Dict[str, Any] = {"type": "resync"}
+
+def asyncpg_dsn(url: str) -> str:
+    """
+    Convert a SQLAlchemy URL to a DSN that asyncpg.connect accepts.
+    """
+    return url.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+class LeadEventBroker:
+    """
+    Fans lead change events out to in-process subscribers.
+
+    Each worker holds a single LISTEN connection, opened when the first client
+    subscribes. Writes publish with NOTIFY (see `app.crud.lead_events`), so
+    subscribers see changes committed by any worker.
+    """
+
+    def __init__(self, dsn: str, channel: str, queue_size: int = 1000):
+        self.dsn = dsn
+        self.channel = channel
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._conn: Optional[asyncpg.Connection] = None
+        self._connect_lock = asyncio.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    async def subscribe(self) -> asyncio.Queue:
+        await self._ensure_listening()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish_local(self, event: Dict[str, Any]) -> None:
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # Slow consumer: drop its backlog and tell it to refetch
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC_EVENT)
+
+    def _on_notification(self, conn, pid: int, channel: str, payload: str) -> None:
+        try:
+            event = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed lead event payload")
+            return
+        self.publish_local(event)
+
+    def _on_termination(self, conn) -> None:
+        self._conn = None
+        self.publish_local(RESYNC_EVENT)
+        if self._subscribers and (self._reconnect_task is None or self._reconnect_task.done()):
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = 0.5
+        while self._subscribers and self._conn is None:
+            try:
+                await self._ensure_listening()
+                self.publish_local(RESYNC_EVENT)
+            except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+                logger.warning("Lead event listener reconnect failed; retrying in %.1fs", delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 30.0)
+
+    async def _ensure_listening(self) -> None:
+        if self._conn is not None and not self._conn.is_closed():
+            return
+        async with self._connect_lock:
+            if self._conn is not None and not self._conn.is_closed():
+                return
+            conn = await asyncpg.connect(self.dsn)
+            conn.add_termination_listener(self._on_termination)
+            await conn.add_listener(self.channel, self._on_notification)
+            self._conn = conn
+
+    async def close(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.close()
+
+lead_events = LeadEventBroker(
+    dsn=asyncpg_dsn(settings.DATABASE_URL),
+    channel=settings.LEAD_EVENTS_CHANNEL,
+)
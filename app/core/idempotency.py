@@ -0,0 +1,308 @@
+"""
+Idempotency-Key support for non-idempotent POST endpoints.
+
+A client sends the same `Idempotency-Key` header with every retry of one
+logical request. The first request runs; a retry of it (same user, key and
+request) gets the stored response back without running anything, marked with
+`Idempotent-Replayed: true`. While the first request is still running, a
+retry gets 409; reusing a key for a different request gets 422.
+
+Keys live in the IdempotencyKey table, so a retry that lands on another
+worker is recognised too. Only the request's digest and the final response
+are kept, for IDEMPOTENCY_TTL_SECONDS.
+"""
+import hashlib
+import logging
+import time
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Awaitable, Callable, Collection, Optional, Tuple
+from sqlalchemy import delete, select, tuple_, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from starlette.responses import JSONResponse, Response
+from app.core import telemetry
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.core.dialects import dialect_insert
+from app.models.idempotency import IdempotencyKey
+from app.schemas.user import TokenData
+
+logger = logging.getLogger(__name__)
+
+HEADER = b"idempotency-key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+PURGE_BATCH = 1000  # expired keys deleted per purge
+
+class KeyInProgress(Exception):
+    pass
+
+class KeyMismatch(Exception):
+    pass
+
+@dataclass
+class StoredResponse:
+    status: int
+    content_type: Optional[str]
+    body: bytes
+
+def request_fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> bytes:
+    """
+    16-byte digest of everything that makes two requests "the same request".
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (method.encode(), path.encode(), query_string, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.digest()
+
+class IdempotencyStore:
+    """
+    Key → (request fingerprint, status, response body) per user. A key whose
+    request is running is locked for `lock_seconds`, so a worker dying
+    mid-request does not block the key forever; a finished one is replayed
+    for `ttl` seconds. Expired rows are ignored by lookups and deleted in
+    batches at most every `purge_interval` seconds per worker.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        ttl: float,
+        lock_seconds: float,
+        purge_interval: float,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.lock_seconds = lock_seconds
+        self.purge_interval = purge_interval
+        self._next_purge = 0.0
+
+    @staticmethod
+    def _row(user_id: str, key: str):
+        return (IdempotencyKey.userId == user_id) & (IdempotencyKey.key == key)
+
+    async def begin(self, user_id: str, key: str, fingerprint: bytes) -> Optional[StoredResponse]:
+        """
+        Take `key` for a new request and return None, or return the stored
+        response of the finished request it was used for. Raises KeyInProgress
+        or KeyMismatch when the request must not run.
+        """
+        now = datetime.now(UTC)
+        async with self.session_factory() as session:
+            stmt = dialect_insert(session)(IdempotencyKey).values(
+                userId=user_id,
+                key=key,
+                fingerprint=fingerprint,
+                statusCode=None,
+                contentType=None,
+                body=None,
+                createdAt=now,
+                expiresAt=now + timedelta(seconds=self.lock_seconds),
+            )
+            # An expired key is taken over as if it were new
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[IdempotencyKey.userId, IdempotencyKey.key],
+                set_={
+                    column: stmt.excluded[column]
+                    for column in ("fingerprint", "statusCode", "contentType", "body", "createdAt", "expiresAt")
+                },
+                where=IdempotencyKey.expiresAt <= now,
+            ).returning(IdempotencyKey.userId)
+
+            taken = (await session.execute(stmt)).first() is not None
+            existing = None
+            if not taken:
+                existing = (await session.execute(
+                    select(
+                        IdempotencyKey.fingerprint,
+                        IdempotencyKey.statusCode,
+                        IdempotencyKey.contentType,
+                        IdempotencyKey.body,
+                    ).where(self._row(user_id, key))
+                )).first()
+            await self._purge_expired(session, now)
+            await session.commit()
+
+        if taken:
+            return None
+        if existing is None or existing.statusCode is None:
+            # Gone again only if it expired just now; the retry will take it
+            raise KeyInProgress()
+        if existing.fingerprint != fingerprint:
+            raise KeyMismatch()
+        return StoredResponse(existing.statusCode, existing.contentType, existing.body or b"")
+
+    async def complete(self, user_id: str, key: str, response: StoredResponse) -> None:
+        async with self.session_factory() as session:
+            await session.execute(
+                update(IdempotencyKey)
+                .where(self._row(user_id, key), IdempotencyKey.statusCode.is_(None))
+                .values(
+                    statusCode=response.status,
+                    contentType=response.content_type,
+                    body=response.body,
+                    expiresAt=datetime.now(UTC) + timedelta(seconds=self.ttl),
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def release(self, user_id: str, key: str) -> None:
+        """
+        Forget a key whose request failed, so a retry runs it again.
+        """
+        async with self.session_factory() as session:
+            await session.execute(
+                delete(IdempotencyKey)
+                .where(self._row(user_id, key), IdempotencyKey.statusCode.is_(None))
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
+
+    async def _purge_expired(self, session, now: datetime) -> None:
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + self.purge_interval
+        expired = (
+            select(IdempotencyKey.userId, IdempotencyKey.key)
+            .where(IdempotencyKey.expiresAt <= now)
+            .limit(PURGE_BATCH)
+        )
+        await session.execute(
+            delete(IdempotencyKey)
+            .where(tuple_(IdempotencyKey.userId, IdempotencyKey.key).in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+
+idempotency_store = IdempotencyStore(
+    async_session_factory,
+    ttl=settings.IDEMPOTENCY_TTL_SECONDS,
+    lock_seconds=settings.IDEMPOTENCY_LOCK_SECONDS,
+    purge_interval=settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+)
+
+async def _read_body(receive) -> Optional[bytes]:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+class IdempotencyMiddleware:
+    """
+    Applies the Idempotency-Key header to the (method, path) pairs in
+    `routes`. Requests without the header, or without valid credentials
+    (the endpoint rejects those itself), pass straight through. Keys are
+    scoped to the authenticated user, so one user's key never replays
+    another's response.
+
+    Responses below 500 are stored; a 5xx or an exception releases the key.
+    The key is completed before the last body chunk goes out, so a client
+    that retries right after a response never sees it still in progress.
+    """
+
+    def __init__(
+        self,
+        app,
+        routes: Collection[Tuple[str, str]],
+        authenticate: Callable[[Optional[str]], Awaitable[Optional[TokenData]]],
+        store: IdempotencyStore = idempotency_store,
+    ):
+        self.app = app
+        self.routes = frozenset(routes)
+        self.authenticate = authenticate
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in self.routes:
+            return await self.app(scope, receive, send)
+        key = authorization = None
+        for name, value in scope["headers"]:
+            if name == HEADER:
+                key = value.decode("latin-1").strip()
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+        if key is None:
+            return await self.app(scope, receive, send)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"},
+            )
+            return await response(scope, receive, send)
+        principal = await self.authenticate(authorization)
+        if principal is None:
+            return await self.app(scope, receive, send)
+
+        body = await _read_body(receive)
+        if body is None:
+            return
+        fingerprint = request_fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+        try:
+            stored = await self.store.begin(principal.id, key, fingerprint)
+        except KeyInProgress:
+            telemetry.idempotent_requests.inc(("in_progress",))
+            response = JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is still being processed"},
+                headers={"Retry-After": "1"},
+            )
+            return await response(scope, receive, send)
+        except KeyMismatch:
+            telemetry.idempotent_requests.inc(("mismatch",))
+            response = JSONResponse(
+                status_code=422,
+                content={"detail": "This Idempotency-Key was already used for a different request"},
+            )
+            return await response(scope, receive, send)
+
+        if stored is not None:
+            telemetry.idempotent_requests.inc(("replayed",))
+            headers = {REPLAYED_HEADER: "true"}
+            if stored.content_type:
+                headers["content-type"] = stored.content_type
+            return await Response(stored.body, status_code=stored.status, headers=headers)(scope, receive, send)
+
+        telemetry.idempotent_requests.inc(("executed",))
+        body_sent = False
+
+        async def receive_again():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status = 500
+        content_type = None
+        chunks = []
+        completed = False
+
+        async def send_wrapper(message):
+            nonlocal status, content_type, completed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        content_type = value.decode("latin-1")
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False) and status < 500:
+                    try:
+                        await self.store.complete(
+                            principal.id, key, StoredResponse(status, content_type, b"".join(chunks))
+                        )
+                        completed = True
+                    except Exception:
+                        logger.warning("Could not store the response for an Idempotency-Key", exc_info=True)
+            await send(message)
+
+        try:
+            await self.app(scope, receive_again, send_wrapper)
+        finally:
+            if not completed:
+                await self.store.release(principal.id, key)
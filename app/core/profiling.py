@@ -0,0 +1,302 @@
+import asyncio
+import cProfile
+import json
+import logging
+import marshal
+import random
+import re
+import secrets
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLING = "sampling"
+CPROFILE = "cprofile"
+MODES = (SAMPLING, CPROFILE)
+
+PROFILE_HEADER = b"x-profile"
+EXTENSIONS = {SAMPLING: ".speedscope.json", CPROFILE: ".pstats"}
+
+# More concurrent profiles than this are skipped rather than queued
+MAX_CONCURRENT_PROFILES = 4
+
+_PROFILE_ID = re.compile(r"^\d{13}-[0-9a-f]{8}$")
+
+FrameKey = Tuple[str, str, int]  # (name, file, first line)
+
+def _frame_key(frame) -> FrameKey:
+    code = frame.f_code
+    return (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+
+def _coroutine_frames(coro) -> Tuple[List[Any], Any]:
+    """
+    Frames of a coroutine chain, outermost first, plus whatever the innermost
+    coroutine is waiting on (None while it is running).
+    """
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) \
+            or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) \
+            or getattr(coro, "ag_await", None)
+    return frames, coro
+
+class TaskSampler:
+    """
+    Samples where one asyncio task is, every `interval` seconds, from a
+    background thread.
+
+    The stack comes from the task's coroutine chain, so time spent awaiting
+    (database round-trips, other requests holding the loop) is attributed to
+    the await that is waiting, not lost. While the task runs, the synchronous
+    frames below its innermost coroutine are taken from the loop thread.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.task = task
+        self.interval = interval
+        self.thread_id = threading.get_ident()
+        self.samples: List[Tuple[FrameKey, ...]] = []
+        self.weights: List[float] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-sampler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            try:
+                stack = self._stack()
+            except Exception:  # the task mutates under us; skip this tick
+                continue
+            if stack:
+                self.samples.append(stack)
+                self.weights.append((now - last) * 1000)
+            last = now
+
+    def _stack(self) -> Tuple[FrameKey, ...]:
+        frames, awaiting = _coroutine_frames(self.task.get_coro())
+        keys = [_frame_key(frame) for frame in frames]
+        if awaiting is not None:
+            keys.append((f"<await {type(awaiting).__name__}>", "", 0))
+        elif frames:
+            # Running: add the synchronous calls below the innermost coroutine
+            innermost = frames[-1]
+            below = []
+            frame = sys._current_frames().get(self.thread_id)
+            while frame is not None and frame is not innermost:
+                below.append(frame)
+                frame = frame.f_back
+            if frame is innermost:
+                keys.extend(_frame_key(f) for f in reversed(below))
+        return tuple(keys)
+
+    def speedscope(self, name: str) -> Dict[str, Any]:
+        frame_index: Dict[FrameKey, int] = {}
+        samples = []
+        for stack in self.samples:
+            samples.append([frame_index.setdefault(key, len(frame_index)) for key in stack])
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "crm-backend",
+            "shared": {
+                "frames": [
+                    {"name": fn, "file": file, "line": line} if file else {"name": fn}
+                    for fn, file, line in frame_index
+                ],
+            },
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": round(self.elapsed * 1000, 3),
+                "samples": samples,
+                "weights": [round(w, 3) for w in self.weights],
+            }],
+        }
+
+class ProfileStore:
+    """
+    Keeps the newest `max_profiles` profiles in `directory`, each as a profile
+    file plus a small JSON sidecar with the request details.
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{int(time.time() * 1000)}-{secrets.token_hex(4)}"
+
+    def save(self, profile_id: str, meta: Dict[str, Any], data: bytes) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        extension = EXTENSIONS[meta["mode"]]
+        (self.directory / f"{profile_id}{extension}").write_bytes(data)
+        meta = {**meta, "id": profile_id, "file": f"{profile_id}{extension}", "bytes": len(data)}
+        (self.directory / f"{profile_id}.meta.json").write_text(json.dumps(meta))
+        self._prune()
+
+    def _prune(self) -> None:
+        metas = sorted(self.directory.glob("*.meta.json"))
+        for meta_path in metas[: max(len(metas) - self.max_profiles, 0)]:
+            profile_id = meta_path.name.split(".", 1)[0]
+            for path in self.directory.glob(f"{profile_id}.*"):
+                path.unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for meta_path in sorted(self.directory.glob("*.meta.json"), reverse=True):
+            try:
+                profiles.append(json.loads(meta_path.read_text()))
+            except (OSError, ValueError):
+                continue  # pruned or half-written
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[Path]:
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        for extension in EXTENSIONS.values():
+            path = self.directory / f"{profile_id}{extension}"
+            if path.exists():
+                return path
+        return None
+
+profile_store = ProfileStore(settings.PROFILING_DIR, settings.PROFILING_MAX_PROFILES)
+
+class ProfilingMiddleware:
+    """
+    Profiles selected requests:
+    - requests from an admin carrying `X-Profile: 1` (default mode),
+      `X-Profile: sampling` or `X-Profile: cprofile`
+    - a random PROFILING_SAMPLE_PERCENT of all requests
+
+    The profile id is returned in `X-Profile-Id`; the file is written after
+    the response and can be downloaded from /admin/profiles/{id}.
+
+    Only installed when PROFILING_ENABLED is set, so it costs nothing otherwise.
+    cProfile hooks the whole event loop thread, so a cProfile profile also
+    contains whatever other requests ran at the same time; only one runs at
+    a time.
+    """
+
+    def __init__(
+        self,
+        app,
+        authorize: Callable[[Optional[str]], Awaitable[bool]],
+        store: ProfileStore = profile_store,
+        sample_percent: float = settings.PROFILING_SAMPLE_PERCENT,
+        default_mode: str = settings.PROFILING_MODE,
+        interval: float = settings.PROFILING_INTERVAL_SECONDS,
+    ):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self.sample_percent = sample_percent
+        self.default_mode = default_mode
+        self.interval = interval
+        self._active = 0
+        self._cprofile_active = False
+
+    async def _requested_mode(self, scope) -> Optional[str]:
+        requested = authorization = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                requested = value.decode("latin-1").strip().lower()
+            elif name == b"authorization":
+                authorization = value.decode("latin-1")
+        if requested:
+            if not await self.authorize(authorization):
+                return None
+            return requested if requested in MODES else self.default_mode
+        if self.sample_percent and random.random() * 100 < self.sample_percent:
+            return self.default_mode
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        mode = await self._requested_mode(scope)
+        if mode is None or self._active >= MAX_CONCURRENT_PROFILES or (
+            mode == CPROFILE and self._cprofile_active
+        ):
+            return await self.app(scope, receive, send)
+
+        profile_id = self.store.new_id()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [
+                    *message.get("headers", []),
+                    (b"x-profile-id", profile_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        self._active += 1
+        started = time.time()
+        profiler: Optional[cProfile.Profile] = None
+        sampler: Optional[TaskSampler] = None
+        if mode == CPROFILE:
+            self._cprofile_active = True
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = TaskSampler(asyncio.current_task(), self.interval)
+            sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._cprofile_active = False
+                duration = time.time() - started
+                data = _pstats_bytes(profiler)
+            else:
+                sampler.stop()
+                duration = sampler.elapsed
+                data = json.dumps(sampler.speedscope(f"{scope['method']} {scope['path']}")).encode()
+            self._active -= 1
+            meta = {
+                "mode": mode,
+                "method": scope["method"],
+                "path": scope["path"],
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "status": status,
+                "startedAt": started,
+                "durationMs": round(duration * 1000, 3),
+            }
+            try:
+                await asyncio.to_thread(self.store.save, profile_id, meta, data)
+            except OSError:
+                logger.warning("Could not store profile %s", profile_id, exc_info=True)
+
+def _pstats_bytes(profiler: cProfile.Profile) -> bytes:
+    """
+    The profile in the format `pstats.Stats` and snakeviz load.
+    """
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
@@ -0,0 +1,158 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.telemetry import fingerprint, statement_texts
+
+logger = logging.getLogger(__name__)
+
+class QueryStats:
+    """
+    Statements executed (and time spent in the database) within one scope,
+    usually a request.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def record(self, digest: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[digest] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        (fingerprint, count) for statements run more than `threshold` times,
+        the usual sign of an N+1 query.
+        """
+        return [(digest, n) for digest, n in self.fingerprints.most_common() if n > threshold]
+
+    def summary(self) -> str:
+        return "\n".join(
+            f"{n:>4}x {statement_texts.get(digest, digest)}"
+            for digest, n in self.fingerprints.most_common()
+        )
+
+# Every tracker active in the current context. Nested scopes (a test wrapping
+# a request) each see the statements run inside them.
+_active: ContextVar[Tuple[QueryStats, ...]] = ContextVar("active_query_stats", default=())
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
+
+def redact_parameters(parameters: Any) -> Any:
+    """
+    Replace bound values with their type so logs never contain lead or user data.
+    """
+    if isinstance(parameters, dict):
+        return {key: redact_parameters(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if len(parameters) > 10:
+            return f"<{len(parameters)} items>"
+        return [redact_parameters(value) for value in parameters]
+    if parameters is None:
+        return None
+    return f"<{type(parameters).__name__}>"
+
+# Registered on the Engine class so every engine is covered, including the
+# per-test engines in tests/conftest.py.
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._query_tracking_start = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_query_tracking_start", None)
+    if start is None:
+        return
+    duration = time.perf_counter() - start
+    active = _active.get()
+    if active:
+        digest = fingerprint(statement)[1]
+        for stats in active:
+            stats.record(digest, duration)
+    if duration >= settings.SLOW_QUERY_SECONDS:
+        logger.warning(
+            "Slow query (%.1f ms): %s parameters=%s",
+            duration * 1000,
+            " ".join(statement.split()),
+            redact_parameters(parameters),
+        )
+
+def server_timing(stats: QueryStats, total: float) -> str:
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f"total;dur={total * 1000:.1f}"
+    )
+
+class QueryTrackingMiddleware:
+    """
+    Counts the SQL statements each request runs and the time they take.
+
+    - Adds a `Server-Timing` header (`db` with count and duration, `total`)
+      so browser dev tools show the split.
+    - Warns when a statement fingerprint repeats more than
+      QUERY_REPEAT_WARN_THRESHOLD times (N+1), or when the request runs more
+      than QUERY_BUDGET_WARN statements overall.
+    """
+
+    def __init__(
+        self,
+        app,
+        repeat_threshold: Optional[int] = None,
+        budget: Optional[int] = None,
+    ):
+        self.app = app
+        self.repeat_threshold = (
+            settings.QUERY_REPEAT_WARN_THRESHOLD if repeat_threshold is None else repeat_threshold
+        )
+        self.budget = settings.QUERY_BUDGET_WARN if budget is None else budget
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        with track_queries() as stats:
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    timing = server_timing(stats, time.perf_counter() - start)
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", timing.encode("latin-1")),
+                    ]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                self._report(scope, stats)
+
+    def _report(self, scope, stats: QueryStats) -> None:
+        request = f"{scope['method']} {scope['path']}"
+        for digest, n in stats.repeated(self.repeat_threshold):
+            logger.warning(
+                "Possible N+1: %s ran the same statement %d times: %s",
+                request, n, statement_texts.get(digest, digest),
+            )
+        if stats.count > self.budget:
+            logger.warning(
+                "%s ran %d queries (budget %d):\n%s",
+                request, stats.count, self.budget, stats.summary(),
+            )
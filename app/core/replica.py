@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import math
+import time
+from typing import AsyncGenerator, Dict, Iterable, Optional
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from app.core.config import settings
+from app.core.database import (
+    async_session_factory,
+    replica_engine,
+    replica_session_factory,
+)
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Wall-clock time until which the client reads from the primary. Workers are
+# separate processes, so the client carries it to whichever one serves it next.
+STICKY_COOKIE = "primary_until"
+
+# 0 on a primary, or on a replica that has replayed everything it received;
+# otherwise the age of the last replayed transaction
+_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+class ReplicaRouter:
+    """
+    Decides whether a read may go to the replica.
+
+    Reads go to the primary when:
+    - the caller wrote within `read_your_writes` seconds (keyed by bearer token
+      in this process, and by the STICKY_COOKIE set on the write's response in
+      every process, so a user sees their own writes),
+    - the last health check found the replica lagging beyond `max_lag`, or
+    - the replica failed recently (connection error or failed check).
+
+    Health checks are cached for `check_interval` seconds, so the routing
+    decision usually costs no round-trip.
+    """
+
+    def __init__(
+        self,
+        replica: Optional[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        retry_after: float,
+        read_your_writes: float,
+    ):
+        self.replica = replica
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.retry_after = retry_after
+        self.read_your_writes = read_your_writes
+        self.lag: Optional[float] = None
+        self._healthy = False
+        self._checked_at: Optional[float] = None
+        self._down_until = 0.0
+        self._recent_writers: Dict[str, float] = {}
+        self._check_lock = asyncio.Lock()
+        if replica is not None:
+            event.listen(replica.sync_engine, "handle_error", self._on_replica_error)
+
+    @property
+    def enabled(self) -> bool:
+        return self.replica is not None
+
+    def record_write(self, key: str) -> None:
+        now = time.monotonic()
+        if len(self._recent_writers) > 10000:
+            self._recent_writers = {k: t for k, t in self._recent_writers.items() if t > now}
+        self._recent_writers[key] = now + self.read_your_writes
+
+    def sticky_cookie(self) -> str:
+        """
+        Set-Cookie value sent with a successful write: the client's reads stay
+        on the primary for `read_your_writes` seconds, whichever worker serves them.
+        """
+        until = time.time() + self.read_your_writes
+        return (
+            f"{STICKY_COOKIE}={until:.3f}; Max-Age={math.ceil(self.read_your_writes)}; "
+            "Path=/; HttpOnly; SameSite=Lax"
+        )
+
+    def is_sticky(self, key: Optional[str], primary_until: Optional[str] = None) -> bool:
+        if primary_until:
+            try:
+                until = float(primary_until)
+            except ValueError:
+                until = 0.0
+            now = time.time()
+            # A deadline further out than a write grants was not set by us
+            if now < until <= now + self.read_your_writes:
+                return True
+        if not key:
+            return False
+        until = self._recent_writers.get(key)
+        return until is not None and until > time.monotonic()
+
+    def mark_down(self) -> None:
+        self._healthy = False
+        self._down_until = time.monotonic() + self.retry_after
+
+    def _on_replica_error(self, context) -> None:
+        if context.is_disconnect:
+            logger.warning("Replica connection lost; routing reads to the primary")
+            self.mark_down()
+
+    async def _check(self) -> None:
+        try:
+            async with self.replica.connect() as conn:
+                self.lag = float((await conn.execute(_LAG_QUERY)).scalar_one())
+            self._healthy = self.lag <= self.max_lag
+            if not self._healthy:
+                logger.warning("Replica lag %.1fs exceeds %.1fs; using the primary", self.lag, self.max_lag)
+        except Exception:
+            logger.warning("Replica health check failed; using the primary", exc_info=True)
+            self.mark_down()
+        self._checked_at = time.monotonic()
+
+    async def replica_usable(self) -> bool:
+        if self.replica is None:
+            return False
+        now = time.monotonic()
+        if now < self._down_until:
+            return False
+        if self._checked_at is None or now - self._checked_at > self.check_interval:
+            async with self._check_lock:
+                if self._checked_at is None or time.monotonic() - self._checked_at > self.check_interval:
+                    await self._check()
+        return self._healthy
+
+    async def session_factory(self, key: Optional[str] = None, primary_until: Optional[str] = None) -> async_sessionmaker:
+        if not self.is_sticky(key, primary_until) and await self.replica_usable():
+            return replica_session_factory
+        return async_session_factory
+
+replica_router = ReplicaRouter(
+    replica_engine,
+    max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    check_interval=settings.DB_REPLICA_CHECK_INTERVAL_SECONDS,
+    retry_after=settings.DB_REPLICA_RETRY_SECONDS,
+    read_your_writes=settings.DB_READ_YOUR_WRITES_SECONDS,
+)
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session dependency for read-only endpoints: the replica when it is usable
+    and the caller has not just written, otherwise the primary.
+    """
+    factory = await replica_router.session_factory(
+        request.headers.get("authorization"), request.cookies.get(STICKY_COOKIE)
+    )
+    async with factory() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+class ReadYourWritesMiddleware:
+    """
+    Remembers callers whose unsafe request (POST/PUT/PATCH/DELETE) succeeded,
+    so their reads stay on the primary for a while: in this worker by token,
+    and in the others through the STICKY_COOKIE added to the response. Pure
+    ASGI to keep the per-request cost to a header lookup.
+
+    `exclude_paths` are POSTs that need not write (POST /batch records the
+    writes among its sub-requests itself).
+    """
+
+    def __init__(self, app, router: ReplicaRouter = replica_router, exclude_paths: Iterable[str] = ()):
+        self.app = app
+        self.router = router
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or scope["path"] in self.exclude_paths
+        ):
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                for name, value in scope["headers"]:
+                    if name == b"authorization":
+                        self.router.record_write(value.decode("latin-1"))
+                        cookie = (b"set-cookie", self.router.sticky_cookie().encode("latin-1"))
+                        message = {**message, "headers": [*message.get("headers", []), cookie]}
+                        break
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,186 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple
+from app.core.cache import HIT, MISS, CacheResult
+from app.core.config import settings
+
+# Generation counters. Every cache key embeds the current generation of the
+# scopes whose data it shows; a write bumps the scopes it touches, so stale
+# entries simply stop being looked up and age out of the LRU.
+GLOBAL_SCOPE = "global"  # everything (user renames, bulk changes, lost events)
+ALL_LEADS_SCOPE = "all"  # admin views: any lead write
+UNASSIGNED_SCOPE = "unassigned"  # leads every employee can see
+
+def employee_scope(employee_id: str) -> str:
+    return f"employee:{employee_id}"
+
+# True while code that calls endpoints directly (start-up warm-up, the EXPLAIN
+# check) runs: those calls are for their queries and must reach the database
+_bypassed: ContextVar[bool] = ContextVar("response_cache_bypassed", default=False)
+
+@contextmanager
+def bypass_response_cache() -> Iterator[None]:
+    token = _bypassed.set(True)
+    try:
+        yield
+    finally:
+        _bypassed.reset(token)
+
+def response_cache_enabled() -> bool:
+    return settings.RESPONSE_CACHE_ENABLED and not _bypassed.get()
+
+class Backend(Protocol):
+    async def get(self, key: str) -> Optional[bytes]: ...
+    async def set(self, key: str, value: bytes, ttl: float) -> None: ...
+    async def generations(self, scopes: Sequence[str]) -> List[int]: ...
+    async def bump(self, scopes: Iterable[str]) -> None: ...
+    def stats(self) -> Dict[str, Any]: ...
+
+class LocalBackend:
+    """
+    Per-process LRU bounded by entry count and total body size. Generations
+    are per process too; see `app.crud.lead_cache` for how other workers'
+    writes reach them.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self.bytes += len(value)
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        value, _ = self._entries.pop(key)
+        self.bytes -= len(value)
+
+    async def generations(self, scopes: Sequence[str]) -> List[int]:
+        return [self._generations.get(scope, 0) for scope in scopes]
+
+    async def bump(self, scopes: Iterable[str]) -> None:
+        for scope in scopes:
+            self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "local",
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "maxBytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+class SharedBackend:
+    """
+    Entries and generations in a Redis-compatible store shared by all workers
+    (any client with async get/set(ex=)/mget/incr, e.g. redis.asyncio.Redis),
+    so a write on one worker invalidates every worker's view at once. The
+    store's own maxmemory policy bounds its size.
+    """
+
+    def __init__(self, client: Any, prefix: str = "crm:cache:"):
+        self.client = client
+        self.prefix = prefix
+        self.bytes_written = 0
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(f"{self.prefix}entry:{key}")
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(f"{self.prefix}entry:{key}", value, ex=max(int(ttl), 1))
+        self.bytes_written += len(value)
+
+    async def generations(self, scopes: Sequence[str]) -> List[int]:
+        values = await self.client.mget([f"{self.prefix}gen:{scope}" for scope in scopes])
+        return [int(value) if value is not None else 0 for value in values]
+
+    async def bump(self, scopes: Iterable[str]) -> None:
+        for scope in scopes:
+            await self.client.incr(f"{self.prefix}gen:{scope}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "shared", "bytesWritten": self.bytes_written}
+
+class ResponseCache:
+    """
+    Serialized responses keyed by (scopes and their generations, request
+    parameters). Generations are read before the response is computed, so a
+    write that commits meanwhile leaves the new entry under an old key.
+    """
+
+    def __init__(self, name: str, backend: Backend, ttl: float):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(
+        self,
+        scopes: Sequence[str],
+        params: Dict[str, Any],
+        loader: Callable[[], Awaitable[bytes]],
+        ttl: Optional[float] = None,
+    ) -> CacheResult[bytes]:
+        scopes = (GLOBAL_SCOPE, *scopes)
+        generations = await self.backend.generations(scopes)
+        raw = json.dumps([self.name, scopes, generations, params], sort_keys=True, default=str)
+        key = hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+        body = await self.backend.get(key)
+        if body is not None:
+            self.hits += 1
+            return CacheResult(body, HIT, 0.0)
+        self.misses += 1
+        body = await loader()
+        await self.backend.set(key, body, self.ttl if ttl is None else ttl)
+        return CacheResult(body, MISS, 0.0)
+
+    async def invalidate(self, scopes: Iterable[str]) -> None:
+        await self.backend.bump(scopes)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRatio": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.backend.stats(),
+        }
+
+def _backend() -> Backend:
+    if not settings.RESPONSE_CACHE_URL:
+        return LocalBackend(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_MAX_BYTES)
+    try:
+        import redis.asyncio as redis
+    except ImportError as exc:
+        raise RuntimeError("RESPONSE_CACHE_URL is set but the redis package is not installed") from exc
+    return SharedBackend(redis.from_url(settings.RESPONSE_CACHE_URL))
+
+lead_list_cache = ResponseCache("leads", _backend(), ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
@@ -1,22 +1,83 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, UTC
-from typing import Optional, Union, Any
+from typing import Optional, Union, Any, Callable, Dict, Tuple, TypeVar
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__time_cost=settings.ARGON2_TIME_COST,
+    argon2__memory_cost=settings.ARGON2_MEMORY_COST,
+    argon2__parallelism=settings.ARGON2_PARALLELISM,
+)
 
 ALGORITHM = settings.ALGORITHM
 
+T = TypeVar("T")
+
+class PasswordHasherBusy(Exception):
+    """
+    Raised when the password hashing pool already has too many jobs queued.
+    """
+
+class PasswordHasherPool:
+    """
+    Runs argon2 work on a dedicated thread pool so it never blocks the event loop.
+
+    argon2-cffi releases the GIL while hashing, so threads give real parallelism.
+    The pending counter is only touched from the event loop thread, so it needs
+    no lock; once it reaches `max_pending` new jobs are rejected immediately.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="argon2"
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self.pending >= self.max_pending:
+            raise PasswordHasherBusy()
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+password_hasher = PasswordHasherPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
+
 def create_access_token(
-    subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    extra_claims: Optional[Dict[str, Any]] = None,
 ) -> str:
     if expires_delta:
         expire = datetime.now(UTC) + expires_delta
     else:
         expire = datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    
+
     to_encode = {"exp": expire, "sub": str(subject)}
+    if extra_claims:
+        to_encode.update(extra_claims)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -25,3 +86,20 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and return a replacement hash if the stored one was
+    made with outdated argon2 parameters.
+    """
+    return await password_hasher.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
@@ -0,0 +1,431 @@
+import hashlib
+import os
+import re
+import time
+import weakref
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.config import settings
+from app.core.database import (
+    engine,
+    get_pool_status,
+    pool_stats,
+    replica_engine,
+    replica_pool_stats,
+)
+from app.core.response_cache import lead_list_cache
+
+# Metrics are kept in plain dicts and rendered in the Prometheus text format
+# on scrape. Everything is updated from the event loop thread, so no locks
+# are needed, and recording a sample is a dict lookup plus a bisect.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return self.header() + list(self.samples())
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) - amount
+
+    def set(self, value: float, labels: Labels = ()) -> None:
+        self._values[labels] = value
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (last one is +Inf)..., sum]
+        self._values: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        state = self._values.get(labels)
+        return sum(state[:-1]) if state else 0
+
+    def samples(self) -> Iterable[str]:
+        bounds = [*self.buckets, float("inf")]
+        for labels, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, state):
+                cumulative += count
+                le = _format_labels((*self.labelnames, "le"), (*labels, _format_value(bound)))
+                yield f"{self.name}_bucket{le} {cumulative}"
+            suffix = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{suffix} {_format_value(state[-1])}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+def _with_labels(sample: str, labels: str) -> str:
+    name, brace, rest = sample.partition("{")
+    if brace:
+        return f"{name}{{{labels},{rest}"
+    name, _, value = sample.rpartition(" ")
+    return f"{name}{{{labels}}} {value}"
+
+class Registry:
+    """
+    `const_labels` are added to every sample, e.g. the worker id, so series
+    from different worker processes behind one port stay apart.
+    """
+
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None):
+        self._metrics: List[Metric] = []
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+        self._const_labels = _format_labels(*zip(*const_labels.items()))[1:-1] if const_labels else ""
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]) -> None:
+        """
+        Register a callable producing metrics computed at scrape time.
+        """
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for metric in collector():
+                lines.extend(metric.render())
+        if self._const_labels:
+            lines = [
+                line if line.startswith("#") else _with_labels(line, self._const_labels) for line in lines
+            ]
+        return "\n".join(lines) + "\n"
+
+# WORKER_ID is set per process by app.server
+registry = Registry({"worker": settings.WORKER_ID} if settings.WORKER_ID else None)
+
+# Process
+process_start_time = registry.gauge(
+    "crm_process_start_time_seconds", "Start time of this worker process (changes when it is recycled)",
+)
+process_start_time.set(time.time())
+worker_info = registry.gauge("crm_worker_info", "The worker process that served this scrape", ("pid",))
+worker_info.set(1, (str(os.getpid()),))
+
+# HTTP
+http_requests = registry.counter(
+    "crm_http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status"),
+)
+http_duration = registry.histogram(
+    "crm_http_request_duration_seconds", "HTTP request latency by route template",
+    ("method", "route"),
+)
+http_response_size = registry.histogram(
+    "crm_http_response_size_bytes", "HTTP response body size by route template",
+    ("method", "route"), buckets=SIZE_BUCKETS,
+)
+http_in_flight = registry.gauge(
+    "crm_http_requests_in_flight", "HTTP requests currently being served",
+)
+http_requests_cancelled = registry.counter(
+    "crm_http_requests_cancelled_total", "Requests cancelled because the client disconnected first",
+    ("method", "route"),
+)
+
+# Database
+db_query_duration = registry.histogram(
+    "crm_db_query_duration_seconds", "SQL statement latency by statement fingerprint",
+    ("database", "operation", "fingerprint"), buckets=QUERY_BUCKETS,
+)
+db_query_errors = registry.counter(
+    "crm_db_query_errors_total", "SQL statements that raised, by statement fingerprint",
+    ("database", "operation", "fingerprint"),
+)
+db_statement_timeouts = registry.counter(
+    "crm_db_statement_timeouts_total", "Requests failed by a statement running past the route's statement timeout",
+    ("route",),
+)
+
+# Business
+logins = registry.counter("crm_logins_total", "Login attempts by outcome", ("outcome",))
+lead_claims = registry.counter("crm_lead_claims_total", "Lead claim attempts by outcome", ("outcome",))
+csv_imports = registry.counter("crm_csv_imports_total", "CSV import runs by outcome", ("outcome",))
+leads_imported = registry.counter("crm_leads_imported_total", "Leads created by CSV imports")
+import_rows_rejected = registry.counter(
+    "crm_import_rows_rejected_total", "CSV rows skipped by imports (duplicates and invalid rows)",
+)
+idempotent_requests = registry.counter(
+    "crm_idempotent_requests_total",
+    "Requests carrying an Idempotency-Key, by outcome (executed, replayed, in_progress, mismatch)",
+    ("outcome",),
+)
+leads_archived = registry.counter("crm_leads_archived_total", "Closed leads moved to LeadArchive")
+
+# Statement fingerprints
+
+UNMATCHED_ROUTE = "<unmatched>"
+OTHER_FINGERPRINT = "other"
+MAX_FINGERPRINTS = 1000
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\$\d+|%\(\w+\)s|\b\d+(?:\.\d+)?\b")
+_CASTS = re.compile(r"\?::\w+(?:\[\])*")
+_VALUE_LISTS = re.compile(r"\((?:\s*\?\s*,)*\s*\?\s*\)(?:\s*,\s*\((?:\s*\?\s*,)*\s*\?\s*\))+")
+_IN_LISTS = re.compile(r"\bIN\s*\((?:\s*\?\s*,)+\s*\?\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+def normalize_statement(statement: str) -> str:
+    """
+    Reduce a SQL statement to its shape: literals and bind parameters become
+    `?`, and IN lists and multi-row VALUES collapse, so batches of different
+    sizes share one fingerprint.
+    """
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _LITERALS.sub("?", sql)
+    sql = _CASTS.sub("?", sql)
+    sql = _IN_LISTS.sub("IN (...)", sql)
+    return _VALUE_LISTS.sub("(...)", sql)
+
+# statement text -> (operation, fingerprint); also maps fingerprints to SQL
+_fingerprints: Dict[str, Tuple[str, str]] = {}
+statement_texts: Dict[str, str] = {}
+
+_instrumented: "weakref.WeakSet" = weakref.WeakSet()
+
+def fingerprint(statement: str) -> Tuple[str, str]:
+    """
+    (operation, fingerprint) for a statement. Cached by statement text, which
+    SQLAlchemy's compiled cache keeps stable, so normalization runs once per
+    distinct statement.
+    """
+    cached = _fingerprints.get(statement)
+    if cached is not None:
+        return cached
+    normalized = normalize_statement(statement)
+    operation = normalized.split(" ", 1)[0].upper() or "UNKNOWN"
+    digest = hashlib.blake2b(normalized.encode(), digest_size=6).hexdigest()
+    if digest not in statement_texts and len(statement_texts) >= MAX_FINGERPRINTS:
+        # Keep label cardinality bounded if something generates unique SQL
+        digest = OTHER_FINGERPRINT
+    else:
+        statement_texts[digest] = normalized
+    result = (operation, digest)
+    if len(_fingerprints) >= MAX_FINGERPRINTS * 4:
+        _fingerprints.clear()
+    _fingerprints[statement] = result
+    return result
+
+def instrument_engine(db_engine: AsyncEngine, database: str) -> None:
+    """
+    Time every statement executed by `db_engine`, labelled with `database`.
+    """
+    sync_engine = db_engine.sync_engine
+    if sync_engine in _instrumented:
+        return
+    _instrumented.add(sync_engine)
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._telemetry_start = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_telemetry_start", None)
+        if start is None:
+            return
+        operation, digest = fingerprint(statement)
+        db_query_duration.observe(time.perf_counter() - start, (database, operation, digest))
+
+    def handle_error(context) -> None:
+        if context.statement is not None:
+            operation, digest = fingerprint(context.statement)
+            db_query_errors.inc((database, operation, digest))
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(sync_engine, "handle_error", handle_error)
+
+def _database_collector() -> Iterable[Metric]:
+    statements = Gauge(
+        "crm_db_statement_info", "Normalized SQL for each statement fingerprint",
+        ("fingerprint", "statement"),
+    )
+    for digest, sql in statement_texts.items():
+        statements.set(1, (digest, sql[:500]))
+    yield statements
+
+    pools = [("primary", engine, pool_stats)]
+    if replica_engine is not None:
+        pools.append(("replica", replica_engine, replica_pool_stats))
+    checked_out = Gauge("crm_db_pool_checked_out", "Connections currently checked out", ("database",))
+    size = Gauge("crm_db_pool_size", "Configured pool size", ("database",))
+    overflow = Gauge("crm_db_pool_overflow", "Overflow connections currently open", ("database",))
+    checkouts = Counter("crm_db_pool_checkouts_total", "Connection checkouts", ("database",))
+    wait = Counter(
+        "crm_db_pool_wait_seconds_total",
+        "Time spent waiting for a pooled connection (divide by checkouts for the mean)",
+        ("database",),
+    )
+    wait_max = Gauge("crm_db_pool_wait_seconds_max", "Longest checkout wait since start", ("database",))
+    timeouts = Counter("crm_db_pool_timeouts_total", "Checkouts that hit DB_POOL_TIMEOUT", ("database",))
+    for database, db_engine, stats in pools:
+        status = get_pool_status(db_engine)
+        checked_out.set(status["checkedOut"], (database,))
+        size.set(status["size"], (database,))
+        overflow.set(status["overflow"], (database,))
+        checkouts.inc((database,), stats.checkouts)
+        wait.inc((database,), stats.wait_seconds_total)
+        wait_max.set(stats.wait_seconds_max, (database,))
+        timeouts.inc((database,), stats.timeouts)
+    yield from (checked_out, size, overflow, checkouts, wait, wait_max, timeouts)
+
+registry.add_collector(_database_collector)
+
+def _response_cache_collector() -> Iterable[Metric]:
+    stats = lead_list_cache.stats()
+    lookups = Counter("crm_response_cache_lookups_total", "Response cache lookups by result", ("cache", "result"))
+    lookups.inc(("leads", "hit"), stats["hits"])
+    lookups.inc(("leads", "miss"), stats["misses"])
+    yield lookups
+    if "bytes" in stats:
+        size = Gauge("crm_response_cache_bytes", "Bytes held by the in-process response cache", ("cache",))
+        size.set(stats["bytes"], ("leads",))
+        entries = Gauge("crm_response_cache_entries", "Entries in the in-process response cache", ("cache",))
+        entries.set(stats["entries"], ("leads",))
+        evictions = Counter("crm_response_cache_evictions_total", "Entries evicted to stay within bounds", ("cache",))
+        evictions.inc(("leads",), stats["evictions"])
+        yield from (size, entries, evictions)
+
+registry.add_collector(_response_cache_collector)
+
+def route_template(scope) -> str:
+    """
+    The path template of the route that handled the request, e.g.
+    `/api/v1/leads/{lead_id}`.
+
+    Depending on the FastAPI version, a route from an included router knows
+    either its full path or only the part after the router prefix, so the
+    prefix is taken from the request path in front of the part the route
+    matched.
+    """
+    template = getattr(scope.get("route"), "path_format", None)
+    if template is None:
+        return UNMATCHED_ROUTE
+    try:
+        matched = template.format(**scope.get("path_params", {}))
+    except (KeyError, IndexError, ValueError):
+        return template
+    path = scope["path"]
+    if matched != path and path.endswith(matched):
+        return path[: len(path) - len(matched)] + template
+    return template
+
+class TelemetryMiddleware:
+    """
+    Records request count, latency and response size per route template
+    (`/api/v1/leads/{lead_id}`, not the raw path) plus in-flight requests.
+    Pure ASGI so the overhead stays at a few dict updates per request.
+    """
+
+    def __init__(self, app, exclude_paths: Iterable[str] = ()):
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_in_flight.dec()
+            template = route_template(scope)
+            method = scope["method"]
+            http_requests.inc((method, template, str(status)))
+            http_duration.observe(time.perf_counter() - start, (method, template))
+            http_response_size.observe(size, (method, template))
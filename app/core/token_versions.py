@@ -0,0 +1,64 @@
+import asyncio
+import time
+from typing import Dict, Optional
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.models.user import User
+
+# Stored for ids that have no User row, so tokens for deleted users stay rejected
+MISSING = -1
+
+class TokenVersionCache:
+    """
+    In-memory map of user id -> tokenVersion used to revoke access tokens.
+
+    The whole map is reloaded at most every `refresh_seconds`, so token checks
+    normally cost a dict lookup instead of a DB round-trip. Writes made by this
+    worker (see `CRUDUser.update`) are applied immediately via `set`; other
+    workers pick them up on their next refresh.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions: Dict[str, int] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _is_stale(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at > self.refresh_seconds
+        )
+
+    def set(self, user_id: str, version: int) -> None:
+        self._versions[user_id] = version
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    async def refresh(self) -> None:
+        async with self._lock:
+            if not self._is_stale():
+                return
+            async with async_session_factory() as session:
+                result = await session.execute(select(User.id, User.tokenVersion))
+                self._versions = {user_id: version for user_id, version in result.all()}
+            self._loaded_at = time.monotonic()
+
+    async def get(self, user_id: str) -> int:
+        if self._is_stale():
+            await self.refresh()
+        version = self._versions.get(user_id)
+        if version is None:
+            # User created since the last refresh (possibly on another worker)
+            async with async_session_factory() as session:
+                result = await session.execute(
+                    select(User.tokenVersion).where(User.id == user_id)
+                )
+                version = result.scalar_one_or_none()
+            version = MISSING if version is None else version
+            self._versions[user_id] = version
+        return version
+
+token_versions = TokenVersionCache(refresh_seconds=settings.TOKEN_VERSION_REFRESH_SECONDS)
@@ -1,8 +1,11 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import or_, select
+from sqlalchemy.orm import selectinload
 from app.crud.base import CRUDBase
-from app.models.lead import Lead, PipelineStatus
+# Imported for their side effect of registering lead flush listeners
+from app.crud import lead_cache, lead_duplicates, lead_events, lead_feed, lead_stats  # noqa: F401
+from app.models.lead import Lead, LeadTombstone, PipelineStatus
 from app.schemas.lead import LeadCreate, LeadUpdate
 
 class CRUDLead(CRUDBase[Lead, LeadCreate, LeadUpdate]):
@@ -10,6 +13,21 @@ class CRUDLead(CRUDBase[Lead, LeadCreate, LeadUpdate]):
         result = await db.execute(select(Lead).filter(Lead.frn == frn))
         return result.scalars().first()
     
+    async def get_for_update(self, db: AsyncSession, *, id: str) -> Optional[Lead]:
+        """
+        The lead with `id`, locked until the transaction ends. Write paths
+        read leads this way: the counters, rollups and change feed derive
+        from the values read here, so a concurrent writer must not change
+        them in between. Reloads the row even if the session holds it.
+        """
+        result = await db.execute(
+            select(Lead)
+            .where(Lead.id == id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+
     async def get_unassigned(self, db: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[Lead]:
         result = await db.execute(
             select(Lead)
@@ -30,4 +48,70 @@ class CRUDLead(CRUDBase[Lead, LeadCreate, LeadUpdate]):
         )
         return result.scalars().all()
 
+    async def get_changes(
+        self,
+        db: AsyncSession,
+        *,
+        since: int,
+        limit: int,
+        employee_id: Optional[str] = None,
+    ) -> Tuple[List[Lead], List[LeadTombstone], bool]:
+        """
+        Leads written and tombstones recorded after cursor `since`, oldest
+        first, at most `limit` entries in total.
+
+        `employee_id` restricts the feed to what that employee may see (own and
+        unassigned leads); None returns everything (admins). Returns the leads,
+        the tombstones and whether more entries remain after this page.
+        """
+        lead_query = (
+            select(Lead)
+            .options(selectinload(Lead.assigned_employee))
+            .where(Lead.changeSeq > since)
+            .order_by(Lead.changeSeq)
+            .limit(limit + 1)
+        )
+        tombstone_query = (
+            select(LeadTombstone)
+            .where(LeadTombstone.seq > since)
+            .order_by(LeadTombstone.seq)
+            .limit(limit + 1)
+        )
+        if employee_id is None:
+            tombstone_query = tombstone_query.where(
+                LeadTombstone.reason.in_((lead_feed.DELETED_REASON, lead_feed.ARCHIVED_REASON))
+            )
+        else:
+            lead_query = lead_query.where(
+                or_(Lead.assignedEmployeeId == employee_id, Lead.assignedEmployeeId == None)
+            )
+            tombstone_query = tombstone_query.where(
+                or_(
+                    LeadTombstone.previousEmployeeId == employee_id,
+                    LeadTombstone.previousEmployeeId == None,
+                ),
+                # The new assignee receives the lead itself, not a tombstone
+                or_(
+                    LeadTombstone.currentEmployeeId == None,
+                    LeadTombstone.currentEmployeeId != employee_id,
+                ),
+            )
+
+        leads = list((await db.execute(lead_query)).scalars().all())
+        tombstones = list((await db.execute(tombstone_query)).scalars().all())
+
+        # Merge both streams by sequence number and cut at `limit`
+        entries = sorted(
+            [(lead.changeSeq, lead) for lead in leads]
+            + [(tombstone.seq, tombstone) for tombstone in tombstones],
+            key=lambda entry: entry[0],
+        )
+        has_more = len(entries) > limit
+        page = [entry for _, entry in entries[:limit]]
+        return (
+            [entry for entry in page if isinstance(entry, Lead)],
+            [entry for entry in page if isinstance(entry, LeadTombstone)],
+            has_more,
+        )
+
 lead_crud = CRUDLead(Lead)
@@ -0,0 +1,213 @@
+"""
+Hot/cold split for leads: closed leads (Approved/Rejected) untouched for
+LEAD_ARCHIVE_AFTER_DAYS move from Lead to LeadArchive, so the indexes and
+scans of the working table only cover leads still being worked.
+
+Each batch moves up to LEAD_ARCHIVE_BATCH_SIZE leads in one transaction
+(delete from Lead, insert into LeadArchive, "archived" tombstones for the
+change feed) and publishes lead events so response caches and SSE clients
+notice. Batches are spaced by LEAD_ARCHIVE_BATCH_PAUSE_SECONDS, and an
+advisory lock keeps concurrent workers from archiving at the same time.
+On SQLite (tests) a batch is moved in a few portable statements instead.
+
+Lead counters and daily rollups keep counting archived leads: metrics
+describe all leads, hot or archived. Archived leads lose their duplicate
+detection keys.
+"""
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Union
+from sqlalchemy import String, cast, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from app.core import telemetry
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.core.dialects import is_postgresql
+from app.core.response_cache import lead_list_cache
+from app.crud.lead_cache import scopes_touched
+from app.crud.lead_events import MAX_EVENTS_PER_FLUSH, NOTIFY_LEAD_EVENTS, notify_params
+from app.crud.lead_feed import ARCHIVED_REASON, FEED_LOCK_KEY
+from app.models.lead import Lead, LeadArchive, LeadTombstone, PipelineStatus, lead_change_seq
+from app.models.types import UTCDateTime
+
+logger = logging.getLogger(__name__)
+
+CLOSED_STATUSES = (PipelineStatus.Approved, PipelineStatus.Rejected)
+# pg_try_advisory_xact_lock key held by the worker archiving a batch
+ADVISORY_LOCK_KEY = 0x1EAD_A4C1
+_LEAD_COLUMNS = [column.name for column in Lead.__table__.columns]
+
+def archive_statement(cutoff: datetime, batch_size: int):
+    """
+    Move the oldest `batch_size` closed leads last updated before `cutoff`
+    into LeadArchive, in one statement; returns the moved leads' id, status
+    and assignee. Rows locked by a running transaction are skipped, so an
+    in-flight update is never archived from under it.
+    """
+    batch = (
+        select(Lead.id)
+        .where(Lead.pipelineStatus.in_(CLOSED_STATUSES), Lead.updatedAt < cutoff)
+        .order_by(Lead.updatedAt)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+        .cte("batch")
+    )
+    moved = (
+        delete(Lead.__table__)
+        .where(Lead.id.in_(select(batch.c.id)))
+        .returning(*Lead.__table__.columns)
+        .cte("moved")
+    )
+    archived = (
+        insert(LeadArchive.__table__)
+        .from_select(
+            _LEAD_COLUMNS + ["archivedAt"],
+            select(*[moved.c[name] for name in _LEAD_COLUMNS], func.now()),
+        )
+        .returning(LeadArchive.id, LeadArchive.pipelineStatus, LeadArchive.assignedEmployeeId)
+        .cte("archived")
+    )
+    tombstones = insert(LeadTombstone.__table__).from_select(
+        ["seq", "leadId", "reason", "previousEmployeeId", "createdAt"],
+        select(
+            lead_change_seq.next_value(),
+            cast(archived.c.id, String),
+            literal(ARCHIVED_REASON),
+            cast(archived.c.assignedEmployeeId, String),
+            func.now(),
+        ),
+    ).cte("tombstones")
+    return select(archived.c.id, archived.c.pipelineStatus, archived.c.assignedEmployeeId).add_cte(tombstones)
+
+async def _move_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> List[Any]:
+    """
+    The move of `archive_statement`, one statement per step, for databases
+    without data-modifying CTEs. SQLite allows one writer at a time, so the
+    selected leads cannot change underneath.
+    """
+    rows = (await db.execute(
+        select(Lead.id, Lead.pipelineStatus, Lead.assignedEmployeeId)
+        .where(Lead.pipelineStatus.in_(CLOSED_STATUSES), Lead.updatedAt < cutoff)
+        .order_by(Lead.updatedAt)
+        .limit(batch_size)
+    )).all()
+    if not rows:
+        return rows
+    ids = [row.id for row in rows]
+    now = datetime.now(UTC)
+    await db.execute(
+        insert(LeadArchive.__table__).from_select(
+            _LEAD_COLUMNS + ["archivedAt"],
+            select(*[Lead.__table__.c[name] for name in _LEAD_COLUMNS], literal(now, UTCDateTime))
+            .where(Lead.id.in_(ids)),
+        )
+    )
+    await db.execute(insert(LeadTombstone.__table__), [
+        {"leadId": row.id, "reason": ARCHIVED_REASON, "previousEmployeeId": row.assignedEmployeeId, "createdAt": now}
+        for row in rows
+    ])
+    await db.execute(delete(Lead.__table__).where(Lead.id.in_(ids)))
+    return rows
+
+def archive_events(rows: List[Any]) -> List[Dict[str, Any]]:
+    if len(rows) > MAX_EVENTS_PER_FLUSH:
+        return [{"type": "bulk", "count": len(rows)}]
+    return [
+        {
+            "type": "archived",
+            "leadId": row.id,
+            "pipelineStatus": None,
+            "previousStatus": PipelineStatus(row.pipelineStatus).value,
+            "assignedEmployeeId": None,
+            "previousEmployeeId": row.assignedEmployeeId,
+        }
+        for row in rows
+    ]
+
+async def archive_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> Optional[int]:
+    """
+    Archive one batch and commit; returns the number of leads moved, or None
+    if another worker is archiving.
+    """
+    if not is_postgresql(db):
+        rows = await _move_batch(db, cutoff, batch_size)
+    else:
+        locked = (await db.execute(select(func.pg_try_advisory_xact_lock(ADVISORY_LOCK_KEY)))).scalar()
+        if not locked:
+            await db.rollback()
+            return None
+        # The tombstones' numbers are final: draw them in commit order
+        await db.execute(select(func.pg_advisory_xact_lock(FEED_LOCK_KEY)))
+        rows = (await db.execute(archive_statement(cutoff, batch_size))).all()
+        if rows:
+            await db.execute(NOTIFY_LEAD_EVENTS, notify_params(archive_events(rows)))
+    await db.commit()
+    if rows:
+        # Other workers' caches follow the events; this covers a shared backend
+        await lead_list_cache.invalidate(scopes_touched(row.assignedEmployeeId for row in rows))
+        telemetry.leads_archived.inc(amount=len(rows))
+    return len(rows)
+
+async def archive_closed_leads(
+    session_factory: async_sessionmaker = async_session_factory,
+    *,
+    older_than: timedelta,
+    batch_size: int,
+    pause: float,
+) -> int:
+    """
+    One archiving pass: batches until no closed lead is older than
+    `older_than`. Returns the number of leads archived.
+    """
+    cutoff = datetime.now(UTC) - older_than
+    total = 0
+    while True:
+        async with session_factory() as session:
+            moved = await archive_batch(session, cutoff, batch_size)
+        if moved is None:
+            logger.info("Another worker is archiving leads; skipping this pass")
+            break
+        total += moved
+        if moved < batch_size:
+            break
+        await asyncio.sleep(pause)
+    if total:
+        logger.info("Archived %d closed leads", total)
+    return total
+
+async def run_lead_archiver() -> None:
+    """
+    Archiving passes every LEAD_ARCHIVE_INTERVAL_SECONDS, for the lifespan of
+    a worker. A failed pass is logged and retried on the next interval.
+    """
+    while True:
+        try:
+            await archive_closed_leads(
+                older_than=timedelta(days=settings.LEAD_ARCHIVE_AFTER_DAYS),
+                batch_size=settings.LEAD_ARCHIVE_BATCH_SIZE,
+                pause=settings.LEAD_ARCHIVE_BATCH_PAUSE_SECONDS,
+            )
+        except Exception:
+            logger.exception("Lead archiving pass failed")
+        await asyncio.sleep(settings.LEAD_ARCHIVE_INTERVAL_SECONDS)
+
+async def get_lead(db: AsyncSession, id: str, for_update: bool = False) -> Optional[Union[Lead, LeadArchive]]:
+    """
+    The lead with `id`, hot or archived. With `for_update` a hot lead is
+    locked and reloaded, as by `lead_crud.get_for_update`; archived leads
+    are read-only and never locked.
+    """
+    query = select(Lead).where(Lead.id == id)
+    if for_update:
+        query = query.with_for_update().execution_options(populate_existing=True)
+    lead = (await db.execute(query)).scalars().first()
+    if lead is None:
+        lead = (await db.execute(select(LeadArchive).where(LeadArchive.id == id))).scalars().first()
+    return lead
+
+async def archived_frns(db: AsyncSession, frns: Set[str]) -> Set[str]:
+    if not frns:
+        return set()
+    result = await db.execute(select(LeadArchive.frn).where(LeadArchive.frn.in_(sorted(frns))))
+    return set(result.scalars().all())
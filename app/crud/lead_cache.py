@@ -0,0 +1,82 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+from app.core.events import lead_events
+from app.core.response_cache import (
+    ALL_LEADS_SCOPE,
+    GLOBAL_SCOPE,
+    UNASSIGNED_SCOPE,
+    employee_scope,
+    lead_list_cache,
+)
+from app.crud.lead_changes import LeadChange, on_lead_changes
+
+logger = logging.getLogger(__name__)
+
+_PENDING = "lead_cache_scopes"
+
+def scopes_touched(employee_ids: Iterable[Optional[str]]) -> Set[str]:
+    """
+    Cache scopes showing leads assigned to (or taken from) `employee_ids`;
+    None stands for unassigned leads.
+    """
+    scopes = {ALL_LEADS_SCOPE}
+    for employee_id in employee_ids:
+        scopes.add(UNASSIGNED_SCOPE if employee_id is None else employee_scope(employee_id))
+    return scopes
+
+def scopes_for_event(event: Dict[str, Any]) -> Set[str]:
+    if "leadId" not in event:
+        # "bulk" and "resync" say nothing about which leads changed
+        return {GLOBAL_SCOPE}
+    return scopes_touched([event.get("assignedEmployeeId"), event.get("previousEmployeeId")])
+
+@on_lead_changes
+def _collect_cache_scopes(session: Session, changes: List[LeadChange]) -> None:
+    pending = session.info.setdefault(_PENDING, set())
+    for change in changes:
+        pending.update(scopes_touched([change.old_employee_id, change.new_employee_id]))
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    # Only once the rows are visible, or a concurrent read could cache the
+    # old rows under the new generation
+    scopes = session.info.pop(_PENDING, None)
+    if scopes:
+        # Runs inside AsyncSession.commit()'s greenlet, so it can await
+        await_only(lead_list_cache.invalidate(scopes))
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
+
+async def follow_lead_events() -> None:
+    """
+    Apply lead writes committed by other workers to this worker's cache
+    generations, from the lead events NOTIFY channel. Only needed for the
+    per-process backend; a shared backend shares its generations.
+
+    Subscribing is retried with backoff while the database is unreachable.
+    Writes committed before the LISTEN started went unseen, so once
+    subscribed every generation is bumped. (After a lost connection the
+    broker reconnects itself and sends a resync, which does the same.)
+    """
+    delay = 0.5
+    while True:
+        try:
+            queue = await lead_events.subscribe()
+            break
+        except (OSError, asyncio.TimeoutError, asyncpg.PostgresError):
+            logger.warning("Subscribing to lead events failed; retrying in %.1fs", delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+    try:
+        await lead_list_cache.invalidate([GLOBAL_SCOPE])
+        while True:
+            await lead_list_cache.invalidate(scopes_for_event(await queue.get()))
+    finally:
+        lead_events.unsubscribe(queue)
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app.models.lead import Lead, PipelineStatus
+
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+
+@dataclass
+class LeadChange:
+    """
+    A lead row written by the current flush, with the before/after values of
+    the columns that derived data (counters, rollups, feeds) is keyed on.
+    `old_*` is None for created leads and `new_*` is None for deleted ones.
+    """
+    op: str
+    lead: Lead
+    old_status: Optional[PipelineStatus]
+    new_status: Optional[PipelineStatus]
+    old_employee_id: Optional[str]
+    new_employee_id: Optional[str]
+
+LeadChangeHandler = Callable[[Session, List[LeadChange]], None]
+
+_handlers: List[LeadChangeHandler] = []
+
+def on_lead_changes(handler: LeadChangeHandler) -> LeadChangeHandler:
+    """
+    Register `handler` to run inside every flush that writes leads.
+
+    Handlers run in the flush's transaction, so anything they write through
+    `session.connection()` commits or rolls back together with the leads.
+    Core bulk statements (`update(Lead)`, `delete(Lead)`) bypass the ORM and
+    are not seen here.
+    """
+    _handlers.append(handler)
+    return handler
+
+def _status(value: Any) -> Optional[PipelineStatus]:
+    return PipelineStatus(value) if value is not None else None
+
+def _old_and_new(lead: Lead, attr: str):
+    history = inspect(lead).attrs[attr].history
+    new = history.added[0] if history.added else (history.unchanged[0] if history.unchanged else None)
+    old = history.deleted[0] if history.deleted else (history.unchanged[0] if history.unchanged else None)
+    return old, new
+
+def collect_lead_changes(session: Session) -> List[LeadChange]:
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Lead):
+            changes.append(LeadChange(
+                CREATED, obj,
+                None, _status(obj.pipelineStatus) or PipelineStatus.Unassigned,
+                None, obj.assignedEmployeeId,
+            ))
+    for obj in session.dirty:
+        if isinstance(obj, Lead) and session.is_modified(obj):
+            old_status, new_status = _old_and_new(obj, "pipelineStatus")
+            old_employee, new_employee = _old_and_new(obj, "assignedEmployeeId")
+            changes.append(LeadChange(
+                UPDATED, obj,
+                _status(old_status), _status(new_status),
+                old_employee, new_employee,
+            ))
+    for obj in session.deleted:
+        if isinstance(obj, Lead):
+            old_status, _ = _old_and_new(obj, "pipelineStatus")
+            old_employee, _ = _old_and_new(obj, "assignedEmployeeId")
+            changes.append(LeadChange(
+                DELETED, obj,
+                _status(old_status), None,
+                old_employee, None,
+            ))
+    return changes
+
+@event.listens_for(Session, "after_flush")
+def _dispatch_lead_changes(session: Session, flush_context) -> None:
+    # new/dirty/deleted and attribute history still describe the flush here,
+    # and primary keys and column defaults have been populated
+    if not _handlers:
+        return
+    changes = collect_lead_changes(session)
+    if not changes:
+        return
+    for handler in _handlers:
+        handler(session, changes)
@@ -0,0 +1,214 @@
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Collection, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import String, any_, bindparam, delete, func, insert, inspect, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.dialects import is_postgresql
+from app.crud.lead_changes import DELETED, UPDATED, LeadChange, on_lead_changes
+from app.models.lead import Lead, LeadDuplicateKey
+from app.models.types import UUIDString
+from app.utils.dedupe import LeadSignature, blocking_keys, compare, signature
+
+# Keys shared by more leads than this (a placeholder company name, a
+# reseller's phone number) say nothing about duplicates and are skipped;
+# this also bounds the work per lead
+MAX_BLOCK_SIZE = 100
+# Leads sharing the most keys with a lead that are scored exactly; sharing
+# more name bands means a more similar name, so the best matches come first
+MAX_CANDIDATES = 20
+# Keys per lookup; larger lists get planned as a sequential scan
+KEY_CHUNK_SIZE = 1000
+
+MATCHED_COLUMNS = ("company_name", "contact_email", "contact_phone", "website")
+_CANDIDATE_COLUMNS = (
+    Lead.id, Lead.frn, Lead.company_name, Lead.contact_email, Lead.contact_phone,
+    Lead.website, Lead.pipelineStatus, Lead.assignedEmployeeId,
+)
+
+@dataclass
+class DuplicateMatch:
+    """
+    A possible duplicate: an existing lead (`lead`, a row of the candidate
+    columns) or, within a batch, an earlier entry of that batch (`index`).
+    """
+    score: float
+    reasons: List[str]
+    lead: Optional[Any] = None
+    index: Optional[int] = None
+
+def lead_signature(lead: Any) -> LeadSignature:
+    return signature(lead.company_name, lead.contact_email, lead.contact_phone, lead.website)
+
+# One statement with two array parameters, several times faster than a
+# multi-row VALUES insert for the tens of keys per lead an import adds
+_INSERT_UNNESTED = insert(LeadDuplicateKey.__table__).from_select(
+    ["key", "leadId"],
+    select(
+        func.unnest(bindparam("keys", type_=ARRAY(String))),
+        func.unnest(bindparam("lead_ids", type_=ARRAY(UUIDString))),
+    ),
+)
+
+def _key_rows(leads: Iterable[Any]) -> List[tuple]:
+    # Sorted, so a batch goes into the primary key index in order
+    return sorted((key, lead.id) for lead in leads for key in blocking_keys(lead_signature(lead)))
+
+def _insert_keys(bind: Any, rows: List[tuple]):
+    """
+    Statement and parameters inserting (key, leadId) `rows`: two array
+    parameters on Postgres, an executemany elsewhere.
+    """
+    if is_postgresql(bind):
+        keys, lead_ids = zip(*rows)
+        return _INSERT_UNNESTED, {"keys": list(keys), "lead_ids": list(lead_ids)}
+    return insert(LeadDuplicateKey.__table__), [{"key": key, "leadId": lead_id} for key, lead_id in rows]
+
+@on_lead_changes
+def _index_duplicate_keys(session: Session, changes: List[LeadChange]) -> None:
+    # Deleted leads lose their keys through the foreign key's ON DELETE CASCADE
+    leads, stale = [], []
+    for change in changes:
+        if change.op == DELETED:
+            continue
+        if change.op == UPDATED:
+            attrs = inspect(change.lead).attrs
+            if not any(attrs[column].history.has_changes() for column in MATCHED_COLUMNS):
+                continue
+            stale.append(change.lead.id)
+        leads.append(change.lead)
+    connection = session.connection()
+    if stale:
+        connection.execute(delete(LeadDuplicateKey).where(LeadDuplicateKey.leadId.in_(stale)))
+    rows = _key_rows(leads)
+    if rows:
+        connection.execute(*_insert_keys(session, rows))
+
+def _in(db: AsyncSession, column: Any, values: List[str], item_type=String):
+    # On Postgres one array parameter instead of an IN list of thousands of
+    # parameters, which costs more to compile than to run
+    if is_postgresql(db):
+        return column == any_(bindparam("values", values, type_=ARRAY(item_type)))
+    return column.in_(values)
+
+async def _blocks(db: AsyncSession, keys: Collection[str]) -> Dict[str, List[str]]:
+    """
+    Ids of the leads holding each of `keys`, leaving out oversized blocks.
+    """
+    blocks: Dict[str, List[str]] = defaultdict(list)
+    keys = sorted(keys)
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        chunk = keys[start:start + KEY_CHUNK_SIZE]
+        oversized = set((await db.execute(
+            select(LeadDuplicateKey.key)
+            .where(_in(db, LeadDuplicateKey.key, chunk))
+            .group_by(LeadDuplicateKey.key)
+            .having(func.count() > MAX_BLOCK_SIZE)
+        )).scalars())
+        wanted = [key for key in chunk if key not in oversized]
+        if not wanted:
+            continue
+        result = await db.execute(
+            select(LeadDuplicateKey.key, LeadDuplicateKey.leadId)
+            .where(_in(db, LeadDuplicateKey.key, wanted))
+        )
+        for key, lead_id in result:
+            blocks[key].append(lead_id)
+    return blocks
+
+async def _candidates(db: AsyncSession, ids: Collection[str], visible: Any) -> Dict[str, Any]:
+    ids = sorted(ids)
+    rows = {}
+    for start in range(0, len(ids), KEY_CHUNK_SIZE):
+        chunk = ids[start:start + KEY_CHUNK_SIZE]
+        query = select(*_CANDIDATE_COLUMNS).where(_in(db, Lead.id, chunk, UUIDString))
+        if visible is not None:
+            query = query.where(visible)
+        rows.update((row.id, row) for row in await db.execute(query))
+    return rows
+
+async def find_duplicates(
+    db: AsyncSession,
+    signatures: Sequence[LeadSignature],
+    *,
+    exclude: Collection[str] = (),
+    within_batch: bool = False,
+    visible: Any = None,
+    limit: int = 10,
+) -> List[List[DuplicateMatch]]:
+    """
+    Possible duplicates of each signature among stored leads (and, with
+    `within_batch`, among the signatures before it), best first.
+
+    Work is linear in the number of signatures: a fixed number of keys per
+    signature, blocks bounded by MAX_BLOCK_SIZE, and at most MAX_CANDIDATES
+    exact comparisons each. `visible` filters which stored leads may be
+    returned; ids in `exclude` never are.
+    """
+    keys_per_signature = [blocking_keys(sig) for sig in signatures]
+    blocks = await _blocks(db, {key for keys in keys_per_signature for key in keys})
+    shortlists = []
+    for keys in keys_per_signature:
+        shared = Counter(
+            lead_id for key in keys for lead_id in blocks.get(key, ()) if lead_id not in exclude
+        )
+        shortlists.append([lead_id for lead_id, _ in shared.most_common(MAX_CANDIDATES)])
+    candidates = await _candidates(db, {lead_id for ids in shortlists for lead_id in ids}, visible)
+    candidate_signatures = {lead_id: lead_signature(row) for lead_id, row in candidates.items()}
+
+    batch_blocks: Dict[str, List[int]] = defaultdict(list)
+    results = []
+    for index, (sig, keys, shortlist) in enumerate(zip(signatures, keys_per_signature, shortlists)):
+        matches = []
+        for lead_id in shortlist:
+            if lead_id not in candidates:
+                continue
+            match = compare(sig, candidate_signatures[lead_id])
+            if match is not None:
+                matches.append(DuplicateMatch(match.score, match.reasons, lead=candidates[lead_id]))
+        if within_batch:
+            earlier = Counter(
+                other for key in keys
+                for other in batch_blocks[key] if len(batch_blocks[key]) <= MAX_BLOCK_SIZE
+            )
+            for other, _ in earlier.most_common(MAX_CANDIDATES):
+                match = compare(sig, signatures[other])
+                if match is not None:
+                    matches.append(DuplicateMatch(match.score, match.reasons, index=other))
+            for key in keys:
+                # One past the limit marks the block as oversized
+                if len(batch_blocks[key]) <= MAX_BLOCK_SIZE:
+                    batch_blocks[key].append(index)
+        matches.sort(key=lambda match: match.score, reverse=True)
+        results.append(matches[:limit])
+    return results
+
+async def rebuild_lead_duplicate_keys(db: AsyncSession, batch_size: int = 10_000) -> int:
+    """
+    Recompute LeadDuplicateKey from the Lead table; returns the number of
+    leads indexed. TRUNCATE locks the table until the rebuild commits, so
+    concurrent lead writes wait at their key inserts and duplicate lookups
+    wait too.
+    """
+    if is_postgresql(db):
+        await db.execute(text('TRUNCATE "LeadDuplicateKey"'))
+    else:
+        await db.execute(delete(LeadDuplicateKey))
+    indexed, last_id = 0, None
+    while True:
+        query = select(*_CANDIDATE_COLUMNS[:6]).order_by(Lead.id).limit(batch_size)
+        if last_id is not None:
+            query = query.where(Lead.id > last_id)
+        leads = (await db.execute(query)).all()
+        if not leads:
+            break
+        rows = _key_rows(leads)
+        if rows:
+            await db.execute(*_insert_keys(db, rows))
+        indexed += len(leads)
+        last_id = leads[-1].id
+    # Fresh statistics, or lookups plan for the empty table they replaced
+    await db.execute(text('ANALYZE "LeadDuplicateKey"'))
+    await db.commit()
+    return indexed
@@ -0,0 +1,57 @@
+import json
+from typing import Any, Dict, List
+from sqlalchemy import Text, bindparam, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.dialects import is_postgresql
+from app.crud.lead_changes import CREATED, DELETED, LeadChange, on_lead_changes
+
+# Flushes writing more leads than this (CSV imports) publish one "bulk" event
+# telling clients to refetch, instead of flooding every subscriber
+MAX_EVENTS_PER_FLUSH = 100
+
+NOTIFY_LEAD_EVENTS = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload"
+).bindparams(bindparam("payloads", type_=ARRAY(Text)))
+
+def notify_params(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Parameters for NOTIFY_LEAD_EVENTS, for writers outside the flush
+    listener (e.g. the archiver) to publish through the same channel.
+    """
+    return {
+        "channel": settings.LEAD_EVENTS_CHANNEL,
+        "payloads": [json.dumps(event) for event in events],
+    }
+
+def event_type(change: LeadChange) -> str:
+    if change.op in (CREATED, DELETED):
+        return change.op
+    if change.old_employee_id != change.new_employee_id:
+        return "claimed" if change.old_employee_id is None else "reassigned"
+    if change.old_status != change.new_status:
+        return "status_changed"
+    return "updated"
+
+def lead_event(change: LeadChange) -> Dict[str, Any]:
+    return {
+        "type": event_type(change),
+        "leadId": change.lead.id,
+        "pipelineStatus": change.new_status.value if change.new_status else None,
+        "previousStatus": change.old_status.value if change.old_status else None,
+        "assignedEmployeeId": change.new_employee_id,
+        "previousEmployeeId": change.old_employee_id,
+    }
+
+@on_lead_changes
+def _publish_lead_events(session: Session, changes: List[LeadChange]) -> None:
+    # Events travel over Postgres NOTIFY; other databases have no listeners
+    if not is_postgresql(session):
+        return
+    # NOTIFY is transactional: listeners only see these once the flush commits
+    if len(changes) > MAX_EVENTS_PER_FLUSH:
+        events = [{"type": "bulk", "count": len(changes)}]
+    else:
+        events = [lead_event(change) for change in changes]
+    session.connection().execute(NOTIFY_LEAD_EVENTS, notify_params(events))
@@ -0,0 +1,111 @@
+"""
+Change feed bookkeeping (GET /leads/changes): tombstones for leads leaving
+a reader's view, and the sequence numbers the feed's cursor follows.
+
+Cursors must follow commit order: a reader that has seen seq N must never
+later find a newly committed entry below N. Numbers drawn while a row is
+written don't guarantee that, because a transaction can draw a lower
+number and commit after one that drew a higher number. So on Postgres the
+numbers drawn during flushes are provisional. Just before commit, each
+transaction takes FEED_LOCK_KEY and draws final numbers for the leads and
+tombstones it wrote. The lock is held until the commit is visible, so
+final numbers are handed out in commit order. Writers that bypass the ORM
+(the archiver) take the lock before they draw.
+
+SQLite allows one writer at a time from its first write to its commit, so
+numbers drawn during flushes already follow commit order.
+"""
+from typing import Any, Dict, List, Set
+from sqlalchemy import BigInteger, any_, bindparam, event, func, insert, select, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.orm.util import identity_key
+from app.core.dialects import is_postgresql
+from app.crud.lead_changes import DELETED, UPDATED, LeadChange, on_lead_changes
+from app.models.lead import Lead, LeadTombstone, lead_change_seq
+from app.models.types import UUIDString
+
+DELETED_REASON = "deleted"
+HIDDEN_REASON = "hidden"
+ARCHIVED_REASON = "archived"  # written by app.crud.lead_archive
+
+# pg_advisory_xact_lock key held while final change feed numbers are drawn
+FEED_LOCK_KEY = 0x1EAD_FEED
+
+_PENDING = "lead_feed_pending"
+
+def tombstones_for(changes: List[LeadChange]) -> List[dict]:
+    """
+    Tombstone rows for leads that were deleted or moved out of someone's view.
+    """
+    rows = []
+    for change in changes:
+        if change.op == DELETED:
+            reason = DELETED_REASON
+        elif (
+            change.op == UPDATED
+            and change.old_employee_id != change.new_employee_id
+            # Unassigned leads stay visible to everyone, the previous owner included
+            and change.new_employee_id is not None
+        ):
+            reason = HIDDEN_REASON
+        else:
+            continue
+        rows.append({
+            "leadId": change.lead.id,
+            "reason": reason,
+            "previousEmployeeId": change.old_employee_id,
+            "currentEmployeeId": change.new_employee_id,
+        })
+    return rows
+
+def _pending(session: Session) -> Dict[str, Set[Any]]:
+    return session.info.setdefault(_PENDING, {"leads": set(), "tombstones": set()})
+
+@on_lead_changes
+def _record_lead_tombstones(session: Session, changes: List[LeadChange]) -> None:
+    rows = tombstones_for(changes)
+    postgres = is_postgresql(session)
+    if rows:
+        stmt = insert(LeadTombstone)
+        if postgres:
+            stmt = stmt.returning(LeadTombstone.seq)
+        result = session.connection().execute(stmt, rows)
+        if postgres:
+            _pending(session)["tombstones"].update(result.scalars().all())
+    if postgres:
+        _pending(session)["leads"].update(change.lead.id for change in changes if change.op != DELETED)
+
+@event.listens_for(Session, "before_commit")
+def _draw_final_seqs(session: Session) -> None:
+    pending = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    connection = session.connection()
+    connection.execute(select(func.pg_advisory_xact_lock(FEED_LOCK_KEY)))
+    # Array parameters rather than IN lists: a CSV import commits thousands of leads
+    if pending["leads"]:
+        lead = Lead.__table__
+        result = connection.execute(
+            update(lead)
+            .where(lead.c.id == any_(bindparam("ids", sorted(pending["leads"]), type_=ARRAY(UUIDString))))
+            # Not a change to the lead itself: leave updatedAt alone
+            .values(changeSeq=lead_change_seq.next_value(), updatedAt=lead.c.updatedAt)
+            .returning(lead.c.id, lead.c.changeSeq)
+        )
+        for lead_id, seq in result.all():
+            obj = session.identity_map.get(identity_key(Lead, lead_id))
+            if obj is not None:
+                set_committed_value(obj, "changeSeq", seq)
+    if pending["tombstones"]:
+        tombstone = LeadTombstone.__table__
+        connection.execute(
+            update(tombstone)
+            .where(tombstone.c.seq == any_(bindparam("seqs", sorted(pending["tombstones"]), type_=ARRAY(BigInteger))))
+            .values(seq=lead_change_seq.next_value())
+        )
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_on_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
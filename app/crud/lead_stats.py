@@ -0,0 +1,289 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta, UTC
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import String, cast, delete, func, insert, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.dialects import dialect_insert, dialect_name, is_postgresql
+from app.crud.lead_changes import CREATED, UPDATED, LeadChange, on_lead_changes
+from app.models.lead import Lead, LeadArchive, PipelineStatus
+from app.models.lead_stats import LeadCounter, LeadDailyStat, UNASSIGNED_KEY
+from app.models.user import User
+
+def _employee_key(employee_id: Optional[str]) -> str:
+    return employee_id if employee_id is not None else UNASSIGNED_KEY
+
+def counter_deltas(changes: List[LeadChange]) -> Dict[Tuple[PipelineStatus, str], int]:
+    """
+    Net change to each LeadCounter row caused by a batch of lead writes.
+    """
+    deltas: Dict[Tuple[PipelineStatus, str], int] = defaultdict(int)
+    for change in changes:
+        if change.old_status is not None:
+            deltas[(change.old_status, _employee_key(change.old_employee_id))] -= 1
+        if change.new_status is not None:
+            deltas[(change.new_status, _employee_key(change.new_employee_id))] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+@on_lead_changes
+def _update_lead_counters(session: Session, changes: List[LeadChange]) -> None:
+    deltas = counter_deltas(changes)
+    if not deltas:
+        return
+    # Sorted so concurrent transactions lock counter rows in the same order
+    rows = [
+        {"pipelineStatus": status, "assignedEmployeeId": employee_id, "count": delta}
+        for (status, employee_id), delta in sorted(deltas.items())
+    ]
+    stmt = dialect_insert(session)(LeadCounter).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[LeadCounter.pipelineStatus, LeadCounter.assignedEmployeeId],
+        set_={"count": LeadCounter.count + stmt.excluded.count},
+    )
+    session.connection().execute(stmt)
+
+DailyKey = Tuple[date, PipelineStatus, str]
+
+def daily_stat_deltas(changes: List[LeadChange], day: date) -> Dict[DailyKey, Dict[str, int]]:
+    """
+    Increments to LeadDailyStat rows for `day` caused by a batch of lead
+    writes. Deletes leave past activity untouched.
+    """
+    deltas: Dict[DailyKey, Dict[str, int]] = defaultdict(
+        lambda: {"created": 0, "entered": 0, "assigned": 0}
+    )
+    for change in changes:
+        if change.op not in (CREATED, UPDATED):
+            continue
+        key = (day, change.new_status, _employee_key(change.new_employee_id))
+        if change.op == CREATED:
+            deltas[key]["created"] += 1
+        if change.new_status != change.old_status:
+            deltas[key]["entered"] += 1
+        if change.new_employee_id is not None and change.new_employee_id != change.old_employee_id:
+            deltas[key]["assigned"] += 1
+    return {key: delta for key, delta in deltas.items() if any(delta.values())}
+
+@on_lead_changes
+def _update_lead_daily_stats(session: Session, changes: List[LeadChange]) -> None:
+    deltas = daily_stat_deltas(changes, datetime.now(UTC).date())
+    if not deltas:
+        return
+    rows = [
+        {"day": day, "pipelineStatus": status, "assignedEmployeeId": employee_id, **delta}
+        for (day, status, employee_id), delta in sorted(deltas.items())
+    ]
+    stmt = dialect_insert(session)(LeadDailyStat).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            LeadDailyStat.day, LeadDailyStat.pipelineStatus, LeadDailyStat.assignedEmployeeId
+        ],
+        set_={
+            "created": LeadDailyStat.created + stmt.excluded.created,
+            "entered": LeadDailyStat.entered + stmt.excluded.entered,
+            "assigned": LeadDailyStat.assigned + stmt.excluded.assigned,
+        },
+    )
+    session.connection().execute(stmt)
+
+async def rebuild_lead_counters(db: AsyncSession) -> None:
+    """
+    Recompute LeadCounter from the Lead and LeadArchive tables.
+
+    The exclusive lock makes concurrent lead writes wait at their counter
+    upsert until the rebuild commits, so none of them are lost or counted twice.
+    (SQLite allows one writer at a time anyway.)
+    """
+    if is_postgresql(db):
+        await db.execute(text('LOCK TABLE "LeadCounter" IN EXCLUSIVE MODE'))
+    await db.execute(delete(LeadCounter))
+    leads = union_all(
+        select(Lead.pipelineStatus, Lead.assignedEmployeeId),
+        select(LeadArchive.pipelineStatus, LeadArchive.assignedEmployeeId),
+    ).subquery()
+    employee_key = func.coalesce(cast(leads.c.assignedEmployeeId, String), UNASSIGNED_KEY)
+    await db.execute(
+        insert(LeadCounter).from_select(
+            ["pipelineStatus", "assignedEmployeeId", "count"],
+            select(leads.c.pipelineStatus, employee_key, func.count())
+            .group_by(leads.c.pipelineStatus, employee_key),
+        )
+    )
+    await db.commit()
+
+async def get_lead_metrics(db: AsyncSession) -> Dict[str, Any]:
+    """
+    Leads by status and by employee, read from LeadCounter so the cost
+    depends on the number of statuses and employees, not leads.
+    """
+    counter_query = select(
+        LeadCounter.pipelineStatus,
+        LeadCounter.assignedEmployeeId,
+        LeadCounter.count,
+        User.name,
+    ).outerjoin(
+        User, cast(User.id, String) == LeadCounter.assignedEmployeeId
+    ).where(LeadCounter.count != 0)
+    counter_result = await db.execute(counter_query)
+
+    # Ensure all statuses are present with 0 count if missing
+    leads_by_status = {status.value: 0 for status in PipelineStatus}
+    leads_by_employee: Dict[str, int] = {}
+    unassigned_count = 0
+    for status, employee_id, count, name in counter_result.all():
+        leads_by_status[status.value] += count
+        # A missing user means the FK already nulled the assignment (counters
+        # catch up on the next reconcile)
+        if employee_id == UNASSIGNED_KEY or name is None:
+            unassigned_count += count
+        else:
+            leads_by_employee[name] = leads_by_employee.get(name, 0) + count
+    leads_by_employee["Unassigned"] = unassigned_count
+
+    status_data = [{"name": k, "value": v} for k, v in leads_by_status.items()]
+    employee_data = [{"name": k, "value": v} for k, v in leads_by_employee.items()]
+
+    return {
+        "totalLeads": sum(leads_by_status.values()),
+        "statusData": status_data,
+        "employeeData": employee_data,
+    }
+
+# Backfill for leads written before LeadDailyStat existed. Only the current
+# state survives, so it is an approximation: creation is attributed to
+# Unassigned on createdAt, the current stage is entered on updatedAt, and
+# assignments come from the "<timestamp>: Claimed by <name>" history entries.
+_DAILY_STATS_BACKFILL = text('''
+WITH leads AS (
+    SELECT "createdAt", "updatedAt", "pipelineStatus", "assignedEmployeeId", "history" FROM "Lead"
+    UNION ALL
+    SELECT "createdAt", "updatedAt", "pipelineStatus", "assignedEmployeeId", "history" FROM "LeadArchive"
+)
+INSERT INTO "LeadDailyStat" ("day", "pipelineStatus", "assignedEmployeeId", "created", "entered", "assigned")
+SELECT "day", "pipelineStatus", "assignedEmployeeId", SUM("created"), SUM("entered"), SUM("assigned")
+FROM (
+    SELECT ("createdAt" AT TIME ZONE 'UTC')::date AS "day", 'Unassigned'::"PipelineStatus" AS "pipelineStatus",
+           '' AS "assignedEmployeeId", 1 AS "created", 1 AS "entered", 0 AS "assigned"
+    FROM leads
+    UNION ALL
+    SELECT ("updatedAt" AT TIME ZONE 'UTC')::date, "pipelineStatus",
+           COALESCE("assignedEmployeeId"::text, ''), 0, 1, 0
+    FROM leads
+    WHERE "pipelineStatus" <> 'Unassigned'
+    UNION ALL
+    SELECT (split_part(entry, ': Claimed by ', 1)::timestamptz AT TIME ZONE 'UTC')::date, 'Unassigned',
+           "assignedEmployeeId"::text, 0, 0, 1
+    FROM leads, unnest("history") AS entry
+    WHERE "assignedEmployeeId" IS NOT NULL
+      AND entry ~ '^\\d{4}-\\d{2}-\\d{2}T[^ ]*: Claimed by '
+) AS activity
+GROUP BY "day", "pipelineStatus", "assignedEmployeeId"
+''')
+
+async def rebuild_lead_daily_stats(db: AsyncSession) -> None:
+    """
+    Replace LeadDailyStat with a backfill computed from the Lead and LeadArchive
+    tables. Postgres only: the backfill parses history arrays in SQL.
+    """
+    if not is_postgresql(db):
+        raise RuntimeError(f"Rebuilding daily lead stats needs Postgres, not {dialect_name(db)}")
+    await db.execute(text('LOCK TABLE "LeadDailyStat" IN EXCLUSIVE MODE'))
+    await db.execute(delete(LeadDailyStat))
+    await db.execute(_DAILY_STATS_BACKFILL)
+    await db.commit()
+
+GRANULARITIES = ("day", "week", "month")
+
+# Funnel order used for stage-to-stage conversion rates (Rejected is terminal, not a stage)
+FUNNEL = [status for status in PipelineStatus if status != PipelineStatus.Rejected]
+
+def _period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+async def get_lead_timeseries(
+    db: AsyncSession, *, start: date, end: date, granularity: str = "day"
+) -> Dict[str, Any]:
+    """
+    Lead activity between `start` and `end` (inclusive) from LeadDailyStat.
+
+    Row counts are bounded by days x statuses and employees x statuses, so
+    the cost does not grow with the number of leads.
+    """
+    in_range = LeadDailyStat.day.between(start, end)
+
+    status_result = await db.execute(
+        select(
+            LeadDailyStat.day,
+            LeadDailyStat.pipelineStatus,
+            func.sum(LeadDailyStat.created),
+            func.sum(LeadDailyStat.entered),
+        )
+        .where(in_range)
+        .group_by(LeadDailyStat.day, LeadDailyStat.pipelineStatus)
+    )
+
+    buckets: Dict[date, Dict[str, Any]] = {}
+    entered_totals = {status: 0 for status in PipelineStatus}
+    for day, status, created, entered in status_result.all():
+        period = _period_start(day, granularity)
+        bucket = buckets.setdefault(period, {
+            "period": period.isoformat(),
+            "created": 0,
+            "entered": {s.value: 0 for s in PipelineStatus},
+        })
+        # SUM over BIGINT comes back as Decimal on Postgres
+        created, entered = int(created), int(entered)
+        bucket["created"] += created
+        bucket["entered"][status.value] += entered
+        entered_totals[status] += entered
+
+    conversion = []
+    for current, following in zip(FUNNEL, FUNNEL[1:]):
+        reached = entered_totals[current]
+        conversion.append({
+            "from": current.value,
+            "to": following.value,
+            "rate": round(entered_totals[following] / reached, 4) if reached else None,
+        })
+
+    employee_result = await db.execute(
+        select(
+            LeadDailyStat.assignedEmployeeId,
+            User.name,
+            LeadDailyStat.pipelineStatus,
+            func.sum(LeadDailyStat.entered),
+            func.sum(LeadDailyStat.assigned),
+        )
+        .join(User, cast(User.id, String) == LeadDailyStat.assignedEmployeeId)
+        .where(in_range)
+        .group_by(LeadDailyStat.assignedEmployeeId, User.name, LeadDailyStat.pipelineStatus)
+    )
+
+    employees: Dict[str, Dict[str, Any]] = {}
+    for employee_id, name, status, entered, assigned in employee_result.all():
+        employee = employees.setdefault(employee_id, {
+            "employeeId": employee_id,
+            "name": name,
+            "assigned": 0,
+            "transitions": 0,
+            "entered": {},
+        })
+        entered, assigned = int(entered), int(assigned)
+        employee["assigned"] += assigned
+        if status != PipelineStatus.Unassigned:
+            employee["transitions"] += entered
+        if entered:
+            employee["entered"][status.value] = entered
+
+    return {
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "granularity": granularity,
+        "buckets": [buckets[period] for period in sorted(buckets)],
+        "conversion": conversion,
+        "employees": sorted(employees.values(), key=lambda e: e["name"]),
+    }
@@ -0,0 +1,90 @@
+"""
+ORM-free read path for endpoints that only serialize what they load (lead
+lists, the CSV export, the user list). A Core select of just the response's
+columns returns plain named tuples: no identity map, attribute
+instrumentation or change tracking per row. Serializers read them like ORM
+objects (`from_attributes`), so responses are unchanged; `lead_responses`
+also skips re-validating them, which is most of the cost of a large page.
+
+Rows are read-only snapshots; code that modifies a lead or user loads it
+through the ORM.
+"""
+from collections import namedtuple
+from typing import List, Type, Union
+from sqlalchemy import Select, cast, null, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.lead import Lead, LeadArchive
+from app.models.types import UTCDateTime
+from app.models.user import User
+from app.schemas.lead import LeadResponse
+from app.schemas.user import UserResponse
+
+# The fields of UserResponse and LeadResponse
+USER_FIELDS = ("id", "email", "name", "role", "createdAt", "updatedAt")
+LEAD_FIELDS = (
+    "id", "frn", "company_name", "contact_email", "contact_phone", "service_type", "website",
+    "notes", "pipelineStatus", "assignedEmployeeId", "history", "createdAt", "updatedAt",
+    "changeSeq", "archivedAt",
+)
+# The columns of the CSV export
+LEAD_EXPORT_FIELDS = (
+    "id", "frn", "company_name", "contact_email", "contact_phone", "service_type", "website",
+    "pipelineStatus", "assignedEmployeeId", "createdAt", "updatedAt", "archivedAt",
+)
+
+UserRow = namedtuple("UserRow", USER_FIELDS)
+LeadRow = namedtuple("LeadRow", LEAD_FIELDS + ("assigned_employee",))
+
+LeadModel = Union[Type[Lead], Type[LeadArchive]]
+
+def _lead_columns(model: LeadModel, fields) -> list:
+    # Working leads have no archivedAt
+    return [
+        getattr(model, name) if hasattr(model, name) else cast(null(), UTCDateTime).label(name)
+        for name in fields
+    ]
+
+def lead_rows_query(model: LeadModel = Lead) -> Select:
+    """
+    Select of the LeadResponse columns of `model` (Lead or LeadArchive) and
+    its assignee's UserResponse columns. Filter, order and page it like a
+    select(model), then run it with `lead_rows`.
+    """
+    return select(
+        *_lead_columns(model, LEAD_FIELDS),
+        *[getattr(User, name).label(f"assignee_{name}") for name in USER_FIELDS],
+    ).outerjoin(User, User.id == model.assignedEmployeeId)
+
+async def lead_rows(db: AsyncSession, query: Select) -> List[LeadRow]:
+    result = await db.execute(query)
+    split = len(LEAD_FIELDS)
+    return [
+        LeadRow(*row[:split], UserRow._make(row[split:]) if row[split] is not None else None)
+        for row in result
+    ]
+
+def lead_responses(rows: List[LeadRow]) -> List[LeadResponse]:
+    """
+    LeadResponse models built from rows without validation: the values come
+    straight from typed columns, and validating them again (EmailStr on every
+    assignee, above all) costs more than fetching them.
+    """
+    responses = []
+    for row in rows:
+        values = row._asdict()
+        if row.assigned_employee is not None:
+            values["assigned_employee"] = UserResponse.model_construct(**row.assigned_employee._asdict())
+        responses.append(LeadResponse.model_construct(**values))
+    return responses
+
+def lead_export_query(model: LeadModel = Lead) -> Select:
+    """
+    Select of the export columns of `model`; its rows are read by name.
+    """
+    return select(*_lead_columns(model, LEAD_EXPORT_FIELDS))
+
+async def user_rows(db: AsyncSession, *, skip: int = 0, limit: int = 100) -> List[UserRow]:
+    result = await db.execute(
+        select(*[getattr(User, name) for name in USER_FIELDS]).offset(skip).limit(limit)
+    )
+    return [UserRow._make(row) for row in result]
@@ -4,7 +4,12 @@ from sqlalchemy import select
 from app.crud.base import CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.dialects import is_postgresql
+from app.core.events import RESYNC_EVENT
+from app.core.security import get_password_hash_async, verify_and_update_password
+from app.core.response_cache import GLOBAL_SCOPE, lead_list_cache
+from app.core.token_versions import token_versions
+from app.crud.lead_events import NOTIFY_LEAD_EVENTS, notify_params
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     async def get_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
@@ -14,13 +19,14 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
         db_obj = User(
             email=obj_in.email,
-            password=get_password_hash(obj_in.password),
+            password=await get_password_hash_async(obj_in.password),
             name=obj_in.name,
             role=obj_in.role,
         )
         db.add(db_obj)
         await db.commit()
         await db.refresh(db_obj)
+        token_versions.set(db_obj.id, db_obj.tokenVersion)
         return db_obj
 
     async def update(
@@ -32,11 +38,24 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             update_data = obj_in.model_dump(exclude_unset=True)
         
         if "password" in update_data and update_data["password"]:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash_async(update_data["password"])
             del update_data["password"]
             update_data["password"] = hashed_password
-            
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+
+        # Revoke outstanding tokens when credentials or privileges change
+        role_changed = update_data.get("role") is not None and update_data["role"] != db_obj.role
+        if role_changed or update_data.get("password"):
+            update_data["tokenVersion"] = User.tokenVersion + 1
+
+        if is_postgresql(db):
+            # Delivered on commit: other workers' caches bump "global" on a
+            # resync, and clients refetch
+            await db.execute(NOTIFY_LEAD_EVENTS, notify_params([RESYNC_EVENT]))
+        user = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        token_versions.set(user.id, user.tokenVersion)
+        # Cached lead lists embed the assigned employee
+        await lead_list_cache.invalidate([GLOBAL_SCOPE])
+        return user
 
     async def authenticate(
         self, db: AsyncSession, *, email: str, password: str
@@ -44,8 +63,14 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         user = await self.get_by_email(db, email=email)
         if not user:
             return None
-        if not verify_password(password, user.password):
+        valid, new_hash = await verify_and_update_password(password, user.password)
+        if not valid:
             return None
+        if new_hash:
+            # Stored hash used outdated argon2 parameters; upgrade it transparently
+            user.password = new_hash
+            db.add(user)
+            await db.commit()
         return user
 
 user_crud = CRUDUser(User)
@@ -1,30 +1,184 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import secrets
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy.exc import DBAPIError
+from app.core import telemetry
+from app.core.cancellation import CancelOnDisconnectMiddleware, apply_statement_timeout, is_statement_timeout
+from app.core.events import lead_events
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.query_tracking import QueryTrackingMiddleware
 from app.core.config import settings
+from app.core.database import async_session_factory, engine, replica_engine, replica_session_factory
+from app.core.dialects import is_postgresql
+from app.core.replica import ReadYourWritesMiddleware, replica_router
+from app.core.response_cache import LocalBackend, lead_list_cache
+from app.core.security import PasswordHasherBusy, password_hasher
+from app.api import deps
 from app.api.v1.api import api_router
+from app.api.warmup import warm_up
+from app.crud.lead_archive import run_lead_archiver
+from app.crud.lead_cache import follow_lead_events
 
-app = FastAPI(
-    title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
-)
-
-# CORS Configuration
-if settings.CORS_ORIGINS:
-    app.add_middleware(
-        CORSMiddleware,
-        # allow_origins=settings.CORS_ORIGINS,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
+logger = logging.getLogger(__name__)
+
+# POSTs that clients retry on flaky networks; an Idempotency-Key makes the retry safe
+IDEMPOTENT_ROUTES = [
+    ("POST", f"{settings.API_V1_STR}{path}")
+    for path in ("/leads/", "/leads/claim", "/admin/process-csv")
+]
+
+async def _warm_up() -> None:
+    connections = min(settings.DB_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+    if connections <= 0:
+        return
+    targets = [("primary", async_session_factory)]
+    if replica_session_factory is not None:
+        targets.append(("replica", replica_session_factory))
+    for database, session_factory in targets:
+        # A database that is slow or down must not keep the worker from starting
+        try:
+            await asyncio.wait_for(
+                warm_up(session_factory, connections), settings.DB_WARMUP_TIMEOUT_SECONDS
+            )
+        except Exception:
+            logger.warning("Warm-up of the %s database failed; starting cold", database, exc_info=True)
+
+def _log_follower_exit(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error(
+            "Lead event follower stopped; cached lead lists only see this worker's writes",
+            exc_info=task.exception(),
+        )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await _warm_up()
+    follower = None
+    local_cache = settings.RESPONSE_CACHE_ENABLED and isinstance(lead_list_cache.backend, LocalBackend)
+    if local_cache and is_postgresql(engine):
+        # Other workers' lead writes reach this worker's cache over NOTIFY
+        follower = asyncio.create_task(follow_lead_events())
+        follower.add_done_callback(_log_follower_exit)
+    archiver = asyncio.create_task(run_lead_archiver()) if settings.LEAD_ARCHIVE_ENABLED else None
+    yield
+    if follower is not None:
+        follower.cancel()
+    if archiver is not None:
+        archiver.cancel()
+    await lead_events.close()
+    password_hasher.shutdown()
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
     )
 
-app.include_router(api_router, prefix=settings.API_V1_STR)
+async def statement_timeout_handler(request: Request, exc: DBAPIError):
+    if not is_statement_timeout(exc):
+        raise exc
+    route = telemetry.route_template(request.scope)
+    telemetry.db_statement_timeouts.inc((route,))
+    logger.warning("Statement timeout on %s %s", request.method, route)
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "The database took too long to answer; narrow the request or retry later"},
+    )
 
-@app.get("/")
 async def root():
     return {"message": "Welcome to CRM Backend API"}
 
-@app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+async def prometheus_metrics(request: Request):
+    """
+    Prometheus scrape endpoint (text exposition format). Each worker process
+    reports its own series.
+    """
+    if not settings.TELEMETRY_ENABLED:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    token = settings.TELEMETRY_SCRAPE_TOKEN
+    if token is not None and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {token}"
+    ):
+        return JSONResponse(status_code=401, content={"detail": "Invalid scrape token"})
+    return Response(telemetry.registry.render(), media_type=telemetry.CONTENT_TYPE)
+
+def create_app() -> FastAPI:
+    """
+    Build the application. Run with `uvicorn app.main:app`, or
+    `uvicorn --factory app.main:create_app` for a fresh instance.
+    """
+    app = FastAPI(
+        title=settings.PROJECT_NAME,
+        openapi_url=f"{settings.API_V1_STR}/openapi.json",
+        lifespan=lifespan,
+    )
+
+    # Innermost of the middlewares, so replayed responses get CORS headers
+    # and show up in telemetry like any other
+    if settings.IDEMPOTENCY_ENABLED:
+        app.add_middleware(
+            IdempotencyMiddleware,
+            routes=IDEMPOTENT_ROUTES,
+            authenticate=deps.principal_from_authorization,
+        )
+
+    # CORS Configuration
+    if settings.CORS_ORIGINS:
+        app.add_middleware(
+            CORSMiddleware,
+            # allow_origins=settings.CORS_ORIGINS,
+            allow_origins=["*"],
+            allow_credentials=True,
+            allow_methods=["*"],
+            allow_headers=["*"],
+        )
+
+    # Keep a caller's reads on the primary right after their own writes
+    if replica_router.enabled:
+        app.add_middleware(ReadYourWritesMiddleware, exclude_paths=[f"{settings.API_V1_STR}/batch"])
+
+    # Opt-in: not installed at all unless enabled, so it adds no overhead
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware, authorize=deps.is_admin_authorization)
+
+    if settings.QUERY_TRACKING_ENABLED:
+        app.add_middleware(QueryTrackingMiddleware)
+
+    # Inside telemetry, which records cancelled requests with status 499. The
+    # event stream notices disconnects itself and never completes anyway
+    if settings.DB_CANCEL_ON_DISCONNECT:
+        app.add_middleware(
+            CancelOnDisconnectMiddleware, exclude_paths=[f"{settings.API_V1_STR}/leads/events"]
+        )
+
+    # Outermost, so latency includes every other middleware
+    if settings.TELEMETRY_ENABLED:
+        telemetry.instrument_engine(engine, "primary")
+        if replica_engine is not None:
+            telemetry.instrument_engine(replica_engine, "replica")
+        app.add_middleware(telemetry.TelemetryMiddleware)
+
+    app.include_router(
+        api_router, prefix=settings.API_V1_STR, dependencies=[Depends(apply_statement_timeout)]
+    )
+
+    app.add_exception_handler(PasswordHasherBusy, password_hasher_busy_handler)
+    app.add_exception_handler(DBAPIError, statement_timeout_handler)
+    app.add_api_route("/", root, methods=["GET"])
+    app.add_api_route("/health", health_check, methods=["GET"])
+    app.add_api_route("/metrics", prometheus_metrics, methods=["GET"], include_in_schema=False)
+    return app
+
+app = create_app()
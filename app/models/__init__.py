@@ -1,2 +1,4 @@
 from .user import User, Role
-from .lead import Lead, PipelineStatus
+from .lead import Lead, LeadArchive, LeadDuplicateKey, LeadTombstone, PipelineStatus
+from .lead_stats import LeadCounter, LeadDailyStat
+from .idempotency import IdempotencyKey
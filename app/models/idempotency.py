@@ -0,0 +1,26 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Integer, LargeBinary, String
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+from app.models.types import UTCDateTime
+
+class IdempotencyKey(Base):
+    """
+    An Idempotency-Key seen from a user, with a digest of the request it came
+    with and, once that request finished, the response to replay.
+
+    statusCode is NULL while the first request is still running; expiresAt is
+    then its lock deadline, afterwards the end of the replay window. Managed
+    by `app.core.idempotency`.
+    """
+    __tablename__ = "IdempotencyKey"
+
+    userId: Mapped[str] = mapped_column(String, primary_key=True)
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    fingerprint: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    statusCode: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    contentType: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    body: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
+    expiresAt: Mapped[datetime] = mapped_column(UTCDateTime, index=True, nullable=False)
@@ -1,11 +1,11 @@
-import uuid
 from datetime import datetime, UTC
 from typing import List, Optional
-from sqlalchemy import String, DateTime, Enum as SQLEnum, ForeignKey, JSON, Text
-from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy import BigInteger, Index, Sequence, String, Enum as SQLEnum, ForeignKey, Text, text
+from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
 import enum
 from app.core.database import Base
+from app.models.types import TextArray, UTCDateTime, UUIDString
+from app.utils.ids import new_id, parse_uuid
 
 class PipelineStatus(str, enum.Enum):
     Unassigned = "Unassigned"
@@ -18,13 +18,28 @@ class PipelineStatus(str, enum.Enum):
     Approved = "Approved"
     Rejected = "Rejected"
 
+# Shared by Lead.changeSeq and LeadTombstone.seq so the change feed has a
+# single monotonic cursor across updates and deletes. Numbers drawn at flush
+# are redrawn at commit, in commit order (see app.crud.lead_feed)
+lead_change_seq = Sequence("lead_change_seq", metadata=Base.metadata)
+
+_CLOSED = text("\"pipelineStatus\" IN ('Approved', 'Rejected')")
+
 class Lead(Base):
     __tablename__ = "Lead"
+    __table_args__ = (
+        # Candidates for archiving (app.crud.lead_archive), oldest first
+        Index(
+            "ix_Lead_closed_updatedAt", "updatedAt",
+            postgresql_where=_CLOSED,
+            sqlite_where=_CLOSED,
+        ),
+    )
 
     id: Mapped[str] = mapped_column(
-        String, 
+        UUIDString, 
         primary_key=True, 
-        default=lambda: str(uuid.uuid4())
+        default=new_id
     )
     frn: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     company_name: Mapped[str] = mapped_column(String, nullable=False)
@@ -38,25 +53,112 @@ class Lead(Base):
         SQLEnum(PipelineStatus, name="PipelineStatus", create_type=False), 
         default=PipelineStatus.Unassigned, 
         index=True,
-        nullable=False
+        nullable=False,
+        active_history=True  # old value is needed by the lead counters
     )
     
-    history: Mapped[List[str]] = mapped_column(ARRAY(Text), default=list)
+    history: Mapped[List[str]] = mapped_column(TextArray, default=list)
     
     assignedEmployeeId: Mapped[Optional[str]] = mapped_column(
-        String, 
+        UUIDString, 
         ForeignKey("User.id", ondelete="SET NULL"),
         index=True,
-        nullable=True
+        nullable=True,
+        active_history=True
     )
     
-    createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
+    createdAt: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(UTC), nullable=False)
     updatedAt: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), 
+        UTCDateTime, 
         default=lambda: datetime.now(UTC), 
         onupdate=lambda: datetime.now(UTC),
         nullable=False
     )
 
+    # Bumped from lead_change_seq on every insert/update; cursor for GET /leads/changes
+    changeSeq: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=lead_change_seq.next_value(),
+        onupdate=lead_change_seq.next_value(),
+        index=True,
+        nullable=False
+    )
+
     # Relationships
-    assigned_employee = relationship("User", back_populates="leads")
+    # Serialized with every lead response; selectin loads the employees of a
+    # whole result in one extra query instead of one lazy load per lead
+    assigned_employee = relationship("User", back_populates="leads", lazy="selectin")
+
+    @validates("assignedEmployeeId")
+    def _validate_employee_id(self, key: str, value: Optional[str]) -> Optional[str]:
+        # UUIDString binds a malformed id as NULL, which on a write would
+        # unassign the lead behind the counters' back; ids are kept canonical
+        # so before/after comparisons in the flush listeners hold
+        if value is None:
+            return None
+        parsed = parse_uuid(value)
+        if parsed is None:
+            raise ValueError(f"assignedEmployeeId is not a UUID: {value!r}")
+        return str(parsed)
+
+class LeadTombstone(Base):
+    """
+    Records a lead leaving a reader's view, for the change feed:
+    - reason "deleted": the lead row was deleted
+    - reason "hidden": the lead was claimed or reassigned away from
+      `previousEmployeeId` (NULL meaning all employees, i.e. it was unassigned)
+    """
+    __tablename__ = "LeadTombstone"
+
+    seq: Mapped[int] = mapped_column(
+        BigInteger, server_default=lead_change_seq.next_value(), primary_key=True
+    )
+    leadId: Mapped[str] = mapped_column(String, nullable=False)
+    reason: Mapped[str] = mapped_column(String, nullable=False)
+    previousEmployeeId: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    currentEmployeeId: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    createdAt: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(UTC), nullable=False)
+
+class LeadDuplicateKey(Base):
+    """
+    Blocking keys for fuzzy duplicate detection (see `app.utils.dedupe`):
+    leads sharing a key are compared. Maintained by the flush listener in
+    `app.crud.lead_duplicates`; rebuild with
+    `scripts/rebuild_lead_duplicate_keys.py`.
+    """
+    __tablename__ = "LeadDuplicateKey"
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    leadId: Mapped[str] = mapped_column(
+        UUIDString, ForeignKey("Lead.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+class LeadArchive(Base):
+    """
+    Closed leads moved out of the Lead table, so its indexes only cover leads
+    still being worked. Same columns as Lead plus `archivedAt`; rows are
+    moved by `app.crud.lead_archive` and are read-only from then on.
+    """
+    __tablename__ = "LeadArchive"
+
+    id: Mapped[str] = mapped_column(UUIDString, primary_key=True)
+    frn: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
+    company_name: Mapped[str] = mapped_column(String, nullable=False)
+    contact_email: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    contact_phone: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    service_type: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    website: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    notes: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    pipelineStatus: Mapped[PipelineStatus] = mapped_column(
+        SQLEnum(PipelineStatus, name="PipelineStatus", create_type=False), nullable=False
+    )
+    history: Mapped[List[str]] = mapped_column(TextArray, default=list)
+    assignedEmployeeId: Mapped[Optional[str]] = mapped_column(
+        UUIDString, ForeignKey("User.id", ondelete="SET NULL"), index=True, nullable=True
+    )
+    createdAt: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
+    updatedAt: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
+    changeSeq: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    archivedAt: Mapped[datetime] = mapped_column(UTCDateTime, nullable=False)
+
+    assigned_employee = relationship("User", lazy="selectin", viewonly=True)
@@ -0,0 +1,47 @@
+from datetime import date
+from sqlalchemy import BigInteger, Date, String, Enum as SQLEnum
+from sqlalchemy.orm import Mapped, mapped_column
+from app.core.database import Base
+from app.models.lead import PipelineStatus
+
+# Key used in place of NULL for leads without an assigned employee; the
+# assignedEmployeeId columns below hold User ids as text to allow it
+UNASSIGNED_KEY = ""
+
+class LeadCounter(Base):
+    """
+    Number of leads per (pipelineStatus, assignedEmployeeId).
+
+    Maintained in the same transaction as lead writes by the flush listener in
+    `app.crud.lead_stats`; rebuild with `scripts/reconcile_lead_counters.py`.
+    """
+    __tablename__ = "LeadCounter"
+
+    pipelineStatus: Mapped[PipelineStatus] = mapped_column(
+        SQLEnum(PipelineStatus, name="PipelineStatus", create_type=False),
+        primary_key=True
+    )
+    assignedEmployeeId: Mapped[str] = mapped_column(String, primary_key=True)
+    count: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+
+class LeadDailyStat(Base):
+    """
+    Per-day lead activity per (pipelineStatus, assignedEmployeeId), fed by the
+    same flush listener as LeadCounter:
+
+    - created: leads created that day with this initial status/assignee
+    - entered: leads that moved into `pipelineStatus` that day (creation counts
+      as entering the initial status), attributed to the assignee at the time
+    - assigned: leads assigned or reassigned to the employee that day
+    """
+    __tablename__ = "LeadDailyStat"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    pipelineStatus: Mapped[PipelineStatus] = mapped_column(
+        SQLEnum(PipelineStatus, name="PipelineStatus", create_type=False),
+        primary_key=True
+    )
+    assignedEmployeeId: Mapped[str] = mapped_column(String, primary_key=True)
+    created: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    entered: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    assigned: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
@@ -0,0 +1,61 @@
+from datetime import UTC, datetime
+from typing import Any, Optional
+from sqlalchemy import JSON, DateTime, String, Text, Uuid
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.types import TypeDecorator
+from app.utils.ids import parse_uuid
+
+class UUIDString(TypeDecorator):
+    """
+    A native UUID column (16 bytes) that reads and writes the canonical
+    string form, so ids look the same to the API and to Python code as the
+    text ids they replaced.
+
+    A string that is not a UUID binds as NULL: it can never equal a stored
+    id, so lookups by a malformed id find nothing instead of raising. Writes
+    must not rely on this; ids written from input are validated first (see
+    `Lead._validate_employee_id` and `app.schemas.lead.EmployeeId`).
+
+    SQLite has no uuid type; there the canonical string is stored, so casts
+    to text compare equal to ids held in text columns, as on Postgres.
+    """
+    impl = Uuid
+    cache_ok = True
+
+    def __init__(self):
+        super().__init__(as_uuid=True)
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "sqlite":
+            return dialect.type_descriptor(String(36))
+        return dialect.type_descriptor(self.impl)
+
+    def process_bind_param(self, value: Any, dialect) -> Any:
+        value = parse_uuid(value)
+        if dialect.name == "sqlite" and value is not None:
+            return str(value)
+        return value
+
+    def process_result_value(self, value: Any, dialect) -> Optional[str]:
+        return None if value is None else str(value)
+
+class _SQLiteUTCDateTime(TypeDecorator):
+    """
+    SQLite stores timestamps without a zone; all of ours are UTC, so they
+    are written as naive UTC and read back as aware UTC.
+    """
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(UTC).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        return None if value is None else value.replace(tzinfo=UTC)
+
+# Portable column types: the Postgres type, with a variant for SQLite (used
+# by tests and benchmarks) that round-trips the same Python values
+UTCDateTime = DateTime(timezone=True).with_variant(_SQLiteUTCDateTime(), "sqlite")
+TextArray = ARRAY(Text).with_variant(JSON(), "sqlite")
@@ -1,10 +1,10 @@
-import uuid
 from datetime import datetime, UTC
-from sqlalchemy import String, Boolean, DateTime, Enum as SQLEnum
+from sqlalchemy import String, Boolean, Integer, Enum as SQLEnum
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.dialects.postgresql import UUID
 import enum
 from app.core.database import Base
+from app.models.types import UTCDateTime, UUIDString
+from app.utils.ids import new_id
 
 class Role(str, enum.Enum):
     ADMIN = "ADMIN"
@@ -14,18 +14,20 @@ class User(Base):
     __tablename__ = "User"
 
     id: Mapped[str] = mapped_column(
-        String, 
+        UUIDString, 
         primary_key=True, 
-        default=lambda: str(uuid.uuid4())
+        default=new_id
     )
     email: Mapped[str] = mapped_column(String, unique=True, index=True, nullable=False)
     password: Mapped[str] = mapped_column(String, nullable=False) # Hashed password
     name: Mapped[str] = mapped_column(String, nullable=False)
     role: Mapped[Role] = mapped_column(SQLEnum(Role, name="Role", create_type=False), default=Role.EMPLOYEE, nullable=False)
+    # Bumped whenever role or password changes; tokens carrying an older value are rejected
+    tokenVersion: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
     
-    createdAt: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=lambda: datetime.now(UTC), nullable=False)
+    createdAt: Mapped[datetime] = mapped_column(UTCDateTime, default=lambda: datetime.now(UTC), nullable=False)
     updatedAt: Mapped[datetime] = mapped_column(
-        DateTime(timezone=True), 
+        UTCDateTime, 
         default=lambda: datetime.now(UTC), 
         onupdate=lambda: datetime.now(UTC),
         nullable=False
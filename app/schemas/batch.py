@@ -0,0 +1,27 @@
+from typing import Any, Dict, List, Literal, Optional
+from pydantic import BaseModel, Field, field_validator
+
+class BatchRequestItem(BaseModel):
+    id: Optional[str] = None  # echoed back, to match responses to requests
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    url: str  # path and query under the API root, e.g. "/leads/{id}" or "/leads/?limit=20"
+    body: Optional[Any] = None  # sent as JSON
+
+    @field_validator("url")
+    @classmethod
+    def url_is_a_path(cls, value: str) -> str:
+        if not value.startswith("/"):
+            raise ValueError("must be a path under the API root, starting with /")
+        return value
+
+class BatchRequest(BaseModel):
+    requests: List[BatchRequestItem] = Field(min_length=1)
+
+class BatchResponseItem(BaseModel):
+    id: Optional[str] = None
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None  # parsed JSON, or text for other content types
+
+class BatchResponse(BaseModel):
+    responses: List[BatchResponseItem]
@@ -1,8 +1,18 @@
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel, ConfigDict
+from typing import Annotated, List, Optional, Dict, Any
+from pydantic import AfterValidator, BaseModel, ConfigDict
 from datetime import datetime
 from app.models.lead import PipelineStatus
 from app.schemas.user import UserResponse
+from app.utils.ids import parse_uuid
+
+def _employee_id(value: str) -> str:
+    # A malformed id would bind as NULL and quietly unassign the lead
+    parsed = parse_uuid(value)
+    if parsed is None:
+        raise ValueError("must be a UUID")
+    return str(parsed)
+
+EmployeeId = Annotated[str, AfterValidator(_employee_id)]
 
 # Shared properties
 class LeadBase(BaseModel):
@@ -20,9 +30,11 @@ class LeadBase(BaseModel):
 class LeadCreate(LeadBase):
     frn: str
     company_name: str
+    assignedEmployeeId: Optional[EmployeeId] = None
 
 # Properties to receive via API on update
 class LeadUpdate(LeadBase):
+    assignedEmployeeId: Optional[EmployeeId] = None
     history_entry: Optional[str] = None # Helper to append to history
 
 class LeadInDBBase(LeadBase):
@@ -30,6 +42,8 @@ class LeadInDBBase(LeadBase):
     history: List[str] = []
     createdAt: datetime
     updatedAt: datetime
+    changeSeq: Optional[int] = None
+    archivedAt: Optional[datetime] = None  # set for archived leads, which are read-only
     
     # Include the relationship data if needed, but be careful with circular deps
     assigned_employee: Optional[UserResponse] = None
@@ -43,3 +57,25 @@ class LeadResponse(LeadInDBBase):
 # Additional properties stored in DB
 class LeadInDB(LeadInDBBase):
     pass
+
+# Change feed
+class LeadTombstoneResponse(BaseModel):
+    id: str
+    seq: int
+    reason: str  # "deleted", "hidden" (no longer visible to the caller) or "archived"
+
+class LeadChangesResponse(BaseModel):
+    changes: List[LeadResponse]
+    deleted: List[LeadTombstoneResponse]
+    cursor: int
+    hasMore: bool
+
+# Fuzzy duplicate detection
+class DuplicateCandidate(BaseModel):
+    id: str
+    frn: str
+    company_name: str
+    pipelineStatus: PipelineStatus
+    assignedEmployeeId: Optional[str] = None
+    score: float
+    reasons: List[str]  # "company_name", "domain", "phone"
@@ -40,5 +40,16 @@ class Token(BaseModel):
     token_type: str
 
 class TokenData(BaseModel):
+    """
+    Verified access token claims. Carries enough about the user (id, role,
+    name) for authorization without loading the User row.
+    """
     sub: Optional[str] = None
+    role: Optional[Role] = None
+    name: Optional[str] = None
+    ver: Optional[int] = None
     model_config = ConfigDict(extra='allow')
+
+    @property
+    def id(self) -> Optional[str]:
+        return self.sub
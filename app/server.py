@@ -0,0 +1,222 @@
+"""
+Production entry point: several uvicorn worker processes sharing one
+listening socket.
+
+    python -m app.server --workers 4 --db-connection-budget 80
+
+Each worker is a separate process with its own event loop, connection pool
+and metrics; the kernel spreads incoming connections across them.
+
+Signals to the supervisor:
+- SIGTERM / SIGINT: stop accepting, let in-flight requests finish (up to
+  WEB_GRACEFUL_TIMEOUT_SECONDS) and exit.
+- SIGHUP: rolling restart. Each worker's replacement is started and must be
+  ready before the old worker is drained, so capacity never drops and no
+  request goes unanswered.
+
+Workers are also replaced when they die, or after WEB_MAX_REQUESTS requests.
+Each one keeps its slot number as WORKER_ID, which labels its /metrics series.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from uvicorn.config import STARTUP_FAILURE, Config
+from uvicorn.server import Server
+from uvicorn.supervisors.multiprocess import Process
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# The lead events LISTEN connection each worker holds outside its pool
+RESERVED_CONNECTIONS_PER_WORKER = 1
+HANDLED_SIGNALS = (signal.SIGINT, signal.SIGTERM, signal.SIGHUP)
+# How long a stopping worker waits for the requests of connections it has
+# just accepted
+ACCEPTED_CONNECTION_GRACE_SECONDS = 0.5
+
+def default_workers() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def split_connection_budget(budget: int, workers: int, pool_size: int, max_overflow: int) -> Tuple[int, int]:
+    """
+    (pool_size, max_overflow) per worker so that all workers together stay
+    within `budget` connections, never raising the configured values.
+
+    The budget is shared by one more worker than configured: during a
+    rolling restart an old worker and its replacement are both connected.
+    """
+    per_worker = budget // (workers + 1) - RESERVED_CONNECTIONS_PER_WORKER
+    if per_worker < 1:
+        raise ValueError(
+            f"A budget of {budget} connections is too small for {workers} workers "
+            f"(each needs at least {1 + RESERVED_CONNECTIONS_PER_WORKER}, plus one spare worker's share)"
+        )
+    size = min(pool_size, per_worker)
+    return size, min(max_overflow, per_worker - size)
+
+class DrainingServer(Server):
+    """
+    uvicorn's server, except that shutting down does not drop connections
+    accepted just before it: uvicorn closes every connection without a
+    request in progress, including those whose request has not been read
+    yet, and their clients get no response. Accepting stops first, and
+    those requests get a moment to arrive and be served.
+    """
+
+    async def shutdown(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        for server in self.servers:
+            server.close()
+        await asyncio.sleep(ACCEPTED_CONNECTION_GRACE_SECONDS)
+        await super().shutdown(sockets)
+
+class WorkerProcess(Process):
+    @property
+    def server(self) -> Server:
+        if self._server is None:
+            self._server = DrainingServer(config=self.config)
+        return self._server
+
+class Supervisor:
+    """
+    Starts `workers` processes and keeps each slot filled. Modeled on
+    uvicorn's own Multiprocess supervisor, which cannot tell its workers apart.
+    """
+
+    def __init__(self, config: Config, workers: int):
+        self.config = config
+        self.workers = workers
+        self.sockets = [config.bind_socket()]
+        self.processes: Dict[int, WorkerProcess] = {}
+        self.should_exit = threading.Event()
+        self.signals: List[int] = []
+
+    def spawn(self, worker_id: int) -> WorkerProcess:
+        # Spawned children copy the environment at start and read WORKER_ID
+        # through settings
+        os.environ["WORKER_ID"] = str(worker_id)
+        try:
+            worker = WorkerProcess(self.config, self.sockets)
+            worker.start()
+        finally:
+            del os.environ["WORKER_ID"]
+        logger.info("Started worker %d [%s]", worker_id, worker.pid)
+        return worker
+
+    def run(self) -> None:
+        for sig in HANDLED_SIGNALS:
+            signal.signal(sig, lambda sig, frame: self.signals.append(sig))
+        logger.info("Supervisor [%s] listening on %s:%s", os.getpid(), self.config.host, self.config.port)
+        for worker_id in range(self.workers):
+            self.processes[worker_id] = self.spawn(worker_id)
+
+        while not self.should_exit.wait(0.5):
+            self.handle_signals()
+            self.keep_alive()
+
+        logger.info("Stopping %d workers", len(self.processes))
+        for worker in self.processes.values():
+            worker.terminate()
+        for worker in self.processes.values():
+            worker.join()
+        for sock in self.sockets:
+            sock.close()
+
+    def handle_signals(self) -> None:
+        while self.signals:
+            sig = self.signals.pop(0)
+            if sig == signal.SIGHUP:
+                logger.info("Received SIGHUP, restarting workers one at a time")
+                self.rolling_restart()
+            else:
+                logger.info("Received %s, shutting down", signal.Signals(sig).name)
+                self.should_exit.set()
+
+    def keep_alive(self) -> None:
+        """
+        Replace workers that exited (crash, or WEB_MAX_REQUESTS reached) or
+        stopped answering health checks.
+        """
+        for worker_id, worker in list(self.processes.items()):
+            if self.should_exit.is_set():
+                return
+            if worker.is_alive(timeout=self.config.timeout_worker_healthcheck):
+                continue
+            worker.kill()
+            worker.join()
+            if worker.exitcode == STARTUP_FAILURE:
+                # The app cannot start (bad config, unreachable import); restarting won't help
+                logger.error("Worker %d [%s] failed to start, shutting down", worker_id, worker.pid)
+                self.should_exit.set()
+                return
+            logger.info("Worker %d [%s] exited (%s), replacing it", worker_id, worker.pid, worker.exitcode)
+            self.processes[worker_id] = self.spawn(worker_id)
+
+    def rolling_restart(self) -> None:
+        for worker_id, old in list(self.processes.items()):
+            if self.should_exit.is_set():
+                return
+            new = self.spawn(worker_id)
+            if not new.wait_until_ready(self.config.timeout_worker_healthcheck * 6, self.should_exit):
+                new.kill()
+                new.join()
+                logger.error("Replacement for worker %d was not ready in time; aborting the restart", worker_id)
+                return
+            old.terminate()
+            old.join()
+            self.processes[worker_id] = new
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY,
+                        help="worker processes (0: one per available CPU)")
+    parser.add_argument("--db-connection-budget", type=int, default=settings.DB_CONNECTION_BUDGET,
+                        help="primary DB connections for all workers together")
+    parser.add_argument("--max-requests", type=int, default=settings.WEB_MAX_REQUESTS)
+    parser.add_argument("--max-requests-jitter", type=int, default=settings.WEB_MAX_REQUESTS_JITTER)
+    parser.add_argument("--graceful-timeout", type=int, default=settings.WEB_GRACEFUL_TIMEOUT_SECONDS)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+    workers = args.workers or default_workers()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)-9s %(message)s")
+    if args.db_connection_budget is not None:
+        try:
+            pool_size, max_overflow = split_connection_budget(
+                args.db_connection_budget, workers, settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+            )
+        except ValueError as exc:
+            parser.error(str(exc))
+        # Inherited by the workers, which read them through settings
+        os.environ["DB_POOL_SIZE"] = str(pool_size)
+        os.environ["DB_MAX_OVERFLOW"] = str(max_overflow)
+        logger.info(
+            "%d workers, each with pool_size=%d max_overflow=%d (budget %d)",
+            workers, pool_size, max_overflow, args.db_connection_budget,
+        )
+
+    config = Config(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        log_level=args.log_level,
+        proxy_headers=True,
+        limit_max_requests=args.max_requests or None,
+        limit_max_requests_jitter=args.max_requests_jitter,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    Supervisor(config, workers).run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Fuzzy matching of leads that describe the same organisation under different
+FRNs.
+
+Comparing every lead with every other is quadratic, so each lead gets a
+handful of blocking keys instead, and only leads sharing a key are compared:
+
+- company name: MinHash over character trigrams of the normalized name,
+  split into LSH bands; names with trigram similarity s share at least one
+  band with probability 1 - (1 - s**LSH_ROWS) ** LSH_BANDS (about 0.86 at
+  s = 0.6, 0.99 at s = 0.8)
+- email and website domain, except free mail providers
+- phone number digits
+
+Candidates found through the keys are then scored exactly with `compare`.
+"""
+import hashlib
+import random
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+LSH_BANDS = 8
+LSH_ROWS = 3
+# Leads at or above this score are reported as possible duplicates
+MIN_SCORE = 0.6
+
+LEGAL_SUFFIXES = frozenset({
+    "ag", "bv", "co", "company", "corp", "corporation", "gmbh", "inc", "incorporated",
+    "limited", "llc", "llp", "lp", "ltd", "plc", "pllc", "pty", "sa", "the",
+})
+FREE_MAIL_DOMAINS = frozenset({
+    "aol.com", "gmail.com", "googlemail.com", "gmx.com", "hotmail.com", "icloud.com",
+    "live.com", "mail.com", "me.com", "msn.com", "outlook.com", "proton.me",
+    "protonmail.com", "yahoo.com", "yandex.com", "zoho.com",
+})
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: stored blocking keys depend on these permutations
+_rng = random.Random(0x1EAD)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(LSH_BANDS * LSH_ROWS)]
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+@dataclass(frozen=True)
+class LeadSignature:
+    name: str
+    trigrams: FrozenSet[str]
+    domains: FrozenSet[str]
+    phone: Optional[str]
+
+@dataclass
+class Match:
+    score: float
+    reasons: List[str]
+
+def normalize_company_name(name: Optional[str]) -> str:
+    """
+    Lowercase ASCII words without punctuation or legal suffixes:
+    "Acme, Inc." and "ACME Incorporated" both become "acme".
+    """
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode()
+    words = _NON_ALNUM.sub(" ", text.lower().replace("&", " and ")).split()
+    kept = [word for word in words if word not in LEGAL_SUFFIXES]
+    return " ".join(kept or words)
+
+def email_domain(email: Optional[str]) -> Optional[str]:
+    _, at, domain = (email or "").strip().lower().rpartition("@")
+    if not at or not domain or domain in FREE_MAIL_DOMAINS:
+        return None
+    return domain
+
+def website_domain(website: Optional[str]) -> Optional[str]:
+    website = (website or "").strip().lower()
+    if not website:
+        return None
+    host = urlsplit(website if "//" in website else f"//{website}").hostname or ""
+    host = host.removeprefix("www.")
+    return host if "." in host else None
+
+def phone_digits(phone: Optional[str]) -> Optional[str]:
+    """
+    The last ten digits, so "+1 (555) 123-4567" and "555.123.4567" match.
+    """
+    digits = "".join(ch for ch in phone or "" if ch.isdigit())
+    return digits[-10:] if len(digits) >= 7 else None
+
+def trigrams(name: str) -> FrozenSet[str]:
+    if not name:
+        return frozenset()
+    padded = f" {name} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+def signature(
+    company_name: Optional[str],
+    contact_email: Optional[str] = None,
+    contact_phone: Optional[str] = None,
+    website: Optional[str] = None,
+) -> LeadSignature:
+    name = normalize_company_name(company_name)
+    domains = {email_domain(contact_email), website_domain(website)} - {None}
+    return LeadSignature(name, trigrams(name), frozenset(domains), phone_digits(contact_phone))
+
+@lru_cache(maxsize=1 << 16)
+def _permuted(trigram: str) -> Tuple[int, ...]:
+    # The trigram vocabulary is small, so each trigram's hash under every
+    # permutation is computed once and MinHash is just a column-wise min
+    x = int.from_bytes(hashlib.blake2b(trigram.encode(), digest_size=8).digest(), "big")
+    return tuple((a * x + b) % _PRIME for a, b in _PERMUTATIONS)
+
+def minhash(grams: FrozenSet[str]) -> Tuple[int, ...]:
+    return tuple(map(min, zip(*map(_permuted, grams))))
+
+def blocking_keys(sig: LeadSignature) -> List[str]:
+    keys = []
+    if sig.trigrams:
+        values = minhash(sig.trigrams)
+        for band in range(LSH_BANDS):
+            rows = values[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+            digest = hashlib.blake2b(repr(rows).encode(), digest_size=6).hexdigest()
+            keys.append(f"n{band}:{digest}")
+    keys.extend(f"d:{domain}" for domain in sorted(sig.domains))
+    if sig.phone:
+        keys.append(f"p:{sig.phone}")
+    return keys
+
+def name_similarity(a: LeadSignature, b: LeadSignature) -> float:
+    if not a.trigrams or not b.trigrams:
+        return 0.0
+    shared = len(a.trigrams & b.trigrams)
+    return shared / (len(a.trigrams) + len(b.trigrams) - shared)
+
+def compare(a: LeadSignature, b: LeadSignature) -> Optional[Match]:
+    """
+    Score two leads, or None if they are not likely duplicates. A shared
+    phone number is strong evidence on its own; a shared domain only
+    together with some name similarity (one domain can host several
+    organisations, e.g. a district's schools).
+    """
+    similarity = name_similarity(a, b)
+    score, reasons = similarity, []
+    if similarity >= MIN_SCORE:
+        reasons.append("company_name")
+    if a.domains & b.domains:
+        score = max(score, 0.5 + 0.5 * similarity)
+        reasons.append("domain")
+    if a.phone is not None and a.phone == b.phone:
+        score = max(score, 0.9)
+        reasons.append("phone")
+    if score < MIN_SCORE:
+        return None
+    return Match(round(score, 3), reasons)
@@ -0,0 +1,39 @@
+"""
+Time-ordered UUIDs (version 7, RFC 9562) for primary keys.
+
+A v7 UUID starts with the creation time in milliseconds, so ids generated
+one after another sort together and inserts append to the right edge of the
+primary key index instead of landing on a random page, as uuid4 keys do.
+"""
+import os
+import time
+import uuid
+from typing import Any, Optional
+
+def uuid7() -> uuid.UUID:
+    """
+    48 bits of Unix milliseconds, then (in rand_a) the sub-millisecond
+    fraction for ordering within a millisecond, then 62 random bits.
+    """
+    ns = time.time_ns()
+    ms, sub_ms = divmod(ns, 1_000_000)
+    value = (ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= (sub_ms * 4096 // 1_000_000) << 64
+    value |= 0b10 << 62
+    value |= int.from_bytes(os.urandom(8), "big") & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
+
+def new_id() -> str:
+    return str(uuid7())
+
+def parse_uuid(value: Any) -> Optional[uuid.UUID]:
+    """
+    `value` as a UUID, or None if it is not one.
+    """
+    if value is None or isinstance(value, uuid.UUID):
+        return value
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
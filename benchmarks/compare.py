@@ -0,0 +1,47 @@
+"""
+Compare two benchmark result files scenario by scenario.
+
+    python -m benchmarks.compare benchmarks/results/before.json benchmarks/results/after.json
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+COLUMNS = [("throughput", "req/s"), ("p50", "p50 ms"), ("p95", "p95 ms"), ("p99", "p99 ms")]
+
+def _value(stats: Dict[str, Any], key: str) -> float:
+    return stats["throughput"] if key == "throughput" else stats["latencyMs"][key]
+
+def _change(before: float, after: float) -> Optional[float]:
+    return (after - before) / before * 100 if before else None
+
+def compare(before: Dict[str, Any], after: Dict[str, Any]) -> List[str]:
+    lines = [
+        f"before: {before['meta'].get('commit')} ({before['meta']['timestamp']})",
+        f"after:  {after['meta'].get('commit')} ({after['meta']['timestamp']})",
+        "",
+        f"{'scenario':<10}" + "".join(f"{label:>26}" for _, label in COLUMNS),
+    ]
+    for name in sorted(set(before["scenarios"]) & set(after["scenarios"])):
+        cells = []
+        for key, _ in COLUMNS:
+            old = _value(before["scenarios"][name], key)
+            new = _value(after["scenarios"][name], key)
+            change = _change(old, new)
+            delta = f"{change:+.1f}%" if change is not None else "n/a"
+            cells.append(f"{old:>9.1f} -> {new:>8.1f} {delta:>6}")
+        lines.append(f"{name:<10}" + "".join(f"{cell:>26}" for cell in cells))
+    return lines
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    args = parser.parse_args()
+    before = json.loads(args.before.read_text())
+    after = json.loads(args.after.read_text())
+    print("\n".join(compare(before, after)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""
+EXPLAIN-plan regression check for the hot queries.
+
+    python -m benchmarks.explain             # compare against the baselines
+    python -m benchmarks.explain --update    # record new baselines
+
+Each hot query is built by calling the real code path (endpoint or CRUD
+function) against the seeded database (python -m benchmarks.seed), capturing
+the SQL it sends and running EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) on it.
+Everything runs in one transaction that is rolled back, so writes (claims)
+leave no trace. Fails on a sequential scan over a watched table that the
+baseline doesn't have, or on a large estimated cost increase; plan shape
+changes are reported as warnings.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from dataclasses import dataclass
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.api.v1.endpoints.leads import claim_lead, export_leads, read_leads
+from app.core import telemetry
+from app.core.database import engine
+from app.core.response_cache import bypass_response_cache
+from app.crud.lead import lead_crud
+from app.crud.lead_stats import get_lead_metrics
+from app.models.lead import Lead, PipelineStatus
+from app.models.user import Role, User
+from app.schemas.user import TokenData
+from benchmarks.run import git_revision
+from benchmarks.seed import ADMIN_EMAIL, EMAIL_DOMAIN, FRN_PREFIX
+
+logger = logging.getLogger(__name__)
+
+BASELINES = Path(__file__).parent / "baselines" / "explain.json"
+WATCHED_TABLES = ["Lead"]
+# Cost growth below this is noise on tiny plans, whatever the ratio
+MIN_COST_INCREASE = 50.0
+EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "VALUES")
+
+@dataclass
+class Principals:
+    admin: TokenData
+    employee: TokenData
+    unassigned_lead_id: str
+    frn: str
+
+async def _principals(session: AsyncSession) -> Principals:
+    """
+    The benchmark admin, the first benchmark employee, a lead to look up and
+    an unassigned lead to claim, chosen deterministically.
+    """
+    def token(user: User) -> TokenData:
+        return TokenData(sub=user.id, role=user.role, name=user.name, ver=user.tokenVersion)
+
+    admin = (await session.execute(select(User).where(User.email == ADMIN_EMAIL))).scalar_one_or_none()
+    employee = (await session.execute(
+        select(User).where(User.email.like(f"%@{EMAIL_DOMAIN}"), User.role == Role.EMPLOYEE)
+        .order_by(User.email).limit(1)
+    )).scalar_one_or_none()
+    lead = (await session.execute(
+        select(Lead.id, Lead.frn).where(Lead.frn.like(f"{FRN_PREFIX}%"), Lead.assignedEmployeeId.is_(None))
+        .order_by(Lead.frn).limit(1)
+    )).first()
+    if admin is None or employee is None or lead is None:
+        raise SystemExit("No benchmark dataset found; run python -m benchmarks.seed first")
+    return Principals(token(admin), token(employee), lead.id, lead.frn)
+
+HotQuery = Callable[[AsyncSession, Principals], Awaitable[Any]]
+
+def _read_leads(user: str, **filters: Any) -> HotQuery:
+    async def run(session: AsyncSession, who: Principals) -> Any:
+        params = {
+            "skip": 0, "limit": 50, "status": None, "search": None, "assigned_to": None,
+            "include_archived": False, **filters,
+        }
+        return await read_leads(db=session, current_user=getattr(who, user), **params)
+    return run
+
+HOT_QUERIES: Dict[str, HotQuery] = {
+    "read_leads.admin": _read_leads("admin"),
+    "read_leads.employee": _read_leads("employee"),
+    "read_leads.status": _read_leads("employee", status=PipelineStatus.Email_Sent),
+    "read_leads.unassigned": _read_leads("admin", assigned_to="unassigned", limit=5000),
+    "read_leads.search": _read_leads("admin", search="Maple"),
+    "get_by_frn": lambda session, who: lead_crud.get_by_frn(session, frn=who.frn),
+    "claim_lead": lambda session, who: claim_lead(
+        db=session, lead_id=who.unassigned_lead_id, current_user=who.employee
+    ),
+    "get_metrics": lambda session, who: get_lead_metrics(session),
+    "export_leads": lambda session, who: export_leads(
+        db=session, current_user=who.admin, include_archived=False
+    ),
+}
+
+async def capture(conn: AsyncConnection, query: HotQuery, who: Principals) -> List[Tuple[str, Any]]:
+    """
+    Run one hot query in a savepoint and return the distinct explainable
+    statements it sent, in order, with the parameters of their first use.
+    """
+    statements: Dict[str, Tuple[str, Any]] = {}
+
+    def record(connection, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(EXPLAINABLE) and not executemany:
+            statements.setdefault(telemetry.fingerprint(statement)[1], (statement, parameters))
+
+    event.listen(conn.sync_connection, "before_cursor_execute", record)
+    try:
+        async with AsyncSession(
+            bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False, autoflush=False
+        ) as session:
+            # Cached lead lists would send no SQL to explain
+            with bypass_response_cache():
+                await query(session, who)
+    finally:
+        event.remove(conn.sync_connection, "before_cursor_execute", record)
+    return list(statements.values())
+
+def _walk(node: Dict[str, Any], depth: int = 0):
+    yield depth, node
+    for child in node.get("Plans", []):
+        yield from _walk(child, depth + 1)
+
+def summarize_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The comparable parts of one EXPLAIN (FORMAT JSON) plan: an indented
+    outline of node types with their relations and indexes, the planner's
+    total cost and which relations are read with a sequential scan.
+    """
+    shape, seq_scans = [], []
+    for depth, node in _walk(plan["Plan"]):
+        line = node["Node Type"]
+        if "Relation Name" in node:
+            line += f" on {node['Relation Name']}"
+        if "Index Name" in node:
+            line += f" using {node['Index Name']}"
+        shape.append("  " * depth + line)
+        if node["Node Type"].endswith("Seq Scan") and "Relation Name" in node:
+            seq_scans.append(node["Relation Name"])
+    root = plan["Plan"]
+    return {
+        "shape": shape,
+        "totalCost": root["Total Cost"],
+        "seqScans": sorted(set(seq_scans)),
+        "actualMs": round(root.get("Actual Total Time", 0.0), 3),
+        "sharedHitBlocks": root.get("Shared Hit Blocks", 0),
+        "sharedReadBlocks": root.get("Shared Read Blocks", 0),
+    }
+
+async def explain(conn: AsyncConnection, statement: str, parameters: Any) -> Dict[str, Any]:
+    result = await conn.exec_driver_sql(
+        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters
+    )
+    plan = result.scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]
+
+async def collect(names: Sequence[str]) -> Dict[str, Any]:
+    plans: Dict[str, Any] = {}
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as session:
+                who = await _principals(session)
+                total_leads = (await session.execute(select(func.count()).select_from(Lead))).scalar_one()
+            server_version = (await conn.exec_driver_sql("SHOW server_version")).scalar_one()
+            for name in names:
+                captured = await capture(conn, HOT_QUERIES[name], who)
+                for n, (statement, parameters) in enumerate(captured):
+                    summary = summarize_plan(await explain(conn, statement, parameters))
+                    plans[f"{name}#{n}"] = {"statement": telemetry.normalize_statement(statement), **summary}
+                logger.info("%-22s %d statement(s)", name, len(captured))
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+    return {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            **git_revision(),
+            "postgres": server_version,
+            "dataset": {"totalLeads": total_leads},
+        },
+        "plans": plans,
+    }
+
+def compare(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    max_cost_ratio: float = 2.0,
+    watched_tables: Sequence[str] = WATCHED_TABLES,
+) -> Tuple[List[str], List[str]]:
+    """
+    (failures, warnings) for the current plans against the baseline plans.
+    """
+    failures, warnings = [], []
+    for name, plan in current.items():
+        base = baseline.get(name)
+        if base is None:
+            warnings.append(f"{name}: no baseline (record one with --update)")
+            continue
+        new_scans = [t for t in plan["seqScans"] if t in watched_tables and t not in base["seqScans"]]
+        if new_scans:
+            failures.append(f"{name}: new sequential scan on {', '.join(new_scans)}")
+        cost, base_cost = plan["totalCost"], base["totalCost"]
+        if cost > base_cost * max_cost_ratio and cost - base_cost > MIN_COST_INCREASE:
+            failures.append(f"{name}: estimated cost {base_cost:.1f} -> {cost:.1f} ({cost / max(base_cost, 0.01):.1f}x)")
+        if plan["shape"] != base["shape"]:
+            warnings.append(
+                f"{name}: plan shape changed\n    before:\n      "
+                + "\n      ".join(base["shape"]) + "\n    after:\n      " + "\n      ".join(plan["shape"])
+            )
+    for name in baseline.keys() - current.keys():
+        warnings.append(f"{name}: in the baseline but no longer executed")
+    return failures, warnings
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default=",".join(HOT_QUERIES),
+                        help=f"comma-separated, from: {', '.join(HOT_QUERIES)}")
+    parser.add_argument("--baseline", type=Path, default=BASELINES)
+    parser.add_argument("--max-cost-ratio", type=float, default=2.0,
+                        help="fail when a plan's estimated cost grows by more than this factor")
+    parser.add_argument("--update", action="store_true", help="rewrite the baseline file with the current plans")
+    args = parser.parse_args()
+    names = [name.strip() for name in args.queries.split(",") if name.strip()]
+    unknown = set(names) - set(HOT_QUERIES)
+    if unknown:
+        parser.error(f"unknown queries: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+    report = asyncio.run(collect(names))
+    if args.update:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+        logger.info("Wrote %d plans to %s", len(report["plans"]), args.baseline)
+        return
+
+    if not args.baseline.exists():
+        sys.exit(f"{args.baseline} not found; record baselines with --update")
+    baseline = json.loads(args.baseline.read_text())
+    if baseline["meta"]["dataset"] != report["meta"]["dataset"]:
+        logger.warning(
+            "Dataset differs from the baseline's (%s vs %s); costs may not be comparable",
+            report["meta"]["dataset"], baseline["meta"]["dataset"],
+        )
+    selected = {
+        name: plan for name, plan in baseline["plans"].items() if name.split("#")[0] in names
+    }
+    failures, warnings = compare(selected, report["plans"], args.max_cost_ratio)
+    for message in warnings:
+        logger.warning("WARN %s", message)
+    for message in failures:
+        logger.error("FAIL %s", message)
+    logger.info("%d plans checked, %d failures, %d warnings", len(report["plans"]), len(failures), len(warnings))
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
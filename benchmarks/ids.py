@@ -0,0 +1,114 @@
+"""
+Compare primary key layouts: text vs native uuid columns, random (uuid4) vs
+time-ordered (uuid7) values. Each variant bulk-inserts the same number of
+rows into a scratch table with a primary key and an indexed foreign-key-like
+column, then reports insert throughput and index sizes.
+
+    python -m benchmarks.ids --rows 500000
+
+Also prints the current size of the real id indexes (Lead, User,
+LeadDuplicateKey), to compare before and after the uuid migration.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import uuid
+from typing import Any, Callable, Dict, List
+
+import asyncpg
+
+from app.core.config import settings
+from app.core.events import asyncpg_dsn
+from app.utils.ids import uuid7
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = "bench_ids"
+EMPLOYEES = 50
+PAYLOAD = "x" * 100  # stands in for the rest of a lead row
+VARIANTS: Dict[str, tuple] = {
+    "text_uuid4": ("text", uuid.uuid4),
+    "text_uuid7": ("text", uuid7),
+    "uuid_uuid4": ("uuid", uuid.uuid4),
+    "uuid_uuid7": ("uuid", uuid7),
+}
+LIVE_TABLES = ("User", "Lead", "LeadDuplicateKey")
+
+async def _index_sizes(conn: asyncpg.Connection, schema: str, table: str) -> Dict[str, int]:
+    rows = await conn.fetch(
+        """
+        SELECT i.relname AS name, pg_relation_size(i.oid) AS bytes
+        FROM pg_index x
+        JOIN pg_class t ON t.oid = x.indrelid
+        JOIN pg_class i ON i.oid = x.indexrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = $1 AND t.relname = $2
+        ORDER BY i.relname
+        """,
+        schema, table,
+    )
+    return {row["name"]: row["bytes"] for row in rows}
+
+async def run_variant(
+    conn: asyncpg.Connection, name: str, column_type: str, generate: Callable[[], uuid.UUID],
+    rows: int, batch_size: int,
+) -> Dict[str, Any]:
+    table = f'"{SCHEMA}"."{name}"'
+    await conn.execute(f"DROP TABLE IF EXISTS {table}")
+    await conn.execute(
+        f"CREATE TABLE {table} (id {column_type} PRIMARY KEY, assignee {column_type}, payload text)"
+    )
+    await conn.execute(f'CREATE INDEX "{name}_assignee_idx" ON {table} (assignee)')
+    convert = str if column_type == "text" else (lambda value: value)
+    employees = [convert(generate()) for _ in range(EMPLOYEES)]
+    insert = (
+        f"INSERT INTO {table} (id, assignee, payload) "
+        f"SELECT * FROM unnest($1::{column_type}[], $2::{column_type}[], $3::text[])"
+    )
+    elapsed = 0.0
+    for start in range(0, rows, batch_size):
+        count = min(batch_size, rows - start)
+        ids = [convert(generate()) for _ in range(count)]
+        assignees = [employees[n % EMPLOYEES] if n % 3 else None for n in range(start, start + count)]
+        began = time.perf_counter()
+        await conn.execute(insert, ids, assignees, [PAYLOAD] * count)
+        elapsed += time.perf_counter() - began
+    sizes = await _index_sizes(conn, SCHEMA, name)
+    table_bytes = await conn.fetchval(f"SELECT pg_relation_size('{table}')")
+    await conn.execute(f"DROP TABLE {table}")
+    return {
+        "rowsPerSecond": round(rows / elapsed),
+        "primaryKeyBytes": sizes[f"{name}_pkey"],
+        "assigneeIndexBytes": sizes[f"{name}_assignee_idx"],
+        "tableBytes": table_bytes,
+    }
+
+async def measure(rows: int, batch_size: int, variants: List[str]) -> Dict[str, Any]:
+    conn = await asyncpg.connect(asyncpg_dsn(settings.DATABASE_URL))
+    try:
+        await conn.execute(f'CREATE SCHEMA IF NOT EXISTS "{SCHEMA}"')
+        results = {}
+        for name in variants:
+            column_type, generate = VARIANTS[name]
+            logger.info("Inserting %d rows into %s...", rows, name)
+            results[name] = await run_variant(conn, name, column_type, generate, rows, batch_size)
+        await conn.execute(f'DROP SCHEMA "{SCHEMA}" CASCADE')
+        live = {table: await _index_sizes(conn, "public", table) for table in LIVE_TABLES}
+    finally:
+        await conn.close()
+    return {"rows": rows, "batchSize": batch_size, "variants": results, "liveIndexBytes": live}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000, help="rows inserted per variant")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per INSERT, as in a CSV import")
+    parser.add_argument("--variant", action="append", choices=list(VARIANTS), help="default: all")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    result = asyncio.run(measure(args.rows, args.batch_size, args.variant or list(VARIANTS)))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compare the ORM read path with the Core row projection (app.crud.projections)
+for a lead list page: fetch `--rows` leads with their assignees and
+serialize them to the JSON the endpoint returns. Reports CPU time per row
+(process time, so the database's own work is excluded), the Python memory
+held by the loaded leads and the peak while the page is built.
+
+    python -m benchmarks.projection --rows 10000
+
+Needs at least `--rows` leads (see benchmarks/seed.py).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.database import async_session_factory, engine
+from app.crud.projections import lead_responses, lead_rows, lead_rows_query
+from app.models.lead import Lead
+from app.schemas.lead import LeadResponse
+
+logger = logging.getLogger(__name__)
+
+_lead_list = TypeAdapter(List[LeadResponse])
+
+async def orm_load(session, rows: int) -> list:
+    result = await session.execute(select(Lead).order_by(Lead.id).limit(rows))
+    return result.scalars().all()
+
+def orm_serialize(leads) -> bytes:
+    return _lead_list.dump_json(_lead_list.validate_python(leads, from_attributes=True), by_alias=True)
+
+async def projected_load(session, rows: int) -> list:
+    return await lead_rows(session, lead_rows_query(Lead).order_by(Lead.id).limit(rows))
+
+def projected_serialize(leads) -> bytes:
+    return _lead_list.dump_json(lead_responses(leads), by_alias=True)
+
+VARIANTS: Dict[str, Tuple[Callable[[Any, int], Awaitable[list]], Callable[[list], bytes]]] = {
+    "orm": (orm_load, orm_serialize),
+    "projection": (projected_load, projected_serialize),
+}
+
+async def page(name: str, rows: int) -> bytes:
+    load, serialize = VARIANTS[name]
+    async with async_session_factory() as session:
+        return serialize(await load(session, rows))
+
+async def run_variant(name: str, rows: int, repeat: int) -> Dict[str, Any]:
+    load, serialize = VARIANTS[name]
+    body = await page(name, rows)  # warm-up: connection, compiled statement caches
+    cpu = []
+    for _ in range(repeat):
+        began = time.process_time()
+        await page(name, rows)
+        cpu.append(time.process_time() - began)
+    async with async_session_factory() as session:
+        tracemalloc.start()
+        leads = await load(session, rows)
+        loaded, _ = tracemalloc.get_traced_memory()
+        serialize(leads)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    best = min(cpu)
+    return {
+        "cpuMsPerPage": round(best * 1000, 1),
+        "cpuUsPerRow": round(best / rows * 1e6, 2),
+        # Held by the loaded leads (plus the session's identity map for the ORM)
+        "loadedBytesPerRow": round(loaded / rows),
+        "peakBytesPerRow": round(peak / rows),
+        "responseBytes": len(body),
+    }
+
+async def measure(rows: int, repeat: int) -> Dict[str, Any]:
+    try:
+        results = {}
+        for name in VARIANTS:
+            logger.info("Building %d-row pages with %s...", rows, name)
+            results[name] = await run_variant(name, rows, repeat)
+        if await page("orm", rows) != await page("projection", rows):
+            raise SystemExit("The projection returned a different response than the ORM")
+    finally:
+        await engine.dispose()
+    return {"rows": rows, "repeat": repeat, "variants": results}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10_000, help="leads per page")
+    parser.add_argument("--repeat", type=int, default=5, help="timed pages per variant; the fastest is reported")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(asyncio.run(measure(args.rows, args.repeat)), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Run benchmark scenarios and write throughput and latency percentiles to JSON.
+
+    # in-process, through the ASGI app (no server needed)
+    python -m benchmarks.run --target asgi --duration 10 --concurrency 8
+
+    # over real HTTP against a running server
+    python -m benchmarks.run --target http --base-url http://127.0.0.1:8000
+
+Seed the database first (python -m benchmarks.seed). Compare two runs with
+python -m benchmarks.compare.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import subprocess
+import time
+from collections import Counter
+from datetime import datetime, UTC
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import httpx
+
+from benchmarks.scenarios import SCENARIOS, BenchmarkContext, ScenarioExhausted, UnexpectedResponse, prepare
+
+logger = logging.getLogger(__name__)
+
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_SCENARIOS = ["login", "list", "search", "claim", "update", "metrics", "export", "import"]
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of already sorted values.
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+def summarize(latencies: List[float], errors: Counter, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(ordered),
+        "errors": sum(errors.values()),
+        "errorTypes": dict(errors),
+        "seconds": round(elapsed, 3),
+        "throughput": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+        "latencyMs": {
+            "mean": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "p50": ms(percentile(ordered, 50)),
+            "p95": ms(percentile(ordered, 95)),
+            "p99": ms(percentile(ordered, 99)),
+            "max": ms(ordered[-1]) if ordered else 0.0,
+        },
+    }
+
+async def run_scenario(
+    ctx: BenchmarkContext,
+    name: str,
+    concurrency: int,
+    duration: float,
+    max_requests: Optional[int],
+    warmup: int,
+) -> Dict[str, Any]:
+    scenario = SCENARIOS[name]
+    for _ in range(warmup):
+        try:
+            await scenario(ctx)
+        except (ScenarioExhausted, UnexpectedResponse):
+            break
+
+    latencies: List[float] = []
+    errors: Counter = Counter()
+    deadline = time.perf_counter() + duration
+    exhausted = False
+
+    async def worker():
+        nonlocal exhausted
+        while not exhausted and time.perf_counter() < deadline:
+            if max_requests is not None and len(latencies) + sum(errors.values()) >= max_requests:
+                return
+            start = time.perf_counter()
+            try:
+                await scenario(ctx)
+            except ScenarioExhausted:
+                exhausted = True
+                return
+            except UnexpectedResponse as exc:
+                errors[str(exc.status_code)] += 1
+                continue
+            except httpx.HTTPError as exc:
+                errors[type(exc).__name__] += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result = summarize(latencies, errors, time.perf_counter() - began)
+    result["exhausted"] = exhausted
+    return result
+
+def git_revision() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+def _client(target: str, base_url: str, timeout: float) -> httpx.AsyncClient:
+    if target == "asgi":
+        from app.main import app
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=timeout)
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    return httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits)
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    async with _client(args.target, args.base_url, args.timeout) as client:
+        ctx = await prepare(
+            client, employees=args.employees, claim_pool=args.claim_pool, import_rows=args.import_rows
+        )
+        dataset = (await client.get("/api/v1/admin/metrics", headers=ctx.admin_headers)).json()
+        results = {}
+        for name in args.scenarios:
+            logger.info("Running %s...", name)
+            results[name] = await run_scenario(
+                ctx, name, args.concurrency, args.duration, args.requests, args.warmup
+            )
+            stats = results[name]
+            logger.info(
+                "%-8s %8.1f req/s  p50 %8.1f ms  p95 %8.1f ms  p99 %8.1f ms  errors %d",
+                name, stats["throughput"], stats["latencyMs"]["p50"], stats["latencyMs"]["p95"],
+                stats["latencyMs"]["p99"], stats["errors"],
+            )
+    return {
+        "meta": {
+            "timestamp": datetime.now(UTC).isoformat(),
+            **git_revision(),
+            "target": args.target,
+            "baseUrl": args.base_url if args.target == "http" else None,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "requestsPerScenario": args.requests,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "dataset": {"totalLeads": dataset.get("totalLeads")},
+        },
+        "scenarios": results,
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", choices=["asgi", "http"], default="asgi")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenarios", default=",".join(DEFAULT_SCENARIOS),
+                        help=f"comma-separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per scenario")
+    parser.add_argument("--requests", type=int, default=None, help="stop a scenario after this many operations")
+    parser.add_argument("--warmup", type=int, default=3, help="untimed operations per scenario")
+    parser.add_argument("--employees", type=int, default=8, help="benchmark employees to log in")
+    parser.add_argument("--claim-pool", type=int, default=5000, help="unassigned leads fetched for claims")
+    parser.add_argument("--import-rows", type=int, default=200, help="rows per CSV import")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--output", type=Path, default=None,
+                        help="result file (default benchmarks/results/<time>_<commit>_<target>.json)")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+    report = asyncio.run(run(args))
+    output = args.output
+    if output is None:
+        stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}_{report['meta']['commit'] or 'nogit'}_{args.target}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    logger.info("Wrote %s", output)
+
+if __name__ == "__main__":
+    main()
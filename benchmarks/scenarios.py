@@ -0,0 +1,153 @@
+"""
+Benchmark scenarios. Each one is an async callable performing one logical
+operation (one or two HTTP requests) against the API and raising on an
+unexpected response.
+"""
+import itertools
+import random
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterator, List, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.models.lead import PipelineStatus
+from benchmarks.seed import ADMIN_EMAIL, COMPANY_WORDS, EMAIL_DOMAIN, PASSWORD
+
+API = settings.API_V1_STR
+PAGE_SIZE = 50
+
+class ScenarioExhausted(Exception):
+    """
+    The scenario ran out of input data (e.g. unassigned leads to claim).
+    """
+
+class UnexpectedResponse(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"{response.request.method} {response.request.url.path} -> {response.status_code}")
+        self.status_code = response.status_code
+
+def _check(response: httpx.Response) -> httpx.Response:
+    if response.status_code >= 400:
+        raise UnexpectedResponse(response)
+    return response
+
+@dataclass
+class Employee:
+    id: str
+    email: str
+    headers: Dict[str, str]
+    lead_ids: List[str] = field(default_factory=list)
+
+@dataclass
+class BenchmarkContext:
+    client: httpx.AsyncClient
+    admin_headers: Dict[str, str]
+    employees: List[Employee]
+    unassigned_ids: Optional[Iterator[str]] = None
+    import_rows: int = 200
+    rng: random.Random = field(default_factory=lambda: random.Random(0))
+    _imports: Iterator[int] = field(default_factory=itertools.count)
+
+async def _login(client: httpx.AsyncClient, email: str) -> Dict[str, str]:
+    response = _check(await client.post(f"{API}/auth/login", data={"username": email, "password": PASSWORD}))
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+async def prepare(
+    client: httpx.AsyncClient, employees: int = 8, claim_pool: int = 5000, import_rows: int = 200
+) -> BenchmarkContext:
+    """
+    Log in the benchmark admin and a few employees (see benchmarks.seed), and
+    collect the lead ids the claim and update scenarios work on.
+    """
+    admin_headers = await _login(client, ADMIN_EMAIL)
+    logged_in = []
+    for n in range(employees):
+        email = f"employee{n:04d}@{EMAIL_DOMAIN}"
+        headers = await _login(client, email)
+        me = _check(await client.get(f"{API}/auth/me", headers=headers)).json()
+        leads = _check(await client.get(
+            f"{API}/leads/", params={"assignedTo": me["id"], "limit": 200}, headers=headers
+        )).json()
+        logged_in.append(Employee(me["id"], email, headers, [lead["id"] for lead in leads]))
+    unassigned = _check(await client.get(
+        f"{API}/leads/", params={"assignedTo": "unassigned", "limit": claim_pool}, headers=admin_headers
+    )).json()
+    return BenchmarkContext(
+        client=client,
+        admin_headers=admin_headers,
+        employees=logged_in,
+        unassigned_ids=iter([lead["id"] for lead in unassigned]),
+        import_rows=import_rows,
+    )
+
+async def login(ctx: BenchmarkContext) -> None:
+    await _login(ctx.client, ctx.rng.choice(ctx.employees).email)
+
+async def list_leads(ctx: BenchmarkContext) -> None:
+    employee = ctx.rng.choice(ctx.employees)
+    _check(await ctx.client.get(
+        f"{API}/leads/", params={"limit": PAGE_SIZE, "skip": ctx.rng.randrange(0, 20) * PAGE_SIZE},
+        headers=employee.headers,
+    ))
+
+async def search(ctx: BenchmarkContext) -> None:
+    _check(await ctx.client.get(
+        f"{API}/leads/", params={"search": ctx.rng.choice(COMPANY_WORDS), "limit": PAGE_SIZE},
+        headers=ctx.admin_headers,
+    ))
+
+async def claim(ctx: BenchmarkContext) -> None:
+    lead_id = next(ctx.unassigned_ids, None)
+    if lead_id is None:
+        raise ScenarioExhausted("no unassigned leads left to claim")
+    employee = ctx.rng.choice(ctx.employees)
+    response = _check(await ctx.client.post(
+        f"{API}/leads/claim", params={"lead_id": lead_id}, headers=employee.headers
+    ))
+    employee.lead_ids.append(response.json()["id"])
+
+async def update(ctx: BenchmarkContext) -> None:
+    employees = [employee for employee in ctx.employees if employee.lead_ids]
+    if not employees:
+        raise ScenarioExhausted("benchmark employees have no leads to update")
+    employee = ctx.rng.choice(employees)
+    status = ctx.rng.choice([s for s in PipelineStatus if s != PipelineStatus.Unassigned])
+    _check(await ctx.client.put(
+        f"{API}/leads/{ctx.rng.choice(employee.lead_ids)}",
+        json={"pipelineStatus": status.value, "history_entry": "Benchmark update"},
+        headers=employee.headers,
+    ))
+
+async def metrics(ctx: BenchmarkContext) -> None:
+    _check(await ctx.client.get(f"{API}/admin/metrics", headers=ctx.admin_headers))
+
+async def export(ctx: BenchmarkContext) -> None:
+    _check(await ctx.client.get(f"{API}/leads/export", headers=ctx.admin_headers))
+
+async def import_csv(ctx: BenchmarkContext) -> None:
+    run = f"{ctx.rng.getrandbits(32):08x}{next(ctx._imports)}"
+    lines = ["frn,company_name,contact_email,service_type"]
+    for n in range(ctx.import_rows):
+        lines.append(f"BENCH-IMPORT-{run}-{n},Imported School {n},import{n}@{run}.org,Fiber")
+    upload = _check(await ctx.client.post(
+        f"{API}/admin/upload-csv",
+        files={"file": ("bench.csv", "\n".join(lines).encode(), "text/csv")},
+        headers=ctx.admin_headers,
+    )).json()
+    _check(await ctx.client.post(
+        f"{API}/admin/process-csv", json={"file_path": upload["path"]}, headers=ctx.admin_headers
+    ))
+
+Scenario = Callable[[BenchmarkContext], Awaitable[None]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "list": list_leads,
+    "search": search,
+    "claim": claim,
+    "update": update,
+    "metrics": metrics,
+    "export": export,
+    "import": import_csv,
+}
@@ -0,0 +1,284 @@
+"""
+Bulk-load a synthetic dataset for benchmarks.
+
+    python -m benchmarks.seed --users 50 --leads 1000000 --reset
+
+Rows are written with COPY, bypassing the ORM (and its flush listeners), so
+lead counters, daily rollups and duplicate detection keys are rebuilt from the
+Lead table afterwards. With a SQLite DATABASE_URL the schema is created and
+rows are inserted in batches instead (no daily rollups there).
+Everything created here is tagged (FRN prefix, e-mail domain) so --reset
+removes it without touching other data.
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta, UTC
+from itertools import accumulate, islice
+from typing import Iterator, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import asyncpg
+from sqlalchemy import delete, func, insert, select
+
+from app.core.config import settings
+from app.core.database import Base, async_session_factory, engine
+from app.core.dialects import is_postgresql, is_sqlite_url
+from app.core.events import asyncpg_dsn
+from app.core.security import get_password_hash
+from app.crud.lead_duplicates import rebuild_lead_duplicate_keys
+from app.crud.lead_stats import rebuild_lead_counters, rebuild_lead_daily_stats
+from app.models.lead import Lead, PipelineStatus
+from app.models.user import Role, User
+from app.utils.ids import uuid7
+
+logger = logging.getLogger(__name__)
+
+FRN_PREFIX = "BENCH-"
+EMAIL_DOMAIN = "bench.example.com"
+PASSWORD = "benchmark-password"
+ADMIN_EMAIL = f"admin@{EMAIL_DOMAIN}"
+
+# Share of leads currently in each stage: most never leave the top of the funnel
+STATUS_WEIGHTS = {
+    PipelineStatus.Unassigned: 35,
+    PipelineStatus.Email_Sent: 20,
+    PipelineStatus.Client_Replied: 12,
+    PipelineStatus.Plan_Sent: 8,
+    PipelineStatus.Rate_Finalized: 6,
+    PipelineStatus.Docs_Signed: 4,
+    PipelineStatus.Testing: 3,
+    PipelineStatus.Approved: 4,
+    PipelineStatus.Rejected: 8,
+}
+FUNNEL = [status for status in PipelineStatus if status != PipelineStatus.Rejected]
+# Unassigned leads that were claimed but not yet worked
+CLAIMED_UNASSIGNED_SHARE = 0.15
+# Employees' lead counts follow a Zipf-like skew: a few reps hold most leads
+ASSIGNEE_SKEW = 0.8
+MEAN_EXTRA_NOTES = 1.5
+DATASET_DAYS = 365
+
+SERVICE_TYPES = ["Internet", "Voice", "Fiber", "Wireless", "Managed WiFi", "Cabling", None]
+COMPANY_WORDS = [
+    "Acme", "Blue", "Cedar", "Delta", "Eagle", "Frontier", "Granite", "Harbor", "Ivy",
+    "Juniper", "Keystone", "Lakeside", "Maple", "North", "Oak", "Pioneer", "Quarry",
+    "River", "Summit", "Trinity", "Union", "Valley", "Westfield", "York", "Zenith",
+]
+COMPANY_SUFFIXES = ["School District", "Library", "Academy", "Public Schools", "Consortium", "Charter School"]
+NOTES = [
+    "Left voicemail", "Sent follow-up email", "Requested pricing", "Board meeting next month",
+    "Asked for references", "Budget approved", "Waiting on E-Rate form",
+]
+
+LEAD_COLUMNS = [
+    "id", "frn", "company_name", "contact_email", "contact_phone", "service_type", "website",
+    "notes", "pipelineStatus", "history", "assignedEmployeeId", "createdAt", "updatedAt",
+]
+USER_COLUMNS = ["id", "email", "password", "name", "role", "tokenVersion", "createdAt", "updatedAt"]
+
+Employee = Tuple[UUID, str]  # (id, name)
+
+def company_name(rng: random.Random) -> str:
+    return f"{rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_WORDS)} {rng.choice(COMPANY_SUFFIXES)}"
+
+def lead_history(
+    rng: random.Random,
+    status: PipelineStatus,
+    employee: Optional[Employee],
+    created: datetime,
+    now: datetime,
+) -> Tuple[List[str], datetime]:
+    """
+    History entries in the formats the app writes, ending at `status`, plus
+    the time of the last entry.
+    """
+    at = created
+    history = [f"Imported from CSV on {created.isoformat()}"]
+
+    def step() -> datetime:
+        nonlocal at
+        at = min(at + timedelta(hours=rng.expovariate(1 / 48)), now)
+        return at
+
+    if employee is None:
+        return history, at
+    name = employee[1]
+    history.append(f"{step().isoformat()}: Claimed by {name}")
+    if status == PipelineStatus.Rejected:
+        stages = FUNNEL[1:rng.randint(1, len(FUNNEL) - 1)] + [PipelineStatus.Rejected]
+    else:
+        stages = FUNNEL[1:FUNNEL.index(status) + 1]
+    for stage in stages:
+        history.append(f"{step().isoformat()}: Moved to {stage.value} (by {name})")
+    for _ in range(int(rng.expovariate(1 / MEAN_EXTRA_NOTES))):
+        history.append(f"{step().isoformat()}: {rng.choice(NOTES)} (by {name})")
+    return history, at
+
+def generate_leads(
+    count: int,
+    employees: Sequence[Employee],
+    rng: random.Random,
+    now: datetime,
+    start: int = 0,
+) -> Iterator[tuple]:
+    """
+    Lead rows in LEAD_COLUMNS order, numbered from `start`.
+    """
+    statuses = list(STATUS_WEIGHTS)
+    status_weights = list(accumulate(STATUS_WEIGHTS.values()))
+    employee_weights = list(accumulate(1 / (rank + 1) ** ASSIGNEE_SKEW for rank in range(len(employees))))
+    for n in range(start, start + count):
+        status = rng.choices(statuses, cum_weights=status_weights)[0]
+        assigned = bool(employees) and (
+            status != PipelineStatus.Unassigned or rng.random() < CLAIMED_UNASSIGNED_SHARE
+        )
+        if not assigned and status != PipelineStatus.Unassigned:
+            status = PipelineStatus.Unassigned
+        employee = rng.choices(employees, cum_weights=employee_weights)[0] if assigned else None
+        created = now - timedelta(seconds=rng.uniform(0, DATASET_DAYS * 86400))
+        history, updated = lead_history(rng, status, employee, created, now)
+        name = company_name(rng)
+        domain = "".join(name.lower().split()[:2]) + ".org"
+        yield (
+            uuid7(),
+            f"{FRN_PREFIX}{n:010d}",
+            name,
+            f"contact{n}@{domain}" if rng.random() < 0.9 else None,
+            f"555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}" if rng.random() < 0.7 else None,
+            rng.choice(SERVICE_TYPES),
+            f"https://www.{domain}" if rng.random() < 0.6 else None,
+            rng.choice(NOTES) if rng.random() < 0.3 else None,
+            status.value,
+            history,
+            employee[0] if employee else None,
+            created,
+            updated,
+        )
+
+async def reset(conn: asyncpg.Connection) -> None:
+    logger.info("Removing previous benchmark data...")
+    await conn.execute('DELETE FROM "Lead" WHERE frn LIKE $1', f"{FRN_PREFIX}%")
+    await conn.execute('DELETE FROM "User" WHERE email LIKE $1', f"%@{EMAIL_DOMAIN}")
+
+async def seed_users(conn: asyncpg.Connection, count: int, now: datetime) -> List[Employee]:
+    rows, employees = _user_rows(count, now)
+    await conn.copy_records_to_table("User", records=rows, columns=USER_COLUMNS)
+    return employees
+
+def _user_rows(count: int, now: datetime) -> Tuple[list, List[Employee]]:
+    password = get_password_hash(PASSWORD)
+    rows = [(uuid7(), ADMIN_EMAIL, password, "Benchmark Admin", Role.ADMIN.value, 0, now, now)]
+    employees = []
+    for n in range(count):
+        user_id, name = uuid7(), f"Bench Employee {n:04d}"
+        rows.append((user_id, f"employee{n:04d}@{EMAIL_DOMAIN}", password, name, Role.EMPLOYEE.value, 0, now, now))
+        employees.append((user_id, name))
+    return rows, employees
+
+async def seed_sqlite(
+    users: int, leads: int, rng: random.Random, now: datetime, batch_size: int, do_reset: bool
+) -> None:
+    """
+    The same dataset in a SQLite database, whose schema is created if needed.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        if do_reset:
+            logger.info("Removing previous benchmark data...")
+            await conn.execute(delete(Lead).where(Lead.frn.like(f"{FRN_PREFIX}%")))
+            await conn.execute(delete(User).where(User.email.like(f"%@{EMAIL_DOMAIN}")))
+        start = await conn.scalar(select(func.count()).where(Lead.frn.like(f"{FRN_PREFIX}%")))
+        if await conn.scalar(select(User.id).where(User.email == ADMIN_EMAIL)):
+            result = await conn.execute(
+                select(User.id, User.name)
+                .where(User.email.like(f"%@{EMAIL_DOMAIN}"), User.role == Role.EMPLOYEE)
+                .order_by(User.email)
+            )
+            employees = [(UUID(user_id), name) for user_id, name in result]
+            logger.info("Reusing %d benchmark employees", len(employees))
+        else:
+            records, employees = _user_rows(users, now)
+            await conn.execute(insert(User), [dict(zip(USER_COLUMNS, record)) for record in records])
+            logger.info("Created %d benchmark employees and %s", len(employees), ADMIN_EMAIL)
+
+    rows = generate_leads(leads, employees, rng, now, start=start)
+    loaded, began = 0, time.perf_counter()
+    while batch := list(islice(rows, batch_size)):
+        async with engine.begin() as conn:
+            await conn.execute(insert(Lead), [dict(zip(LEAD_COLUMNS, row)) for row in batch])
+        loaded += len(batch)
+        logger.info(
+            "Loaded %d/%d leads (%.0f rows/s)", loaded, leads, loaded / (time.perf_counter() - began)
+        )
+
+async def seed(
+    users: int, leads: int, seed: int, batch_size: int, do_reset: bool, dsn: Optional[str] = None
+) -> None:
+    rng = random.Random(seed)
+    now = datetime.now(UTC)
+    if dsn is None and is_sqlite_url(settings.DATABASE_URL):
+        await seed_sqlite(users, leads, rng, now, batch_size, do_reset)
+        await rebuild()
+        return
+    conn = await asyncpg.connect(dsn or asyncpg_dsn(settings.DATABASE_URL))
+    try:
+        if do_reset:
+            await reset(conn)
+        start = await conn.fetchval(
+            'SELECT count(*) FROM "Lead" WHERE frn LIKE $1', f"{FRN_PREFIX}%"
+        )
+        if await conn.fetchval('SELECT 1 FROM "User" WHERE email = $1', ADMIN_EMAIL):
+            employees = [
+                (row["id"], row["name"])
+                for row in await conn.fetch(
+                    'SELECT id, name FROM "User" WHERE email LIKE $1 AND role = $2 ORDER BY email',
+                    f"%@{EMAIL_DOMAIN}", Role.EMPLOYEE.value,
+                )
+            ]
+            logger.info("Reusing %d benchmark employees", len(employees))
+        else:
+            employees = await seed_users(conn, users, now)
+            logger.info("Created %d benchmark employees and %s", len(employees), ADMIN_EMAIL)
+
+        rows = generate_leads(leads, employees, rng, now, start=start)
+        loaded, began = 0, time.perf_counter()
+        while batch := list(islice(rows, batch_size)):
+            await conn.copy_records_to_table("Lead", records=batch, columns=LEAD_COLUMNS)
+            loaded += len(batch)
+            logger.info(
+                "Loaded %d/%d leads (%.0f rows/s)", loaded, leads, loaded / (time.perf_counter() - began)
+            )
+        await conn.execute('ANALYZE "Lead"')
+        await conn.execute('ANALYZE "User"')
+    finally:
+        await conn.close()
+    await rebuild()
+
+async def rebuild() -> None:
+    logger.info("Rebuilding lead counters, daily rollups and duplicate detection keys...")
+    try:
+        async with async_session_factory() as session:
+            await rebuild_lead_counters(session)
+            if is_postgresql(session):
+                await rebuild_lead_daily_stats(session)
+            await rebuild_lead_duplicate_keys(session)
+    finally:
+        await engine.dispose()
+    logger.info("Done")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=50, help="employees to create (first run only)")
+    parser.add_argument("--leads", type=int, default=100_000, help="leads to add")
+    parser.add_argument("--seed", type=int, default=42, help="random seed, for reproducible datasets")
+    parser.add_argument("--batch-size", type=int, default=50_000, help="rows per COPY")
+    parser.add_argument("--reset", action="store_true", help="delete earlier benchmark data first")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(seed(args.users, args.leads, args.seed, args.batch_size, args.reset))
+
+if __name__ == "__main__":
+    main()
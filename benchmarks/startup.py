@@ -0,0 +1,170 @@
+"""
+Measure cold start: how long `import app.main` takes, and how long a fresh
+server needs until it answers an authenticated lead list, with and without
+the startup warm-up (DB_WARMUP_CONNECTIONS).
+
+    python -m benchmarks.startup --runs 5
+
+Needs the benchmark dataset (python -m benchmarks.seed) for the admin user.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+from sqlalchemy import select
+
+from app.core import security
+from app.core.config import settings
+from app.core.database import async_session_factory, engine
+from app.models.user import User
+from benchmarks.seed import ADMIN_EMAIL
+
+logger = logging.getLogger(__name__)
+
+IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+FIRST_REQUEST = f"{settings.API_V1_STR}/leads/?limit=50"
+
+def parse_importtime(output: str) -> Dict[str, Any]:
+    """
+    Total import time of app.main and self time per top-level package, in
+    milliseconds, from `python -X importtime` output.
+    """
+    total, by_package = 0.0, Counter()
+    for line in output.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        by_package[module.split(".")[0]] += int(self_us) / 1000
+        if module == "app.main":
+            total = int(cumulative_us) / 1000
+    return {"totalMs": round(total, 1), "byPackageMs": {k: round(v, 1) for k, v in by_package.most_common()}}
+
+def measure_import(runs: int) -> Dict[str, Any]:
+    samples = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app.main"],
+            capture_output=True, text=True, check=True,
+        )
+        samples.append(parse_importtime(result.stderr))
+    totals = [sample["totalMs"] for sample in samples]
+    return {"medianMs": statistics.median(totals), "samplesMs": totals, "byPackageMs": samples[-1]["byPackageMs"]}
+
+async def admin_token() -> str:
+    try:
+        async with async_session_factory() as session:
+            user = (await session.execute(select(User).where(User.email == ADMIN_EMAIL))).scalar_one_or_none()
+    finally:
+        await engine.dispose()
+    if user is None:
+        raise SystemExit("No benchmark admin found; run python -m benchmarks.seed first")
+    return security.create_access_token(
+        user.id, extra_claims={"role": user.role.value, "name": user.name, "ver": user.tokenVersion}
+    )
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def measure_first_request(token: str, warm_connections: int, timeout: float) -> Dict[str, Any]:
+    port = _free_port()
+    env = {**os.environ, "DB_WARMUP_CONNECTIONS": str(warm_connections)}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    elapsed = lambda: round((time.perf_counter() - started) * 1000, 1)  # noqa: E731
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"server exited with {server.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise TimeoutError("server did not become ready")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.01)
+            ready = elapsed()
+            headers = {"Authorization": f"Bearer {token}"}
+            latencies = []
+            for _ in range(3):
+                start = time.perf_counter()
+                response = await client.get(FIRST_REQUEST, headers=headers)
+                response.raise_for_status()
+                latencies.append(round((time.perf_counter() - start) * 1000, 1))
+            first_success = ready + latencies[0]
+    finally:
+        stopping = time.perf_counter()
+        server.terminate()
+        server.wait(timeout=timeout)
+        shutdown = round((time.perf_counter() - stopping) * 1000, 1)
+    return {
+        "readyMs": ready,
+        "firstSuccessMs": round(first_success, 1),
+        "requestLatencyMs": latencies,
+        "shutdownMs": shutdown,
+    }
+
+def _median_of(samples: List[Dict[str, Any]], key: str) -> float:
+    return statistics.median(sample[key] for sample in samples)
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    token = await admin_token()
+    first_request = {}
+    for warm in sorted({0, args.warm_connections}):
+        samples = [await measure_first_request(token, warm, args.timeout) for _ in range(args.runs)]
+        first_request[f"warmup={warm}"] = {
+            "readyMs": _median_of(samples, "readyMs"),
+            "firstSuccessMs": _median_of(samples, "firstSuccessMs"),
+            "firstRequestMs": statistics.median(s["requestLatencyMs"][0] for s in samples),
+            "secondRequestMs": statistics.median(s["requestLatencyMs"][1] for s in samples),
+            "shutdownMs": _median_of(samples, "shutdownMs"),
+            "samples": samples,
+        }
+    return {"import": measure_import(args.runs), "firstRequest": first_request}
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warm-connections", type=int, default=settings.DB_WARMUP_CONNECTIONS,
+                        help="DB_WARMUP_CONNECTIONS to compare against no warm-up")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", type=Path, default=None, help="also write the report as JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    logger.setLevel(logging.INFO)
+    report = asyncio.run(run(args))
+    imports = report["import"]
+    top = ", ".join(f"{name} {ms:.0f}" for name, ms in list(imports["byPackageMs"].items())[:6])
+    logger.info("import app.main: %.0f ms median (self time by package, ms: %s)", imports["medianMs"], top)
+    for variant, stats in report["firstRequest"].items():
+        logger.info(
+            "%-10s ready %6.0f ms  first success %6.0f ms  first request %6.1f ms  second %6.1f ms  shutdown %5.0f ms",
+            variant, stats["readyMs"], stats["firstSuccessMs"], stats["firstRequestMs"],
+            stats["secondRequestMs"], stats["shutdownMs"],
+        )
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+        logger.info("Wrote %s", args.output)
+
+if __name__ == "__main__":
+    main()
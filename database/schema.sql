@@ -2,8 +2,15 @@
 -- This file contains the SQL schema for reference and manual execution
 
 -- Drop existing objects if they exist (for clean setup)
+DROP TABLE IF EXISTS "IdempotencyKey" CASCADE;
+DROP TABLE IF EXISTS "LeadDuplicateKey" CASCADE;
+DROP TABLE IF EXISTS "LeadArchive" CASCADE;
+DROP TABLE IF EXISTS "LeadTombstone" CASCADE;
+DROP TABLE IF EXISTS "LeadDailyStat" CASCADE;
+DROP TABLE IF EXISTS "LeadCounter" CASCADE;
 DROP TABLE IF EXISTS "Lead" CASCADE;
 DROP TABLE IF EXISTS "User" CASCADE;
+DROP SEQUENCE IF EXISTS "lead_change_seq";
 DROP TYPE IF EXISTS "PipelineStatus" CASCADE;
 DROP TYPE IF EXISTS "Role" CASCADE;
 
@@ -23,18 +30,22 @@ CREATE TYPE "PipelineStatus" AS ENUM (
 
 -- Create User table
 CREATE TABLE "User" (
-    "id" TEXT NOT NULL PRIMARY KEY,
+    "id" UUID NOT NULL PRIMARY KEY,
     "email" TEXT NOT NULL UNIQUE,
     "password" TEXT NOT NULL,
     "name" TEXT NOT NULL,
     "role" "Role" NOT NULL DEFAULT 'EMPLOYEE',
+    "tokenVersion" INTEGER NOT NULL DEFAULT 0,
     "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
     "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Change feed cursor shared by Lead and LeadTombstone
+CREATE SEQUENCE "lead_change_seq";
+
 -- Create Lead table
 CREATE TABLE "Lead" (
-    "id" TEXT NOT NULL PRIMARY KEY,
+    "id" UUID NOT NULL PRIMARY KEY,
     "frn" TEXT NOT NULL UNIQUE,
     "company_name" TEXT NOT NULL,
     "contact_email" TEXT,
@@ -44,18 +55,96 @@ CREATE TABLE "Lead" (
     "notes" TEXT,
     "pipelineStatus" "PipelineStatus" NOT NULL DEFAULT 'Unassigned',
     "history" TEXT[] DEFAULT ARRAY[]::TEXT[],
-    "assignedEmployeeId" TEXT,
+    "assignedEmployeeId" UUID,
     "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
     "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "changeSeq" BIGINT NOT NULL DEFAULT nextval('lead_change_seq'),
     CONSTRAINT "Lead_assignedEmployeeId_fkey" FOREIGN KEY ("assignedEmployeeId") 
         REFERENCES "User"("id") ON DELETE SET NULL ON UPDATE CASCADE
 );
 
+-- Create LeadArchive table (closed leads moved out of "Lead"; read-only)
+CREATE TABLE "LeadArchive" (
+    "id" UUID NOT NULL PRIMARY KEY,
+    "frn" TEXT NOT NULL UNIQUE,
+    "company_name" TEXT NOT NULL,
+    "contact_email" TEXT,
+    "contact_phone" TEXT,
+    "service_type" TEXT,
+    "website" TEXT,
+    "notes" TEXT,
+    "pipelineStatus" "PipelineStatus" NOT NULL,
+    "history" TEXT[] NOT NULL,
+    "assignedEmployeeId" UUID,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+    "changeSeq" BIGINT NOT NULL,
+    "archivedAt" TIMESTAMP(3) NOT NULL,
+    CONSTRAINT "LeadArchive_assignedEmployeeId_fkey" FOREIGN KEY ("assignedEmployeeId")
+        REFERENCES "User"("id") ON DELETE SET NULL ON UPDATE CASCADE
+);
+
+-- Create LeadTombstone table (deleted or no-longer-visible leads, for the change feed)
+CREATE TABLE "LeadTombstone" (
+    "seq" BIGINT NOT NULL DEFAULT nextval('lead_change_seq') PRIMARY KEY,
+    "leadId" TEXT NOT NULL,
+    "reason" TEXT NOT NULL,
+    "previousEmployeeId" TEXT,
+    "currentEmployeeId" TEXT,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create LeadDuplicateKey table (blocking keys for fuzzy duplicate detection)
+CREATE TABLE "LeadDuplicateKey" (
+    "key" TEXT NOT NULL,
+    "leadId" UUID NOT NULL,
+    PRIMARY KEY ("key", "leadId"),
+    CONSTRAINT "LeadDuplicateKey_leadId_fkey" FOREIGN KEY ("leadId")
+        REFERENCES "Lead"("id") ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+-- Create LeadCounter table (lead counts per status and assignee; '' = unassigned)
+CREATE TABLE "LeadCounter" (
+    "pipelineStatus" "PipelineStatus" NOT NULL,
+    "assignedEmployeeId" TEXT NOT NULL,
+    "count" BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("pipelineStatus", "assignedEmployeeId")
+);
+
+-- Create LeadDailyStat table (daily lead activity rollups)
+CREATE TABLE "LeadDailyStat" (
+    "day" DATE NOT NULL,
+    "pipelineStatus" "PipelineStatus" NOT NULL,
+    "assignedEmployeeId" TEXT NOT NULL,
+    "created" BIGINT NOT NULL DEFAULT 0,
+    "entered" BIGINT NOT NULL DEFAULT 0,
+    "assigned" BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY ("day", "pipelineStatus", "assignedEmployeeId")
+);
+
+-- Create IdempotencyKey table (Idempotency-Key header: request digest and response to replay)
+CREATE TABLE "IdempotencyKey" (
+    "userId" TEXT NOT NULL,
+    "key" TEXT NOT NULL,
+    "fingerprint" BYTEA NOT NULL,
+    "statusCode" INTEGER,
+    "contentType" TEXT,
+    "body" BYTEA,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "expiresAt" TIMESTAMP(3) NOT NULL,
+    PRIMARY KEY ("userId", "key")
+);
+
 -- Create Indexes
 CREATE INDEX "User_email_idx" ON "User"("email");
 CREATE INDEX "Lead_assignedEmployeeId_idx" ON "Lead"("assignedEmployeeId");
 CREATE INDEX "Lead_pipelineStatus_idx" ON "Lead"("pipelineStatus");
 CREATE INDEX "Lead_frn_idx" ON "Lead"("frn");
+CREATE INDEX "Lead_changeSeq_idx" ON "Lead"("changeSeq");
+CREATE INDEX "Lead_closed_updatedAt_idx" ON "Lead"("updatedAt") WHERE "pipelineStatus" IN ('Approved', 'Rejected');
+CREATE INDEX "LeadArchive_assignedEmployeeId_idx" ON "LeadArchive"("assignedEmployeeId");
+CREATE INDEX "LeadDuplicateKey_leadId_idx" ON "LeadDuplicateKey"("leadId");
+CREATE INDEX "IdempotencyKey_expiresAt_idx" ON "IdempotencyKey"("expiresAt");
 
 -- Grant permissions
 GRANT ALL PRIVILEGES ON DATABASE crm_dev TO postgres;
@@ -0,0 +1,38 @@
+import argparse
+import asyncio
+import logging
+import sys
+import os
+import time
+from datetime import timedelta
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import async_session_factory, engine
+# Import models to ensure they are registered
+import app.models
+from app.crud.lead_archive import archive_closed_leads
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def archive(days: float, batch_size: int, pause: float):
+    try:
+        logger.info("Archiving leads closed for more than %g days...", days)
+        started = time.perf_counter()
+        archived = await archive_closed_leads(
+            async_session_factory, older_than=timedelta(days=days), batch_size=batch_size, pause=pause
+        )
+        logger.info("Archived %d leads in %.1f s", archived, time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run one pass of closed lead archiving")
+    parser.add_argument("--days", type=float, default=settings.LEAD_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.LEAD_ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--pause", type=float, default=settings.LEAD_ARCHIVE_BATCH_PAUSE_SECONDS)
+    args = parser.parse_args()
+    asyncio.run(archive(args.days, args.batch_size, args.pause))
@@ -0,0 +1,29 @@
+import asyncio
+import logging
+import sys
+import os
+import time
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import async_session_factory, engine
+# Import models to ensure they are registered
+import app.models
+from app.crud.lead_duplicates import rebuild_lead_duplicate_keys
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def rebuild():
+    try:
+        async with async_session_factory() as session:
+            logger.info("Rebuilding duplicate detection keys from the Lead table...")
+            started = time.perf_counter()
+            indexed = await rebuild_lead_duplicate_keys(session)
+            logger.info("Indexed %d leads in %.1f s", indexed, time.perf_counter() - started)
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(rebuild())
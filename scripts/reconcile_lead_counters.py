@@ -0,0 +1,27 @@
+import asyncio
+import logging
+import sys
+import os
+
+# Add the parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import async_session_factory, engine
+# Import models to ensure they are registered
+import app.models
+from app.crud.lead_stats import rebuild_lead_counters
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+async def reconcile():
+    try:
+        async with async_session_factory() as session:
+            logger.info("Rebuilding lead counters from the Lead and LeadArchive tables...")
+            await rebuild_lead_counters(session)
+            logger.info("Lead counters rebuilt successfully!")
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(reconcile())
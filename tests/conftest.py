@@ -1,25 +1,81 @@
+import os
+import tempfile
+
+# Tests run on a throwaway SQLite database unless DATABASE_URL is set (point
+# it at a migrated, seeded Postgres to cover the Postgres-only paths). Must
+# happen before the app reads its settings.
+os.environ.setdefault(
+    "DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='crm-tests-'), 'crm.db')}",
+)
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
 import pytest
+from contextlib import contextmanager
 from typing import AsyncGenerator
 from httpx import AsyncClient, ASGITransport
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
-from sqlalchemy import pool
+from sqlalchemy.ext.asyncio import AsyncSession
+import app.models  # registers every table with Base.metadata
 from app.main import app
-from app.core.database import get_db
-from app.core.config import settings
+from app.core.database import Base, engine as app_engine
+from app.core.dialects import is_postgresql
+from app.core.query_tracking import track_queries
+from app.crud.user import user_crud
+from app.models.user import Role
+from app.schemas.user import UserCreate
 
-@pytest.fixture(scope="function")
-async def client() -> AsyncGenerator[AsyncClient, None]:
-    async def override_get_db():
-        engine = create_async_engine(
-            settings.DATABASE_URL,
-            poolclass=pool.NullPool,
-        )
-        async_session = async_sessionmaker(bind=engine, expire_on_commit=False)
-        async with async_session() as session:
+ADMIN_EMAIL = "admin@crm.com"
+ADMIN_PASSWORD = "admin123456"
+
+@pytest.fixture(scope="session", autouse=True)
+async def database() -> AsyncGenerator[None, None]:
+    """
+    One engine (the app's) for the whole run. A SQLite database is created
+    from the models and seeded with the admin; Postgres is expected to be
+    migrated and seeded already.
+    """
+    if not is_postgresql(app_engine):
+        async with app_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with AsyncSession(app_engine, expire_on_commit=False) as session:
+            await user_crud.create(session, obj_in=UserCreate(
+                email=ADMIN_EMAIL, password=ADMIN_PASSWORD, name="Admin User", role=Role.ADMIN
+            ))
+    yield
+    await app_engine.dispose()
+
+@pytest.fixture
+async def db_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    A session whose commits are savepoints in a transaction that is rolled
+    back after the test, so tests leave no rows behind.
+    """
+    async with app_engine.connect() as conn:
+        outer = await conn.begin()
+        async with AsyncSession(
+            bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False
+        ) as session:
             yield session
-        await engine.dispose()
+        await outer.rollback()
 
-    app.dependency_overrides[get_db] = override_get_db
+@pytest.fixture(scope="function")
+async def client() -> AsyncGenerator[AsyncClient, None]:
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
-    app.dependency_overrides.clear()
+
+@pytest.fixture
+def assert_max_queries():
+    """
+    Fail if the wrapped block runs more SQL statements than `limit`:
+
+        with assert_max_queries(3):
+            await client.get("/api/v1/leads/", headers=headers)
+    """
+    @contextmanager
+    def check(limit: int):
+        with track_queries() as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"Expected at most {limit} queries, ran {stats.count}:\n{stats.summary()}"
+        )
+    return check
@@ -0,0 +1,77 @@
+import uuid
+import pytest
+from app.api import deps
+from app.api.v1.endpoints import batch
+from app.core.config import settings
+from app.core.replica import STICKY_COOKIE, ReplicaRouter
+
+async def _admin_headers(client):
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "admin@crm.com", "password": "admin123456"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.mark.asyncio
+async def test_batch_authenticates_once_and_reports_each_status(client, monkeypatch):
+    headers = await _admin_headers(client)
+    decode = deps.jwt.decode
+    decoded = []
+
+    def counting_decode(*args, **kwargs):
+        decoded.append(1)
+        return decode(*args, **kwargs)
+
+    monkeypatch.setattr(deps.jwt, "decode", counting_decode)
+    response = await client.post(
+        f"{settings.API_V1_STR}/batch",
+        json={"requests": [
+            {"id": "me", "url": "/auth/me"},
+            {"id": "leads", "url": "/leads/?limit=2"},
+            {"id": "missing", "url": "/leads/not-a-uuid"},
+            {"id": "events", "url": "/leads/events"},
+            {"id": "users", "url": "/admin/users?limit=1"},
+        ]},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    responses = response.json()["responses"]
+    assert [(item["id"], item["status"]) for item in responses] == [
+        ("me", 200), ("leads", 200), ("missing", 404), ("events", 400), ("users", 200),
+    ]
+    assert responses[0]["body"]["email"] == "admin@crm.com"
+    assert len(responses[1]["body"]) <= 2
+    assert responses[2]["body"] == {"detail": "Lead not found"}
+    assert responses[4]["headers"]["content-type"] == "application/json"
+    assert len(decoded) == 1
+
+@pytest.mark.asyncio
+async def test_batch_limits(client):
+    headers = await _admin_headers(client)
+    url = f"{settings.API_V1_STR}/batch"
+    too_many = {"requests": [{"url": "/auth/me"}] * (settings.BATCH_MAX_REQUESTS + 1)}
+    assert (await client.post(url, json=too_many, headers=headers)).status_code == 400
+    assert (await client.post(url, json={"requests": [{"url": "leads/"}]}, headers=headers)).status_code == 422
+    assert (await client.post(url, json={"requests": [{"url": "/auth/me"}]})).status_code == 401
+
+@pytest.mark.asyncio
+async def test_batch_writes_keep_later_reads_on_the_primary_in_every_worker(client, monkeypatch):
+    headers = await _admin_headers(client)
+    router = ReplicaRouter(None, max_lag=5.0, check_interval=10.0, retry_after=30.0, read_your_writes=2.0)
+    router.replica = object()  # enabled; never queried here
+    monkeypatch.setattr(batch, "replica_router", router)
+    me = (await client.get(f"{settings.API_V1_STR}/auth/me", headers=headers)).json()
+    url = f"{settings.API_V1_STR}/batch"
+
+    failed_write = {"requests": [
+        {"url": "/auth/me"},
+        {"method": "PUT", "url": f"/leads/{uuid.uuid4()}", "body": {}},
+    ]}
+    response = await client.post(url, json=failed_write, headers=headers)
+    assert [item["status"] for item in response.json()["responses"]] == [200, 404]
+    assert STICKY_COOKIE not in response.cookies
+
+    write = {"requests": [{"method": "PUT", "url": f"/admin/users/{me['id']}", "body": {}}]}
+    response = await client.post(url, json=write, headers=headers)
+    assert response.json()["responses"][0]["status"] == 200
+    assert STICKY_COOKIE in response.cookies
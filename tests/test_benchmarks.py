@@ -0,0 +1,41 @@
+import random
+import re
+from collections import Counter
+from datetime import datetime, UTC
+from benchmarks.run import percentile, summarize
+from benchmarks.seed import LEAD_COLUMNS, generate_leads
+from app.models.lead import PipelineStatus
+
+def test_percentile_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([], 95) == 0.0
+
+def test_summarize_reports_throughput_and_percentiles():
+    stats = summarize([0.010] * 90 + [0.100] * 10, Counter({"500": 2}), elapsed=2.0)
+    assert stats["requests"] == 100
+    assert stats["errors"] == 2
+    assert stats["throughput"] == 50.0
+    assert stats["latencyMs"]["p50"] == 10.0
+    assert stats["latencyMs"]["p95"] == 100.0
+
+def test_generated_leads_are_reproducible_and_consistent():
+    employees = [(f"emp-{n}", f"Employee {n}") for n in range(5)]
+    now = datetime(2026, 1, 1, tzinfo=UTC)
+    first = list(generate_leads(500, employees, random.Random(7), now))
+    second = list(generate_leads(500, employees, random.Random(7), now))
+    assert [row[1:] for row in first] == [row[1:] for row in second]
+
+    columns = {name: i for i, name in enumerate(LEAD_COLUMNS)}
+    claimed = re.compile(r"^\d{4}-\d{2}-\d{2}T[^ ]*: Claimed by ")
+    for row in first:
+        status, employee = row[columns["pipelineStatus"]], row[columns["assignedEmployeeId"]]
+        history = row[columns["history"]]
+        # Only unassigned-stage leads may lack an assignee
+        assert employee is not None or status == PipelineStatus.Unassigned.value
+        # Claims use the format the daily stats backfill parses
+        assert any(claimed.match(entry) for entry in history) == (employee is not None)
+        assert row[columns["updatedAt"]] >= row[columns["createdAt"]]
+    assert len({row[columns["frn"]] for row in first}) == 500
@@ -0,0 +1,38 @@
+import asyncio
+import pytest
+from app.core.cache import HIT, MISS, STALE, SingleFlightCache
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_computation():
+    cache = SingleFlightCache(ttl=60, max_stale=120)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"totalLeads": calls}
+
+    results = await asyncio.gather(*(cache.get("metrics", loader) for _ in range(10)))
+    assert calls == 1
+    assert all(r.status == MISS and r.value == {"totalLeads": 1} for r in results)
+
+    hit = await cache.get("metrics", loader)
+    assert hit.status == HIT
+    assert calls == 1
+
+@pytest.mark.asyncio
+async def test_stale_value_served_while_refreshing():
+    cache = SingleFlightCache(ttl=0, max_stale=60)
+    values = iter([1, 2])
+
+    async def loader():
+        return next(values)
+
+    assert (await cache.get("k", loader)).value == 1
+    stale = await cache.get("k", loader)
+    assert stale.status == STALE
+    assert stale.value == 1
+    await asyncio.sleep(0)  # let the background refresh finish
+    await asyncio.sleep(0)
+    assert cache._entries["k"].value == 2
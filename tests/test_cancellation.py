@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from app.core.cancellation import (
+    CLIENT_CLOSED_REQUEST,
+    CancelOnDisconnectMiddleware,
+    is_statement_timeout,
+    route_statement_timeout,
+    statement_timeout,
+)
+from app.core.config import settings
+from app.core.database import engine
+from app.core.dialects import is_postgresql
+from app.core.telemetry import http_requests_cancelled
+
+def _slow_app(events):
+    async def app(scope, receive, send):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("cancelled")
+            raise
+    return app
+
+async def _call(app, method: str, disconnect_after: float = 0.01, timeout: float = 1.0):
+    sent = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.sleep(disconnect_after)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": method, "path": "/slow", "headers": []}
+    await asyncio.wait_for(app(scope, receive, send), timeout)
+    return sent
+
+@pytest.mark.asyncio
+async def test_get_is_cancelled_when_the_client_disconnects():
+    events = []
+    before = http_requests_cancelled.value(("GET", "<unmatched>"))
+    sent = await _call(CancelOnDisconnectMiddleware(_slow_app(events)), "GET")
+    assert events == ["cancelled"]
+    assert sent == [{"type": "http.response.start", "status": CLIENT_CLOSED_REQUEST, "headers": []}]
+    assert http_requests_cancelled.value(("GET", "<unmatched>")) == before + 1
+
+@pytest.mark.asyncio
+async def test_finished_and_unsafe_requests_are_not_cancelled():
+    async def app(scope, receive, send):
+        assert (await receive())["type"] == "http.request"
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+        # Disconnects after the response (background work) are left alone
+        await asyncio.sleep(0.05)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    sent = await _call(CancelOnDisconnectMiddleware(app), "GET")
+    assert [message.get("status") for message in sent] == [200, None, None]
+
+    events = []
+    with pytest.raises(asyncio.TimeoutError):
+        await _call(CancelOnDisconnectMiddleware(_slow_app(events)), "POST", timeout=0.2)
+    # Cancelled by the test's timeout only, after the disconnect was ignored
+    assert events == ["cancelled"]
+
+def test_route_timeouts_override_the_default(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_SECONDS", 5.0)
+    monkeypatch.setattr(settings, "DB_ROUTE_STATEMENT_TIMEOUTS", {"/export": 60.0, "/unlimited": 0})
+    assert route_statement_timeout("/export") == 60.0
+    assert route_statement_timeout("/other") == 5.0
+    assert route_statement_timeout("/unlimited") is None
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not is_postgresql(engine), reason="statement_timeout is Postgres only")
+async def test_statement_timeout_cancels_slow_statements(db_session):
+    token = statement_timeout.set(0.05)
+    try:
+        with pytest.raises(DBAPIError) as exc_info:
+            await db_session.execute(text("SELECT pg_sleep(1)"))
+    finally:
+        statement_timeout.reset(token)
+    assert is_statement_timeout(exc_info.value)
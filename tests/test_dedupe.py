@@ -0,0 +1,66 @@
+import uuid
+import pytest
+from sqlalchemy import select
+from app.crud.lead_duplicates import find_duplicates, lead_signature
+from app.models.lead import Lead, LeadDuplicateKey
+from app.utils.dedupe import (
+    blocking_keys,
+    compare,
+    normalize_company_name,
+    phone_digits,
+    signature,
+    website_domain,
+)
+
+def test_normalization_ignores_case_punctuation_and_legal_suffixes():
+    assert normalize_company_name("Acme, Inc.") == "acme"
+    assert normalize_company_name("ACME Incorporated") == "acme"
+    assert normalize_company_name("Café & Co") == "cafe and"
+    assert normalize_company_name("The Company") == "the company"
+    assert phone_digits("+1 (555) 123-4567") == phone_digits("555.123.4567") == "5551234567"
+    assert phone_digits("ext. 12") is None
+    assert website_domain("https://www.Acme.com/about") == website_domain("acme.com") == "acme.com"
+
+def test_similar_leads_share_keys_and_match():
+    a = signature("Acme Widgets, Inc.", "sales@acmewidgets.com", "555-123-4567")
+    b = signature("ACME Widgets LLC", None, "(555) 123 4567", "www.acmewidgets.com")
+    assert set(blocking_keys(a)) & set(blocking_keys(b))
+    match = compare(a, b)
+    assert match.score == 1.0
+    assert match.reasons == ["company_name", "domain", "phone"]
+
+def test_unrelated_leads_do_not_match():
+    a = signature("Acme Widgets", "sales@gmail.com")
+    b = signature("Zenith Library", "info@gmail.com")
+    # Free mail domains are not evidence
+    assert signature("x", "a@gmail.com").domains == frozenset()
+    assert compare(a, b) is None
+    # A shared domain needs some name similarity too
+    assert compare(signature("Oak School", "a@district.org"), signature("Pine Library", "b@district.org")) is None
+
+@pytest.mark.asyncio
+async def test_duplicate_keys_follow_lead_writes(db_session):
+    marker = uuid.uuid4().hex[:8]
+    original = Lead(frn=f"TEST-{marker}-1", company_name=f"Qx{marker} Fabrication Inc", contact_phone="212 555 0199")
+    other = Lead(frn=f"TEST-{marker}-2", company_name="Unrelated Org")
+    db_session.add_all([original, other])
+    await db_session.commit()
+
+    [matches] = await find_duplicates(
+        db_session, [signature(f"QX{marker} Fabrication LLC")], within_batch=True
+    )
+    assert [match.lead.id for match in matches] == [original.id]
+    assert matches[0].reasons == ["company_name"]
+
+    # Renaming re-keys the lead
+    other.company_name = f"Qx{marker} Fabrication Company"
+    await db_session.commit()
+    [matches] = await find_duplicates(db_session, [lead_signature(original)], exclude={original.id})
+    assert [match.lead.id for match in matches] == [other.id]
+
+    await db_session.delete(other)
+    await db_session.commit()
+    keys = (await db_session.execute(
+        select(LeadDuplicateKey.key).where(LeadDuplicateKey.leadId == other.id)
+    )).scalars().all()
+    assert keys == []
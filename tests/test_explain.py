@@ -0,0 +1,35 @@
+from benchmarks.explain import compare, summarize_plan
+
+def _plan(node_type="Index Scan", relation="Lead", index="ix_Lead_frn", cost=8.4):
+    scan = {"Node Type": node_type, "Relation Name": relation, "Total Cost": cost}
+    if index:
+        scan["Index Name"] = index
+    return {"Plan": {"Node Type": "Limit", "Total Cost": cost, "Actual Total Time": 0.02,
+                     "Shared Hit Blocks": 4, "Plans": [scan]}}
+
+def test_summarize_plan_outlines_nodes_and_seq_scans():
+    summary = summarize_plan(_plan("Parallel Seq Scan", index=None, cost=1200.0))
+    assert summary["shape"] == ["Limit", "  Parallel Seq Scan on Lead"]
+    assert summary["seqScans"] == ["Lead"]
+    assert summary["totalCost"] == 1200.0
+    assert summary["sharedHitBlocks"] == 4
+
+def test_compare_fails_on_new_seq_scan_and_cost_growth():
+    baseline = {"by_frn#0": summarize_plan(_plan()), "list#0": summarize_plan(_plan(cost=100.0))}
+    current = {
+        "by_frn#0": summarize_plan(_plan("Seq Scan", index=None, cost=9000.0)),
+        "list#0": summarize_plan(_plan(cost=350.0)),
+    }
+    failures, warnings = compare(baseline, current, max_cost_ratio=2.0)
+    assert any("new sequential scan on Lead" in f for f in failures if f.startswith("by_frn#0"))
+    assert any(f.startswith("list#0: estimated cost") for f in failures)
+    assert any(w.startswith("by_frn#0: plan shape changed") for w in warnings)
+
+def test_compare_tolerates_known_seq_scans_and_small_costs():
+    seq = summarize_plan(_plan("Seq Scan", index=None, cost=4.0))
+    baseline = {"list#0": seq, "gone#0": seq}
+    current = {"list#0": summarize_plan(_plan("Seq Scan", index=None, cost=20.0)), "new#0": seq}
+    failures, warnings = compare(baseline, current)
+    assert failures == []
+    assert any(w.startswith("new#0: no baseline") for w in warnings)
+    assert any(w.startswith("gone#0:") for w in warnings)
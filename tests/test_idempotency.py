@@ -0,0 +1,113 @@
+import uuid
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete
+from app.core.config import settings
+from app.core.database import async_session_factory
+from app.core.idempotency import (
+    IdempotencyMiddleware,
+    IdempotencyStore,
+    KeyInProgress,
+    KeyMismatch,
+    StoredResponse,
+    request_fingerprint,
+)
+from app.models.idempotency import IdempotencyKey
+from app.schemas.user import TokenData
+
+class FakeStore:
+    def __init__(self):
+        self.calls = []
+
+    async def begin(self, user_id, key, fingerprint):
+        self.calls.append("begin")
+
+    async def complete(self, user_id, key, response):
+        self.calls.append(("complete", response.status))
+
+    async def release(self, user_id, key):
+        self.calls.append("release")
+
+async def _authenticate(authorization):
+    return TokenData(sub="user-1") if authorization == "Bearer ok" else None
+
+def _middleware(status: int, store) -> IdempotencyMiddleware:
+    async def endpoint(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b"{}"})
+    return IdempotencyMiddleware(endpoint, [("POST", "/things")], _authenticate, store)
+
+def test_fingerprint_covers_path_query_and_body():
+    base = request_fingerprint("POST", "/leads/claim", b"lead_id=1", b"")
+    assert len(base) == 16
+    assert base == request_fingerprint("POST", "/leads/claim", b"lead_id=1", b"")
+    assert base != request_fingerprint("POST", "/leads/claim", b"lead_id=2", b"")
+    assert base != request_fingerprint("POST", "/leads/claim", b"", b"lead_id=1")
+
+@pytest.mark.asyncio
+async def test_store_replays_finished_requests_and_rejects_reuse():
+    store = IdempotencyStore(async_session_factory, ttl=60, lock_seconds=60, purge_interval=60)
+    user_id = f"test-{uuid.uuid4()}"
+    first, other = request_fingerprint("POST", "/a", b"", b"1"), request_fingerprint("POST", "/a", b"", b"2")
+    try:
+        assert await store.begin(user_id, "k", first) is None
+        with pytest.raises(KeyInProgress):
+            await store.begin(user_id, "k", first)
+
+        await store.complete(user_id, "k", StoredResponse(201, "application/json", b'{"id": 1}'))
+        assert await store.begin(user_id, "k", first) == StoredResponse(201, "application/json", b'{"id": 1}')
+        with pytest.raises(KeyMismatch):
+            await store.begin(user_id, "k", other)
+        # Keys are per user
+        assert await store.begin(f"{user_id}-other", "k", other) is None
+
+        # A released key runs again; an expired one is taken over
+        await store.release(f"{user_id}-other", "k")
+        assert await store.begin(f"{user_id}-other", "k", other) is None
+        expiring = IdempotencyStore(async_session_factory, ttl=0, lock_seconds=60, purge_interval=60)
+        await expiring.complete(f"{user_id}-other", "k", StoredResponse(200, None, b""))
+        assert await expiring.begin(f"{user_id}-other", "k", first) is None
+    finally:
+        async with async_session_factory() as session:
+            await session.execute(delete(IdempotencyKey).where(IdempotencyKey.userId.startswith(user_id)))
+            await session.commit()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status, calls", [(201, ["begin", ("complete", 201)]), (503, ["begin", "release"])])
+async def test_middleware_stores_only_responses_below_500(status, calls):
+    store = FakeStore()
+    app = _middleware(status, store)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/things", headers={"Authorization": "Bearer ok", "Idempotency-Key": "abc"})
+        assert response.status_code == status
+        # Unauthenticated or keyless requests are not tracked
+        await client.post("/things", headers={"Idempotency-Key": "abc"})
+        await client.post("/things", headers={"Authorization": "Bearer ok"})
+        too_long = await client.post("/things", headers={"Authorization": "Bearer ok", "Idempotency-Key": "x" * 256})
+    assert too_long.status_code == 400
+    assert store.calls == calls
+
+@pytest.mark.asyncio
+async def test_retried_claim_returns_the_original_response(client):
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "admin@crm.com", "password": "admin123456"},
+    )
+    token = response.json()["access_token"]
+    key = f"test-{uuid.uuid4()}"
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": key}
+    url = f"{settings.API_V1_STR}/leads/claim"
+    try:
+        first = await client.post(url, params={"lead_id": "missing"}, headers=headers)
+        retry = await client.post(url, params={"lead_id": "missing"}, headers=headers)
+        reused = await client.post(url, params={"lead_id": "other"}, headers=headers)
+    finally:
+        async with async_session_factory() as session:
+            await session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            await session.commit()
+
+    assert first.status_code == retry.status_code == 404
+    assert retry.content == first.content
+    assert "idempotent-replayed" not in first.headers
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert reused.status_code == 422
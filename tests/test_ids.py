@@ -0,0 +1,77 @@
+import uuid
+import pytest
+from pydantic import ValidationError
+from app.core.config import settings
+from app.crud.lead import lead_crud
+from app.models.lead import Lead
+from app.schemas.lead import LeadCreate, LeadUpdate
+from app.utils.ids import new_id, parse_uuid, uuid7
+
+def test_uuid7_is_time_ordered():
+    ids = [uuid7() for _ in range(1000)]
+    assert all(value.version == 7 and value.variant == uuid.RFC_4122 for value in ids)
+    assert len(set(ids)) == len(ids)
+    # The millisecond timestamp prefix never goes backwards
+    assert [value.int >> 80 for value in ids] == sorted(value.int >> 80 for value in ids)
+    assert len(new_id()) == 36
+
+def test_parse_uuid_accepts_only_uuids():
+    value = uuid.uuid4()
+    assert parse_uuid(str(value)) == parse_uuid(str(value).upper()) == parse_uuid(value) == value
+    assert parse_uuid("not-a-uuid") is None
+    assert parse_uuid("") is None
+    assert parse_uuid(None) is None
+
+@pytest.mark.asyncio
+async def test_ids_read_back_as_strings_and_malformed_ids_match_nothing(db_session):
+    created = Lead(frn=f"TEST-{uuid.uuid4()}", company_name="Id Test")
+    db_session.add(created)
+    await db_session.commit()
+    assert uuid.UUID(created.id).version == 7
+
+    db_session.expunge_all()
+    found = await lead_crud.get(db_session, id=created.id.upper())
+    assert found.id == created.id
+    assert await lead_crud.get(db_session, id="not-a-uuid") is None
+
+@pytest.mark.asyncio
+async def test_malformed_employee_ids_are_rejected_on_write(db_session):
+    created = Lead(frn=f"TEST-{uuid.uuid4()}", company_name="Id Write Test")
+    db_session.add(created)
+    await db_session.commit()
+    db_session.expunge_all()
+    lead = await lead_crud.get(db_session, id=created.id)
+
+    with pytest.raises(ValueError):
+        await lead_crud.update(db_session, db_obj=lead, obj_in={"assignedEmployeeId": "not-a-uuid"})
+    with pytest.raises(ValueError):
+        Lead(frn="TEST-bad", company_name="Bad", assignedEmployeeId="not-a-uuid")
+
+    # Stored and compared in canonical form
+    employee_id = new_id()
+    upper = Lead(frn="TEST-upper", company_name="Upper", assignedEmployeeId=employee_id.upper())
+    assert upper.assignedEmployeeId == employee_id
+
+def test_lead_schemas_require_uuid_employee_ids():
+    employee_id = new_id()
+    assert LeadUpdate(assignedEmployeeId=employee_id.upper()).assignedEmployeeId == employee_id
+    assert LeadUpdate(assignedEmployeeId=None).assignedEmployeeId is None
+    with pytest.raises(ValidationError):
+        LeadUpdate(assignedEmployeeId="not-a-uuid")
+    with pytest.raises(ValidationError):
+        LeadCreate(frn="TEST-bad", company_name="Bad", assignedEmployeeId="")
+
+@pytest.mark.asyncio
+async def test_api_rejects_malformed_employee_ids(client):
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "admin@crm.com", "password": "admin123456"},
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.post(
+        f"{settings.API_V1_STR}/leads/",
+        json={"frn": f"TEST-{uuid.uuid4()}", "company_name": "Bad Id", "assignedEmployeeId": "not-a-uuid"},
+        headers=headers,
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "assignedEmployeeId"]
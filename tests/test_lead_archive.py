@@ -0,0 +1,111 @@
+import uuid
+from datetime import UTC, datetime, timedelta
+import pytest
+from sqlalchemy import delete, insert, select
+from app.core.database import engine
+from app.core.dialects import is_postgresql
+from app.crud.lead import lead_crud
+from app.crud.lead_archive import archive_batch, archive_events, archive_statement, archived_frns, get_lead
+from app.models.lead import Lead, LeadArchive, LeadTombstone, PipelineStatus
+from app.models.user import User
+from app.utils.ids import new_id
+
+@pytest.mark.asyncio
+async def test_archive_moves_only_old_closed_leads(db_session):
+    marker = uuid.uuid4().hex[:8]
+    long_ago = datetime(2000, 1, 1, tzinfo=UTC)
+    old_closed = Lead(
+        frn=f"TEST-{marker}-1", company_name="Old Closed",
+        pipelineStatus=PipelineStatus.Rejected, history=["closed"], updatedAt=long_ago,
+    )
+    old_open = Lead(frn=f"TEST-{marker}-2", company_name="Old Open", updatedAt=long_ago)
+    recent_closed = Lead(
+        frn=f"TEST-{marker}-3", company_name="Recent Closed", pipelineStatus=PipelineStatus.Approved
+    )
+    db_session.add_all([old_closed, old_open, recent_closed])
+    await db_session.commit()
+    since = max(old_closed.changeSeq, old_open.changeSeq, recent_closed.changeSeq)
+
+    assert await archive_batch(db_session, datetime.now(UTC) - timedelta(days=1000), 100) == 1
+    db_session.expunge_all()
+
+    assert await lead_crud.get(db_session, id=old_closed.id) is None
+    archived = await get_lead(db_session, old_closed.id)
+    assert isinstance(archived, LeadArchive)
+    assert (archived.frn, archived.history, archived.updatedAt) == (old_closed.frn, ["closed"], long_ago)
+    assert archived.archivedAt is not None
+    assert isinstance(await get_lead(db_session, old_open.id), Lead)
+    assert isinstance(await get_lead(db_session, recent_closed.id), Lead)
+    assert await archived_frns(db_session, {old_closed.frn, old_open.frn}) == {old_closed.frn}
+
+    # Change feed readers drop the lead
+    _, tombstones, _ = await lead_crud.get_changes(db_session, since=since, limit=10)
+    assert [(t.leadId, t.reason) for t in tombstones] == [(old_closed.id, "archived")]
+
+def test_archive_events_are_per_lead_up_to_the_flush_limit():
+    rows = [
+        type("Row", (), {"id": str(n), "pipelineStatus": PipelineStatus.Approved, "assignedEmployeeId": None})
+        for n in range(3)
+    ]
+    events = archive_events(rows)
+    assert [event["type"] for event in events] == ["archived"] * 3
+    assert events[0]["previousStatus"] == "Approved"
+    assert archive_events(rows * 50) == [{"type": "bulk", "count": 150}]
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not is_postgresql(engine), reason="archive_statement is Postgres only")
+async def test_archive_statement_moves_leads_and_skips_locked_ones():
+    # Committed rows, so a second transaction can lock one; inserted with Core
+    # to leave counters and rollups alone, and removed afterwards
+    marker = uuid.uuid4().hex[:8]
+    long_ago = datetime(1990, 1, 1, tzinfo=UTC)
+    leads = [
+        {"id": new_id(), "frn": f"TEST-{marker}-{n}", "company_name": f"Archive {n}",
+         "pipelineStatus": status, "assignedEmployeeId": None, "history": [],
+         "updatedAt": long_ago + timedelta(days=n)}
+        for n, status in enumerate([PipelineStatus.Approved, PipelineStatus.Rejected, PipelineStatus.Rejected])
+    ]
+    locked_id, moved_ids = leads[0]["id"], [lead["id"] for lead in leads[1:]]
+    async with engine.connect() as setup:
+        admin_id = (await setup.execute(select(User.id).where(User.email == "admin@crm.com"))).scalar_one()
+        leads[2]["assignedEmployeeId"] = admin_id
+        await setup.execute(insert(Lead), leads)
+        await setup.commit()
+    try:
+        async with engine.connect() as locker, engine.connect() as archiver:
+            await locker.execute(select(Lead.id).where(Lead.id == locked_id).with_for_update())
+
+            rows = (await archiver.execute(
+                archive_statement(datetime(1991, 1, 1, tzinfo=UTC), batch_size=10)
+            )).all()
+            assert sorted(row.id for row in rows) == sorted(moved_ids)
+            assert {PipelineStatus(row.pipelineStatus) for row in rows} == {PipelineStatus.Rejected}
+
+            ids = [lead["id"] for lead in leads]
+            hot = (await archiver.execute(select(Lead.id).where(Lead.id.in_(ids)))).scalars().all()
+            assert hot == [locked_id]
+            archived = (await archiver.execute(
+                select(LeadArchive.id, LeadArchive.frn, LeadArchive.archivedAt).where(LeadArchive.id.in_(ids))
+            )).all()
+            assert sorted(row.frn for row in archived) == [f"TEST-{marker}-1", f"TEST-{marker}-2"]
+            assert all(row.archivedAt is not None for row in archived)
+            tombstones = (await archiver.execute(
+                select(LeadTombstone.leadId, LeadTombstone.reason, LeadTombstone.previousEmployeeId)
+                .where(LeadTombstone.leadId.in_(ids))
+            )).all()
+            assert sorted(tombstones) == sorted([
+                (moved_ids[0], "archived", None), (moved_ids[1], "archived", admin_id)
+            ])
+
+            # The batch limit applies to the leads that can be moved
+            await archiver.rollback()
+            rows = (await archiver.execute(
+                archive_statement(datetime(1991, 1, 1, tzinfo=UTC), batch_size=1)
+            )).all()
+            assert [row.id for row in rows] == [moved_ids[0]]
+            await archiver.rollback()
+            await locker.rollback()
+    finally:
+        async with engine.connect() as cleanup:
+            await cleanup.execute(delete(Lead).where(Lead.frn.like(f"TEST-{marker}-%")))
+            await cleanup.commit()
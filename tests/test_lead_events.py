@@ -0,0 +1,133 @@
+import asyncio
+import json
+import asyncpg
+import pytest
+from app.api.v1.endpoints.leads import _event_visible_to
+from app.core.config import settings
+from app.core.database import engine
+from app.core.dialects import is_postgresql
+from app.core.events import RESYNC_EVENT, LeadEventBroker, asyncpg_dsn
+from app.crud import lead_events
+from app.crud.lead_changes import CREATED, DELETED, UPDATED, LeadChange
+from app.models.lead import Lead, PipelineStatus
+from app.models.user import Role
+from app.schemas.user import TokenData
+
+EMPLOYEE = TokenData(sub="employee-1", role=Role.EMPLOYEE)
+ADMIN = TokenData(sub="admin-1", role=Role.ADMIN)
+
+def _change(op, old_status=None, new_status=None, old_employee=None, new_employee=None):
+    return LeadChange(op, Lead(id="lead-1"), old_status, new_status, old_employee, new_employee)
+
+def _event(assigned, previous=None):
+    return {"type": "updated", "leadId": "lead-1", "assignedEmployeeId": assigned, "previousEmployeeId": previous}
+
+def test_employees_see_events_for_their_own_and_unassigned_leads():
+    assert _event_visible_to(_event("employee-1"), EMPLOYEE)
+    assert _event_visible_to(_event(None), EMPLOYEE)
+    assert not _event_visible_to(_event("employee-2", previous="employee-3"), EMPLOYEE)
+    # The lead was taken away from them: they need the event to drop it
+    assert _event_visible_to(_event("employee-2", previous="employee-1"), EMPLOYEE)
+    # Claimed by someone else: it leaves the unassigned view
+    assert _event_visible_to(_event("employee-2", previous=None), EMPLOYEE)
+
+def test_admins_and_lead_less_events_reach_everyone():
+    assert _event_visible_to(_event("employee-2", previous="employee-3"), ADMIN)
+    assert _event_visible_to({"type": "bulk", "count": 500}, EMPLOYEE)
+    assert _event_visible_to(RESYNC_EVENT, EMPLOYEE)
+
+def test_lead_event_types_follow_the_change():
+    new, contacted = PipelineStatus.Unassigned, PipelineStatus.Email_Sent
+    cases = [
+        (_change(CREATED, None, new, None, None), "created"),
+        (_change(DELETED, new, None, "employee-1", None), "deleted"),
+        (_change(UPDATED, new, new, None, "employee-1"), "claimed"),
+        (_change(UPDATED, new, new, "employee-1", "employee-2"), "reassigned"),
+        (_change(UPDATED, new, new, "employee-1", None), "reassigned"),
+        (_change(UPDATED, new, contacted, "employee-1", "employee-1"), "status_changed"),
+        (_change(UPDATED, new, new, "employee-1", "employee-1"), "updated"),
+    ]
+    assert [lead_events.lead_event(change)["type"] for change, _ in cases] == [
+        expected for _, expected in cases
+    ]
+
+    event = lead_events.lead_event(_change(UPDATED, new, contacted, None, "employee-1"))
+    assert event == {
+        "type": "claimed",
+        "leadId": "lead-1",
+        "pipelineStatus": "Email_Sent",
+        "previousStatus": "Unassigned",
+        "assignedEmployeeId": "employee-1",
+        "previousEmployeeId": None,
+    }
+
+class FakeConnection:
+    def __init__(self):
+        self.executed = []
+
+    def execute(self, statement, params):
+        self.executed.append(params)
+
+class FakeSession:
+    def __init__(self):
+        self.conn = FakeConnection()
+
+    def connection(self):
+        return self.conn
+
+def _published(monkeypatch, changes):
+    monkeypatch.setattr(lead_events, "is_postgresql", lambda bind: True)
+    session = FakeSession()
+    lead_events._publish_lead_events(session, changes)
+    [params] = session.conn.executed
+    return [json.loads(payload) for payload in params["payloads"]]
+
+def test_large_flushes_collapse_into_one_bulk_event(monkeypatch):
+    limit = lead_events.MAX_EVENTS_PER_FLUSH
+    changes = [_change(CREATED, None, PipelineStatus.Unassigned) for _ in range(limit)]
+    assert len(_published(monkeypatch, changes)) == limit
+
+    changes.append(_change(CREATED, None, PipelineStatus.Unassigned))
+    assert _published(monkeypatch, changes) == [{"type": "bulk", "count": limit + 1}]
+
+@pytest.mark.asyncio
+async def test_slow_subscribers_are_told_to_resync():
+    broker = LeadEventBroker(dsn="postgresql://unused", channel="test", queue_size=2)
+    # Subscribe without LISTEN; only local fan-out is exercised
+    slow, fast = asyncio.Queue(maxsize=2), asyncio.Queue(maxsize=10)
+    broker._subscribers.update({slow, fast})
+
+    for n in range(3):
+        broker.publish_local({"type": "created", "leadId": f"lead-{n}"})
+
+    assert [slow.get_nowait()] == [RESYNC_EVENT] and slow.empty()
+    assert [fast.get_nowait()["leadId"] for _ in range(3)] == ["lead-0", "lead-1", "lead-2"]
+
+    # The overflowing queue keeps receiving events after the resync
+    broker.publish_local({"type": "created", "leadId": "lead-3"})
+    assert slow.get_nowait()["leadId"] == "lead-3"
+    broker.unsubscribe(slow)
+    assert broker.subscriber_count == 1
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not is_postgresql(engine), reason="needs LISTEN/NOTIFY")
+async def test_user_updates_tell_other_workers_to_resync(client):
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "admin@crm.com", "password": "admin123456"},
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    me = (await client.get(f"{settings.API_V1_STR}/auth/me", headers=headers)).json()
+
+    # Stands in for another worker's LISTEN connection
+    received: asyncio.Queue = asyncio.Queue()
+    conn = await asyncpg.connect(asyncpg_dsn(settings.DATABASE_URL))
+    try:
+        await conn.add_listener(
+            settings.LEAD_EVENTS_CHANNEL, lambda conn, pid, channel, payload: received.put_nowait(json.loads(payload))
+        )
+        response = await client.put(f"{settings.API_V1_STR}/admin/users/{me['id']}", json={}, headers=headers)
+        assert response.status_code == 200
+        assert await asyncio.wait_for(received.get(), timeout=5) == RESYNC_EVENT
+    finally:
+        await conn.close()
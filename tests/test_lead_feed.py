@@ -0,0 +1,113 @@
+import uuid
+import pytest
+from sqlalchemy import delete
+from app.core.database import async_session_factory, engine
+from app.core.dialects import is_postgresql
+from app.crud.lead import lead_crud
+from app.models.lead import Lead, LeadTombstone
+from app.models.lead_stats import LeadCounter, LeadDailyStat
+from app.models.user import User
+
+def _visible(lead: Lead, employee_id) -> bool:
+    return employee_id is None or lead.assignedEmployeeId in (None, employee_id)
+
+async def _replay(db, since: int, lead_id: str, employee_id, had_lead: bool) -> bool:
+    """
+    Apply the feed after `since` to a replica of `employee_id`'s view
+    (None for admins) and return whether it ends up holding the lead.
+    """
+    leads, tombstones, has_more = await lead_crud.get_changes(
+        db, since=since, limit=1000, employee_id=employee_id
+    )
+    assert not has_more
+    entries = sorted(
+        [(lead.changeSeq, True) for lead in leads if lead.id == lead_id]
+        + [(tombstone.seq, False) for tombstone in tombstones if tombstone.leadId == lead_id]
+    )
+    for _, present in entries:
+        had_lead = present
+    return had_lead
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("before, after, deleted", [
+    ("a", "b", False),
+    ("a", None, False),
+    (None, "b", False),
+    ("a", "a", True),
+])
+async def test_feed_matches_each_partys_view(db_session, before, after, deleted):
+    marker = uuid.uuid4().hex[:8]
+    employees = {
+        name: User(email=f"{marker}-{name}@example.com", name=name, password="x")
+        for name in ("a", "b", "c")
+    }
+    db_session.add_all(employees.values())
+    await db_session.flush()
+    ids = {name: employee.id for name, employee in employees.items()}
+
+    lead = Lead(
+        frn=f"TEST-{marker}", company_name="Feed Test",
+        assignedEmployeeId=ids[before] if before else None,
+    )
+    db_session.add(lead)
+    await db_session.commit()
+    # Each party's replica before the change: admins (None) see everything
+    parties = [None, *ids.values()]
+    held = {party: _visible(lead, party) for party in parties}
+    since = lead.changeSeq
+
+    if deleted:
+        await db_session.delete(lead)
+    else:
+        lead.assignedEmployeeId = ids[after] if after else None
+    await db_session.commit()
+
+    for party in parties:
+        expected = not deleted and _visible(lead, party)
+        replayed = await _replay(db_session, since, lead.id, party, held[party])
+        assert replayed == expected, f"party {party!r}: {before} -> {after}, deleted={deleted}"
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not is_postgresql(engine), reason="needs concurrent transactions")
+async def test_a_write_committed_late_is_not_skipped_by_the_cursor():
+    # Committed rows: the two writers are separate transactions. Each lead
+    # has its own assignee so the writers don't queue on one counter row.
+    marker = uuid.uuid4().hex[:8]
+    async with async_session_factory() as session:
+        employees = [User(email=f"{marker}-{n}@example.com", name=f"Rep {n}", password="x") for n in range(2)]
+        session.add_all(employees)
+        await session.commit()
+        ids = [employee.id for employee in employees]
+    early, late = (
+        Lead(frn=f"TEST-{marker}-{n}", company_name=f"Feed Order {n}", assignedEmployeeId=employee_id)
+        for n, employee_id in enumerate(ids)
+    )
+    async with async_session_factory() as first, async_session_factory() as second, async_session_factory() as reader:
+        try:
+            # The first writer draws its number first and commits last
+            first.add(early)
+            await first.flush()
+            since = early.changeSeq - 1
+            second.add(late)
+            await second.commit()
+
+            leads, _, _ = await lead_crud.get_changes(reader, since=since, limit=1000)
+            assert [lead.id for lead in leads] == [late.id]
+            cursor = max(lead.changeSeq for lead in leads)
+            await reader.commit()
+
+            await first.commit()
+            leads, _, _ = await lead_crud.get_changes(reader, since=cursor, limit=1000)
+            assert [lead.id for lead in leads] == [early.id]
+            assert early.changeSeq > cursor
+        finally:
+            await first.rollback()
+            for lead in (early, late):
+                if (stored := await reader.get(Lead, lead.id)) is not None:
+                    await reader.delete(stored)
+            await reader.flush()
+            await reader.execute(delete(LeadTombstone).where(LeadTombstone.leadId.in_([early.id, late.id])))
+            await reader.execute(delete(LeadCounter).where(LeadCounter.assignedEmployeeId.in_(ids)))
+            await reader.execute(delete(LeadDailyStat).where(LeadDailyStat.assignedEmployeeId.in_(ids)))
+            await reader.execute(delete(User).where(User.id.in_(ids)))
+            await reader.commit()
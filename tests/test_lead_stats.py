@@ -0,0 +1,134 @@
+import asyncio
+import uuid
+from datetime import UTC, date, datetime
+import pytest
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+from app.core import security
+from app.core.config import settings
+from app.core.database import async_session_factory, engine
+from app.core.dialects import is_postgresql
+from app.crud.lead_changes import CREATED, DELETED, UPDATED, LeadChange
+from app.crud.lead_stats import (
+    counter_deltas,
+    daily_stat_deltas,
+    rebuild_lead_counters,
+    rebuild_lead_daily_stats,
+)
+from app.models.lead import Lead, LeadTombstone, PipelineStatus
+from app.models.lead_stats import LeadCounter, LeadDailyStat, UNASSIGNED_KEY
+from app.models.user import User
+
+def test_counter_deltas_follow_lead_lifecycle():
+    lead = Lead(frn="FRN1", company_name="Acme")
+    changes = [
+        LeadChange(CREATED, lead, None, PipelineStatus.Unassigned, None, None),
+        LeadChange(UPDATED, lead, PipelineStatus.Unassigned, PipelineStatus.Unassigned, None, "emp-1"),
+        LeadChange(UPDATED, lead, PipelineStatus.Unassigned, PipelineStatus.Email_Sent, "emp-1", "emp-1"),
+    ]
+    assert counter_deltas(changes) == {(PipelineStatus.Email_Sent, "emp-1"): 1}
+
+def test_counter_deltas_ignore_unrelated_updates_and_count_deletes():
+    lead = Lead(frn="FRN2", company_name="Globex")
+    changes = [
+        LeadChange(UPDATED, lead, PipelineStatus.Testing, PipelineStatus.Testing, "emp-2", "emp-2"),
+        LeadChange(DELETED, lead, PipelineStatus.Rejected, None, None, None),
+    ]
+    assert counter_deltas(changes) == {(PipelineStatus.Rejected, UNASSIGNED_KEY): -1}
+
+def test_daily_stat_deltas_record_creation_transitions_and_claims():
+    lead = Lead(frn="FRN3", company_name="Initech")
+    day = date(2026, 10, 19)
+    changes = [
+        LeadChange(CREATED, lead, None, PipelineStatus.Unassigned, None, None),
+        LeadChange(UPDATED, lead, PipelineStatus.Unassigned, PipelineStatus.Unassigned, None, "emp-1"),
+        LeadChange(UPDATED, lead, PipelineStatus.Unassigned, PipelineStatus.Email_Sent, "emp-1", "emp-1"),
+        LeadChange(UPDATED, lead, PipelineStatus.Email_Sent, PipelineStatus.Email_Sent, "emp-1", "emp-1"),
+        LeadChange(DELETED, lead, PipelineStatus.Email_Sent, None, "emp-1", None),
+    ]
+    assert daily_stat_deltas(changes, day) == {
+        (day, PipelineStatus.Unassigned, UNASSIGNED_KEY): {"created": 1, "entered": 1, "assigned": 0},
+        (day, PipelineStatus.Unassigned, "emp-1"): {"created": 0, "entered": 0, "assigned": 1},
+        (day, PipelineStatus.Email_Sent, "emp-1"): {"created": 0, "entered": 1, "assigned": 0},
+    }
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(is_postgresql(engine), reason="checks the error on other databases")
+async def test_daily_stats_rebuild_refuses_other_databases(db_session):
+    with pytest.raises(RuntimeError, match="needs Postgres, not sqlite"):
+        await rebuild_lead_daily_stats(db_session)
+
+async def _counters(session, keys):
+    rows = await session.execute(
+        select(LeadCounter.assignedEmployeeId, func.sum(LeadCounter.count))
+        .where(LeadCounter.assignedEmployeeId.in_(keys))
+        .group_by(LeadCounter.assignedEmployeeId)
+    )
+    return {key: count for key, count in rows.all() if count}
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not is_postgresql(engine), reason="needs concurrent transactions and row locks")
+async def test_concurrent_claims_keep_counters_exact(client):
+    # Committed rows: each claim runs in its own request transaction
+    marker = uuid.uuid4().hex[:8]
+    async with async_session_factory() as session:
+        employees = [
+            User(email=f"{marker}-{n}@example.com", name=f"Claimer {n}", password="x") for n in range(2)
+        ]
+        lead = Lead(frn=f"TEST-{marker}", company_name="Contested")
+        session.add_all([*employees, lead])
+        await session.commit()
+        ids = [employee.id for employee in employees]
+        unassigned_before = (await _counters(session, [UNASSIGNED_KEY])).get(UNASSIGNED_KEY, 0)
+
+    def headers(employee_id):
+        token = security.create_access_token(
+            employee_id, extra_claims={"role": "EMPLOYEE", "name": "Claimer", "ver": 0}
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    def stall(session, flush_context, instances):
+        # Holds each claim between its read and its write, so both requests
+        # read the lead before either writes unless the read takes a lock
+        await_only(asyncio.sleep(0.2))
+
+    url = f"{settings.API_V1_STR}/leads/claim"
+    event.listen(Session, "before_flush", stall)
+    try:
+        try:
+            responses = await asyncio.gather(*(
+                client.post(url, params={"lead_id": lead.id}, headers=headers(employee_id))
+                for employee_id in ids
+            ))
+        finally:
+            event.remove(Session, "before_flush", stall)
+        assert sorted(response.status_code for response in responses) == [200, 400]
+        winner = next(response.json() for response in responses if response.status_code == 200)
+
+        async with engine.connect() as conn:
+            outer = await conn.begin()
+            async with AsyncSession(bind=conn, join_transaction_mode="create_savepoint") as session:
+                counted = await _counters(session, ids)
+                unassigned_after = (await _counters(session, [UNASSIGNED_KEY])).get(UNASSIGNED_KEY, 0)
+                await rebuild_lead_counters(session)
+                rebuilt = await _counters(session, ids)
+                assigned_today = await session.scalar(
+                    select(func.sum(LeadDailyStat.assigned))
+                    .where(LeadDailyStat.assignedEmployeeId.in_(ids), LeadDailyStat.day == datetime.now(UTC).date())
+                )
+            await outer.rollback()
+
+        assert counted == rebuilt == {winner["assignedEmployeeId"]: 1}
+        assert unassigned_after == unassigned_before - 1
+        assert assigned_today == 1
+    finally:
+        async with async_session_factory() as session:
+            await session.delete(await session.get(Lead, lead.id))
+            await session.flush()
+            await session.execute(delete(LeadTombstone).where(LeadTombstone.leadId == lead.id))
+            await session.execute(delete(LeadCounter).where(LeadCounter.assignedEmployeeId.in_(ids)))
+            await session.execute(delete(LeadDailyStat).where(LeadDailyStat.assignedEmployeeId.in_(ids)))
+            await session.execute(delete(User).where(User.id.in_(ids)))
+            await session.commit()
@@ -1,6 +1,7 @@
 import pytest
 from httpx import AsyncClient, ASGITransport
-from app.main import app
+from app.main import app, create_app
+from app.core.database import engine as app_engine
 from app.core.config import settings
 
 @pytest.mark.asyncio
@@ -16,3 +17,13 @@ async def test_health_check():
         response = await ac.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "healthy"}
+
+@pytest.mark.asyncio
+async def test_lifespan_warms_pool_and_disposes_engine():
+    fresh = create_app()
+    await app_engine.dispose()  # start cold: earlier tests share the engine
+    async with fresh.router.lifespan_context(fresh):
+        assert app_engine.pool.checkedin() == min(settings.DB_WARMUP_CONNECTIONS, settings.DB_POOL_SIZE)
+        async with AsyncClient(transport=ASGITransport(app=fresh), base_url="http://test") as ac:
+            assert (await ac.get("/health")).status_code == 200
+    assert app_engine.pool.checkedin() == 0
@@ -0,0 +1,68 @@
+import time
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.core import security
+from app.core.config import settings
+from app.core.database import PoolStats, engine, get_pool_status, instrumented_pool
+from app.core.token_versions import token_versions
+
+@pytest.mark.asyncio
+async def test_pool_status_counts_checkouts_on_the_shared_engine():
+    before = get_pool_status()
+    async with engine.connect(), engine.connect():
+        during = get_pool_status()
+        assert during["checkedOut"] == before["checkedOut"] + 2
+        assert during["checkouts"] == before["checkouts"] + 2
+    after = get_pool_status()
+
+    assert after["checkedOut"] == before["checkedOut"]
+    assert after["checkedIn"] >= 2
+    assert after["checkouts"] == before["checkouts"] + 2
+    assert after["timeouts"] == before["timeouts"]
+    assert after["waitSecondsTotal"] >= before["waitSecondsTotal"]
+    assert after["waitSecondsMax"] >= before["waitSecondsMax"]
+    assert after["waitSecondsAvg"] == pytest.approx(after["waitSecondsTotal"] / after["checkouts"], abs=1e-6)
+
+@pytest.mark.asyncio
+async def test_checkouts_that_time_out_are_counted_with_their_wait():
+    stats = PoolStats()
+    small = create_async_engine(
+        engine.url, poolclass=instrumented_pool(stats), pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    try:
+        async with small.connect():
+            with pytest.raises(exc.TimeoutError):
+                async with small.connect():
+                    pass
+            status = get_pool_status(small)
+            assert (status["checkedOut"], status["size"], status["overflow"]) == (1, 1, 0)
+    finally:
+        await small.dispose()
+
+    assert (stats.checkouts, stats.timeouts) == (2, 1)
+    assert stats.wait_seconds_max >= 0.05
+    assert stats.wait_seconds_total >= stats.wait_seconds_max
+
+@pytest.mark.asyncio
+async def test_pool_endpoint_is_admin_only(client, monkeypatch):
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "admin@crm.com", "password": "admin123456"},
+    )
+    admin = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    response = await client.get(f"{settings.API_V1_STR}/admin/db/pool", headers=admin)
+    assert response.status_code == 200
+    primary = response.json()["primary"]
+    assert primary["checkouts"] >= 1
+    assert {"checkedOut", "checkedIn", "overflow", "timeouts", "waitSecondsMax"} <= primary.keys()
+
+    monkeypatch.setattr(token_versions, "_versions", {"employee-1": 0})
+    monkeypatch.setattr(token_versions, "_loaded_at", time.monotonic())
+    token = security.create_access_token(
+        "employee-1", extra_claims={"role": "EMPLOYEE", "name": "Rep", "ver": 0}
+    )
+    response = await client.get(
+        f"{settings.API_V1_STR}/admin/db/pool", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
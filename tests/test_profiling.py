@@ -0,0 +1,70 @@
+import asyncio
+import json
+import pstats
+import pytest
+from httpx import ASGITransport, AsyncClient
+from app.core.profiling import ProfileStore, ProfilingMiddleware, TaskSampler
+
+async def _slow_handler():
+    await asyncio.sleep(0.05)
+
+@pytest.mark.asyncio
+async def test_sampler_attributes_await_time():
+    task = asyncio.current_task()
+    sampler = TaskSampler(task, interval=0.002)
+    sampler.start()
+    await _slow_handler()
+    sampler.stop()
+
+    profile = sampler.speedscope("test")
+    frames = [frame["name"] for frame in profile["shared"]["frames"]]
+    assert any(name.endswith("_slow_handler") for name in frames)
+    # Time spent suspended in the sleep is sampled, not lost
+    assert any(name.startswith("<await") for name in frames)
+    assert profile["profiles"][0]["samples"]
+    assert len(profile["profiles"][0]["samples"]) == len(profile["profiles"][0]["weights"])
+
+def test_store_keeps_only_newest_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = [f"170000000000{i}-0000000{i}" for i in range(3)]
+    for profile_id in ids:
+        store.save(profile_id, {"mode": "sampling"}, b"{}")
+    assert [p["id"] for p in store.list()] == [ids[2], ids[1]]
+    assert store.path(ids[0]) is None
+    assert store.path(ids[2]).name.endswith(".speedscope.json")
+    assert store.path("../etc/passwd") is None
+
+async def _app(scope, receive, send):
+    await asyncio.sleep(0.01)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+def _middleware(tmp_path, admin: bool) -> ProfilingMiddleware:
+    async def authorize(authorization):
+        return admin and authorization == "Bearer admin"
+    return ProfilingMiddleware(
+        _app, authorize=authorize, store=ProfileStore(str(tmp_path), 10),
+        sample_percent=0, default_mode="sampling", interval=0.002,
+    )
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["sampling", "cprofile"])
+async def test_admin_header_profiles_request(tmp_path, mode):
+    app = _middleware(tmp_path, admin=True)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/leads", headers={"X-Profile": mode, "Authorization": "Bearer admin"})
+    profile_id = response.headers["x-profile-id"]
+    path = app.store.path(profile_id)
+    if mode == "cprofile":
+        assert pstats.Stats(str(path)).total_calls > 0
+    else:
+        assert json.loads(path.read_text())["profiles"][0]["type"] == "sampled"
+    assert app.store.list()[0]["path"] == "/leads"
+
+@pytest.mark.asyncio
+async def test_header_ignored_for_non_admins(tmp_path):
+    app = _middleware(tmp_path, admin=False)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/leads", headers={"X-Profile": "1", "Authorization": "Bearer user"})
+    assert "x-profile-id" not in response.headers
+    assert app.store.list() == []
@@ -0,0 +1,38 @@
+import uuid
+from typing import List
+import pytest
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from app.crud.projections import lead_export_query, lead_responses, lead_rows, lead_rows_query, user_rows
+from app.models.lead import Lead, PipelineStatus
+from app.models.user import User
+from app.schemas.lead import LeadResponse
+
+_lead_list = TypeAdapter(List[LeadResponse])
+
+@pytest.mark.asyncio
+async def test_lead_rows_serialize_like_orm_leads(db_session):
+    marker = uuid.uuid4().hex[:8]
+    employee = User(email=f"{marker}@example.com", name="Row Test", password="x")
+    db_session.add(employee)
+    await db_session.flush()
+    db_session.add_all([
+        Lead(frn=f"TEST-{marker}-1", company_name="Assigned", assignedEmployeeId=employee.id,
+             pipelineStatus=PipelineStatus.Email_Sent, history=["claimed"]),
+        Lead(frn=f"TEST-{marker}-2", company_name="Unassigned", contact_email="a@b.co"),
+    ])
+    await db_session.commit()
+    db_session.expunge_all()
+
+    mine = Lead.frn.like(f"TEST-{marker}-%")
+    orm = (await db_session.execute(select(Lead).where(mine).order_by(Lead.frn))).scalars().all()
+    rows = await lead_rows(db_session, lead_rows_query(Lead).where(mine).order_by(Lead.frn))
+    assert rows[0].assigned_employee.email == employee.email
+    assert rows[1].assigned_employee is None
+    expected = _lead_list.dump_json(_lead_list.validate_python(orm, from_attributes=True))
+    assert _lead_list.dump_json(lead_responses(rows)) == expected
+    assert _lead_list.dump_json(_lead_list.validate_python(rows, from_attributes=True)) == expected
+
+    exported = (await db_session.execute(lead_export_query(Lead).where(mine).order_by(Lead.frn))).all()
+    assert [(row.company_name, row.archivedAt) for row in exported] == [("Assigned", None), ("Unassigned", None)]
+    assert employee.id in {user.id for user in await user_rows(db_session, limit=1000)}
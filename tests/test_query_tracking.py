@@ -0,0 +1,50 @@
+import logging
+import pytest
+from app.core.config import settings
+from app.core.query_tracking import QueryStats, redact_parameters, track_queries
+
+def test_redact_parameters_keeps_only_types():
+    assert redact_parameters(("jane@example.com", 42, None)) == ["<str>", "<int>", None]
+    assert redact_parameters({"frn": "123"}) == {"frn": "<str>"}
+    assert redact_parameters(list(range(50))) == "<50 items>"
+
+def test_repeated_fingerprints_flag_n_plus_one():
+    stats = QueryStats()
+    for _ in range(12):
+        stats.record("lazy-load", 0.001)
+    stats.record("list", 0.002)
+    assert stats.count == 13
+    assert stats.repeated(10) == [("lazy-load", 12)]
+
+def test_nested_trackers_both_count():
+    with track_queries() as outer:
+        outer.record("a", 0.0)
+        with track_queries() as inner:
+            pass
+    assert outer.count == 1 and inner.count == 0
+
+async def _admin_headers(client) -> dict:
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "admin@crm.com", "password": "admin123456"},
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.mark.asyncio
+async def test_read_leads_query_budget(client, assert_max_queries, caplog):
+    headers = await _admin_headers(client)
+    # Principal check, lead page and one batched employee load, however many
+    # leads are assigned
+    with caplog.at_level(logging.WARNING, logger="app.core.query_tracking"):
+        with assert_max_queries(4):
+            response = await client.get(f"{settings.API_V1_STR}/leads/?limit=100", headers=headers)
+    assert response.status_code == 200
+    assert "Possible N+1" not in caplog.text
+    assert response.headers["server-timing"].startswith("db;dur=")
+
+@pytest.mark.asyncio
+async def test_metrics_query_budget(client, assert_max_queries):
+    headers = await _admin_headers(client)
+    with assert_max_queries(2):
+        response = await client.get(f"{settings.API_V1_STR}/admin/metrics", headers=headers)
+    assert response.status_code == 200
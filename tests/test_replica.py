@@ -0,0 +1,227 @@
+from types import SimpleNamespace
+import pytest
+from app.core import replica
+from app.core.replica import ReadYourWritesMiddleware, ReplicaRouter
+
+PRIMARY, REPLICA = object(), object()
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return 1_700_000_000.0 + self.now
+
+class FakeResult:
+    def __init__(self, lag):
+        self.lag = lag
+
+    def scalar_one(self):
+        return self.lag
+
+class FakeReplica:
+    """
+    Stands in for the replica engine: `lag` is what the health check reads,
+    and `down` makes connecting fail.
+    """
+
+    def __init__(self, lag: float = 0.0):
+        self.lag = lag
+        self.down = False
+        self.checks = 0
+
+    def connect(self):
+        return self
+
+    async def __aenter__(self):
+        if self.down:
+            raise OSError("connection refused")
+        self.checks += 1
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        return FakeResult(self.lag)
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(replica, "time", clock)
+    return clock
+
+@pytest.fixture
+def router(monkeypatch, clock):
+    monkeypatch.setattr(replica, "async_session_factory", PRIMARY)
+    monkeypatch.setattr(replica, "replica_session_factory", REPLICA)
+    router = ReplicaRouter(None, max_lag=5.0, check_interval=10.0, retry_after=30.0, read_your_writes=2.0)
+    router.replica = FakeReplica()
+    return router
+
+def _cookie_value(set_cookie: str) -> str:
+    name, _, rest = set_cookie.partition("=")
+    assert name == replica.STICKY_COOKIE
+    return rest.split(";")[0]
+
+@pytest.mark.asyncio
+async def test_reads_use_the_replica_until_it_lags(router, clock):
+    assert await router.session_factory() is REPLICA
+    assert router.lag == 0.0
+
+    router.replica.lag = 12.0
+    # The last check is cached for check_interval
+    assert await router.session_factory() is REPLICA
+    assert router.replica.checks == 1
+
+    clock.now += 11
+    assert await router.session_factory() is PRIMARY
+    assert router.lag == 12.0
+
+    router.replica.lag = 1.0
+    clock.now += 11
+    assert await router.session_factory() is REPLICA
+
+@pytest.mark.asyncio
+async def test_a_failed_replica_is_retried_after_retry_after(router, clock):
+    router.replica.down = True
+    assert await router.session_factory() is PRIMARY
+
+    router.replica.down = False
+    clock.now += 20  # past check_interval, within retry_after
+    assert await router.session_factory() is PRIMARY
+    assert router.replica.checks == 0
+
+    clock.now += 11
+    assert await router.session_factory() is REPLICA
+
+@pytest.mark.asyncio
+async def test_disconnects_mark_the_replica_down(router, clock):
+    assert await router.session_factory() is REPLICA
+    router._on_replica_error(SimpleNamespace(is_disconnect=False))
+    assert await router.session_factory() is REPLICA
+
+    router._on_replica_error(SimpleNamespace(is_disconnect=True))
+    assert await router.session_factory() is PRIMARY
+    clock.now += 31
+    assert await router.session_factory() is REPLICA
+
+@pytest.mark.asyncio
+async def test_writers_read_from_the_primary_for_a_while(router, clock):
+    router.record_write("Bearer writer")
+    assert await router.session_factory("Bearer writer") is PRIMARY
+    assert await router.session_factory("Bearer other") is REPLICA
+    assert await router.session_factory(None) is REPLICA
+
+    clock.now += 3
+    assert await router.session_factory("Bearer writer") is REPLICA
+
+@pytest.mark.asyncio
+async def test_get_read_db_opens_a_session_from_the_routed_factory(monkeypatch, router):
+    opened = []
+
+    class FakeSession:
+        def __init__(self, name):
+            self.name = name
+            self.closed = False
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def close(self):
+            self.closed = True
+
+    def factory(name):
+        def make():
+            opened.append(FakeSession(name))
+            return opened[-1]
+        return make
+
+    monkeypatch.setattr(replica, "async_session_factory", factory("primary"))
+    monkeypatch.setattr(replica, "replica_session_factory", factory("replica"))
+    monkeypatch.setattr(replica, "replica_router", router)
+    router.record_write("Bearer writer")
+
+    primary_until = _cookie_value(router.sticky_cookie())
+    for authorization, cookies, expected in (
+        ("Bearer writer", {}, "primary"),
+        ("Bearer reader", {}, "replica"),
+        ("Bearer reader", {replica.STICKY_COOKIE: primary_until}, "primary"),
+    ):
+        request = SimpleNamespace(headers={"authorization": authorization}, cookies=cookies)
+        dependency = replica.get_read_db(request)
+        session = await anext(dependency)
+        assert session.name == expected
+        await dependency.aclose()
+        assert session.closed
+
+async def _request(middleware, method, status, authorization="Bearer token", path="/api/v1/leads/"):
+    """
+    Run a request through the middleware; returns the response's cookies.
+    """
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": status, "headers": []})
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"authorization", authorization.encode())] if authorization else []
+    scope = {"type": "http", "method": method, "path": path, "headers": headers}
+    await middleware(app)(scope, None, send)
+    return [value.decode() for name, value in sent[0]["headers"] if name == b"set-cookie"]
+
+@pytest.mark.asyncio
+async def test_middleware_records_only_successful_unsafe_requests(router):
+    def middleware(app):
+        return ReadYourWritesMiddleware(app, router=router)
+
+    await _request(middleware, "GET", 200)
+    await _request(middleware, "POST", 422)
+    await _request(middleware, "DELETE", 404)
+    await _request(middleware, "POST", 201, authorization=None)
+    assert not router.is_sticky("Bearer token")
+
+    await _request(middleware, "PUT", 200)
+    assert router.is_sticky("Bearer token")
+
+@pytest.mark.asyncio
+async def test_middleware_leaves_excluded_paths_to_record_their_own_writes(router):
+    def middleware(app):
+        return ReadYourWritesMiddleware(app, router=router, exclude_paths=["/api/v1/batch"])
+
+    await _request(middleware, "POST", 200, path="/api/v1/batch")
+    assert not router.is_sticky("Bearer token")
+    await _request(middleware, "POST", 200, path="/api/v1/leads/")
+    assert router.is_sticky("Bearer token")
+
+@pytest.mark.asyncio
+async def test_the_write_cookie_keeps_reads_on_the_primary_in_other_workers(router, clock):
+    def middleware(app):
+        return ReadYourWritesMiddleware(app, router=router)
+
+    assert await _request(middleware, "GET", 200) == []
+    assert await _request(middleware, "POST", 422) == []
+    [set_cookie] = await _request(middleware, "POST", 201)
+    assert "Max-Age=2" in set_cookie
+    primary_until = _cookie_value(set_cookie)
+
+    # Another worker: same settings, but it has not seen the write
+    other = ReplicaRouter(None, max_lag=5.0, check_interval=10.0, retry_after=30.0, read_your_writes=2.0)
+    other.replica = FakeReplica()
+    assert await other.session_factory("Bearer token") is REPLICA
+    assert await other.session_factory("Bearer token", primary_until) is PRIMARY
+    assert await other.session_factory(None, primary_until) is PRIMARY
+
+    # Expired, malformed or further out than a write grants: ignored
+    assert await other.session_factory(None, "not-a-time") is REPLICA
+    assert await other.session_factory(None, str(clock.time() + 3600)) is REPLICA
+    clock.now += 3
+    assert await other.session_factory(None, primary_until) is REPLICA
@@ -0,0 +1,167 @@
+import asyncio
+import uuid
+import pytest
+from app.api.v1.endpoints.leads import read_leads
+from app.core.cache import HIT, MISS
+from app.core.config import settings
+from app.core.events import lead_events
+from app.core.response_cache import (
+    ALL_LEADS_SCOPE,
+    GLOBAL_SCOPE,
+    UNASSIGNED_SCOPE,
+    LocalBackend,
+    ResponseCache,
+    SharedBackend,
+    bypass_response_cache,
+    employee_scope,
+    lead_list_cache,
+)
+from app.crud.lead_cache import follow_lead_events, scopes_for_event, scopes_touched
+from app.models.lead import Lead
+from app.models.user import Role
+from app.schemas.user import TokenData
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+def _loader(body: bytes):
+    calls = []
+
+    async def load():
+        calls.append(1)
+        return body
+    return load, calls
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", [LocalBackend(100, 10_000), SharedBackend(FakeRedis())])
+async def test_bumping_a_scope_invalidates_only_its_entries(backend):
+    cache = ResponseCache("leads", backend, ttl=60)
+    alice = [employee_scope("alice"), UNASSIGNED_SCOPE]
+    bob = [employee_scope("bob"), UNASSIGNED_SCOPE]
+    load, calls = _loader(b"[]")
+    assert (await cache.get(alice, {"skip": 0}, load)).status == MISS
+    assert (await cache.get(alice, {"skip": 0}, load)).status == HIT
+    assert (await cache.get(bob, {"skip": 0}, load)).status == MISS
+
+    await cache.invalidate([employee_scope("bob")])
+    assert (await cache.get(alice, {"skip": 0}, load)).status == HIT
+    assert (await cache.get(bob, {"skip": 0}, load)).status == MISS
+
+    await cache.invalidate([UNASSIGNED_SCOPE])
+    assert (await cache.get(alice, {"skip": 0}, load)).status == MISS
+    assert len(calls) == 4
+    assert cache.stats()["hitRatio"] == 0.3333
+
+@pytest.mark.asyncio
+async def test_local_backend_evicts_least_recently_used_within_byte_bound():
+    backend = LocalBackend(max_entries=100, max_bytes=10)
+    await backend.set("a", b"1234", ttl=60)
+    await backend.set("b", b"1234", ttl=60)
+    await backend.get("a")
+    await backend.set("c", b"1234", ttl=60)
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1234"
+    assert backend.stats()["bytes"] == 8
+    assert backend.stats()["evictions"] == 1
+
+def test_write_scopes_cover_old_and_new_assignee():
+    assert scopes_touched([None, "alice"]) == {ALL_LEADS_SCOPE, UNASSIGNED_SCOPE, employee_scope("alice")}
+    event = {"leadId": "1", "assignedEmployeeId": "bob", "previousEmployeeId": "alice"}
+    assert scopes_for_event(event) == {ALL_LEADS_SCOPE, employee_scope("alice"), employee_scope("bob")}
+    assert scopes_for_event({"type": "bulk", "count": 500}) == {"global"}
+
+@pytest.mark.asyncio
+async def test_lead_event_follower_retries_subscribing_and_then_bumps_global(monkeypatch):
+    queue = asyncio.Queue()
+    attempts, delays = [], []
+    sleep = asyncio.sleep
+
+    async def subscribe():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("connection refused")
+        return queue
+
+    async def no_wait(delay):
+        delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(lead_events, "subscribe", subscribe)
+    monkeypatch.setattr(asyncio, "sleep", no_wait)
+    scopes = [GLOBAL_SCOPE, employee_scope("alice")]
+    before = await lead_list_cache.backend.generations(scopes)
+    follower = asyncio.create_task(follow_lead_events())
+    try:
+        for _ in range(100):
+            await sleep(0)
+        after_subscribe = await lead_list_cache.backend.generations(scopes)
+        queue.put_nowait({"type": "claimed", "leadId": "lead-1", "assignedEmployeeId": "alice"})
+        for _ in range(100):
+            await sleep(0)
+        after_event = await lead_list_cache.backend.generations(scopes)
+    finally:
+        follower.cancel()
+
+    assert len(attempts) == 3 and delays == [0.5, 1.0]
+    assert after_subscribe[0] > before[0] and after_subscribe[1] == before[1]
+    assert after_event[1] > after_subscribe[1]
+
+@pytest.mark.asyncio
+async def test_committed_lead_write_bumps_generations(db_session):
+    scopes = [ALL_LEADS_SCOPE, UNASSIGNED_SCOPE]
+    before = await lead_list_cache.backend.generations(scopes)
+    db_session.add(Lead(frn=f"TEST-{uuid.uuid4()}", company_name="Cache Test"))
+    await db_session.commit()
+    after = await lead_list_cache.backend.generations(scopes)
+    assert all(new > old for old, new in zip(before, after))
+
+@pytest.mark.asyncio
+async def test_repeated_lead_list_is_served_from_cache(client):
+    response = await client.post(
+        f"{settings.API_V1_STR}/auth/login",
+        data={"username": "admin@crm.com", "password": "admin123456"},
+    )
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    url = f"{settings.API_V1_STR}/leads/?limit=7&search=cache-{uuid.uuid4()}"
+    first = await client.get(url, headers=headers)
+    second = await client.get(url, headers=headers)
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == (MISS, HIT)
+    assert first.content == second.content
+
+@pytest.mark.asyncio
+async def test_direct_endpoint_calls_can_bypass_the_cache(db_session, assert_max_queries):
+    admin = TokenData(sub=str(uuid.uuid4()), role=Role.ADMIN, name="Direct", ver=0)
+    frn = f"TEST-{uuid.uuid4()}"
+
+    async def read():
+        return await read_leads(
+            db=db_session, skip=0, limit=5, current_user=admin, status=None,
+            search=frn, assigned_to=None, include_archived=False,
+        )
+
+    stats = lead_list_cache.stats()
+    with bypass_response_cache():
+        assert b"Bypass Test" not in (await read()).body
+        db_session.add(Lead(frn=frn, company_name="Bypass Test"))
+        await db_session.flush()
+        with assert_max_queries(1) as queries:
+            response = await read()
+    assert queries.count == 1
+    assert b"Bypass Test" in response.body
+    assert "x-cache" not in response.headers
+    assert (lead_list_cache.hits, lead_list_cache.misses) == (stats["hits"], stats["misses"])
+    assert "x-cache" in (await read()).headers
@@ -0,0 +1,70 @@
+import asyncio
+import time
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+from app.api import deps
+from app.core import security
+from app.core.security import PasswordHasherBusy, PasswordHasherPool
+from app.models.user import Role
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_loop():
+    hashed = await security.get_password_hash_async("s3cret")
+    assert await security.verify_password_async("s3cret", hashed)
+    assert not await security.verify_password_async("wrong", hashed)
+
+@pytest.mark.asyncio
+async def test_rehash_on_outdated_parameters():
+    old_context = CryptContext(schemes=["argon2"], argon2__time_cost=1, argon2__memory_cost=1024)
+    old_hash = old_context.hash("s3cret")
+    valid, new_hash = await security.verify_and_update_password("s3cret", old_hash)
+    assert valid
+    assert new_hash is not None
+    assert security.verify_password("s3cret", new_hash)
+
+@pytest.mark.asyncio
+async def test_pool_rejects_when_saturated():
+    pool = PasswordHasherPool(max_workers=1, max_pending=1)
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def blocking():
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+        return True
+
+    first = asyncio.create_task(pool.run(blocking))
+    await asyncio.sleep(0)
+    with pytest.raises(PasswordHasherBusy):
+        await pool.run(lambda: True)
+    release.set()
+    assert await first
+    pool.shutdown()
+
+@pytest.fixture
+def fresh_token_versions(monkeypatch):
+    from app.core.token_versions import token_versions
+    monkeypatch.setattr(token_versions, "_versions", {})
+    monkeypatch.setattr(token_versions, "_loaded_at", time.monotonic())
+    return token_versions
+
+def _token(ver: int, role: str = "EMPLOYEE") -> str:
+    return security.create_access_token(
+        "user-1", extra_claims={"role": role, "name": "Rep", "ver": ver}
+    )
+
+@pytest.mark.asyncio
+async def test_principal_from_claims(fresh_token_versions):
+    fresh_token_versions.set("user-1", 2)
+    principal = await deps.get_current_principal(token=_token(2, role="ADMIN"))
+    assert principal.id == "user-1"
+    assert principal.role == Role.ADMIN
+    assert principal.name == "Rep"
+    assert await deps.get_current_admin(current_user=principal) is principal
+
+@pytest.mark.asyncio
+async def test_revoked_token_version_rejected(fresh_token_versions):
+    fresh_token_versions.set("user-1", 3)
+    with pytest.raises(HTTPException) as exc_info:
+        await deps.get_current_principal(token=_token(2))
+    assert exc_info.value.status_code == 403
@@ -0,0 +1,186 @@
+import http.client
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict, Tuple
+import pytest
+from app.server import split_connection_budget
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_budget_is_split_across_workers_plus_a_spare():
+    # 100 // (4 + 1) = 20 per worker, minus the LISTEN connection
+    assert split_connection_budget(100, 4, pool_size=5, max_overflow=10) == (5, 10)
+    assert split_connection_budget(40, 4, pool_size=5, max_overflow=10) == (5, 2)
+    assert split_connection_budget(15, 4, pool_size=5, max_overflow=10) == (2, 0)
+
+def test_budget_too_small_is_rejected():
+    with pytest.raises(ValueError):
+        split_connection_budget(8, 4, pool_size=5, max_overflow=10)
+
+async def worker_app(scope, receive, send):
+    """
+    The app the supervised workers run: answers "<WORKER_ID> <pid>", and
+    fails its startup when WORKER_APP_FAIL_STARTUP is set.
+    """
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if os.environ.get("WORKER_APP_FAIL_STARTUP"):
+                    await send({"type": "lifespan.startup.failed", "message": "configured to fail"})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+    body = f"{os.environ['WORKER_ID']} {os.getpid()}".encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+    await send({"type": "http.response.body", "body": body})
+
+# The supervisor installs signal handlers, so it runs in a process of its own
+_RUN_SUPERVISOR = """
+import logging, sys
+from uvicorn.config import Config
+from app.server import Supervisor
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+config = Config("tests.test_server:worker_app", port=int(sys.argv[1]), log_level="warning")
+Supervisor(config, workers=int(sys.argv[2])).run()
+"""
+
+class SupervisorProcess:
+    def __init__(self, workers: int, **env: str):
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", _RUN_SUPERVISOR, str(self.port), str(workers)],
+            cwd=ROOT, env={**os.environ, **env}, stderr=subprocess.PIPE, text=True,
+        )
+        self.log = []
+        self.reader = threading.Thread(target=self._read_log, daemon=True)
+        self.reader.start()
+
+    def _read_log(self) -> None:
+        for line in self.process.stderr:
+            self.log.append(line.rstrip())
+
+    def workers(self) -> Dict[int, int]:
+        """
+        The latest pid started in each slot.
+        """
+        started = {}
+        for line in list(self.log):
+            if match := re.search(r"Started worker (\d+) \[(\d+)\]", line):
+                started[int(match[1])] = int(match[2])
+        return started
+
+    def get(self) -> Tuple[int, int]:
+        """
+        One request on a new connection; returns the (WORKER_ID, pid) that served it.
+        """
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=10)
+        try:
+            conn.request("GET", "/")
+            response = conn.getresponse()
+            assert response.status == 200
+            worker_id, pid = response.read().decode().split()
+        finally:
+            conn.close()
+        return int(worker_id), int(pid)
+
+    def wait(self, timeout: float) -> int:
+        """
+        Wait for the supervisor to exit and its log to be read; returns its exit code.
+        """
+        code = self.process.wait(timeout=timeout)
+        self.reader.join(timeout)
+        return code
+
+    def stop(self) -> None:
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+def _wait_until(condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if result := condition():
+                return result
+        except OSError:
+            pass
+        time.sleep(0.1)
+    raise AssertionError(f"timed out waiting for {condition}")
+
+def _exited(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    return False
+
+@pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="needs POSIX signals")
+def test_sighup_replaces_each_worker_in_its_slot_without_failing_requests():
+    supervisor = SupervisorProcess(workers=2)
+    try:
+        before = _wait_until(lambda: len(supervisor.workers()) == 2 and supervisor.workers())
+        _wait_until(supervisor.get)
+
+        served, failures = [], []
+        stop = threading.Event()
+
+        def traffic():
+            while not stop.is_set():
+                try:
+                    served.append(supervisor.get())
+                except Exception as exc:
+                    failures.append(exc)
+
+        thread = threading.Thread(target=traffic)
+        thread.start()
+        try:
+            supervisor.process.send_signal(signal.SIGHUP)
+            after = _wait_until(lambda: (
+                (workers := supervisor.workers())
+                and all(workers[slot] != before[slot] for slot in before)
+                and workers
+            ))
+            # Each old worker is terminated once its replacement is ready
+            _wait_until(lambda: all(_exited(pid) for pid in before.values()))
+        finally:
+            stop.set()
+            thread.join()
+
+        assert failures == []
+        assert served
+        assert sorted(after) == [0, 1]
+        assert set(after.values()).isdisjoint(before.values())
+        # Replacements keep their slot's WORKER_ID
+        for worker_id, pid in served:
+            assert pid in (before[worker_id], after[worker_id])
+        for _ in range(10):
+            worker_id, pid = supervisor.get()
+            assert after[worker_id] == pid
+
+        supervisor.process.send_signal(signal.SIGTERM)
+        assert supervisor.wait(timeout=30) == 0
+        assert all(_exited(pid) for pid in after.values())
+    finally:
+        supervisor.stop()
+
+@pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="needs POSIX signals")
+def test_workers_that_cannot_start_shut_the_supervisor_down():
+    supervisor = SupervisorProcess(workers=2, WORKER_APP_FAIL_STARTUP="1")
+    try:
+        # Not restarted over and over: the supervisor gives up
+        assert supervisor.wait(timeout=30) == 0
+        assert any("failed to start, shutting down" in line for line in supervisor.log)
+        assert sum("Started worker" in line for line in supervisor.log) == 2
+    finally:
+        supervisor.stop()
@@ -0,0 +1,81 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from app.core.telemetry import (
+    Registry,
+    TelemetryMiddleware,
+    fingerprint,
+    http_duration,
+    http_requests,
+    normalize_statement,
+)
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, ("/leads",))
+
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{route="/leads",le="0.1"} 2' in text
+    assert 'latency_seconds_bucket{route="/leads",le="1"} 3' in text
+    assert 'latency_seconds_bucket{route="/leads",le="+Inf"} 4' in text
+    assert 'latency_seconds_count{route="/leads"} 4' in text
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("statements_total", "Statements", ("sql",)).inc(('SELECT "a"\nFROM b',))
+    assert 'statements_total{sql="SELECT \\"a\\"\\nFROM b"} 1' in registry.render()
+
+def test_fingerprint_ignores_literals_and_batch_sizes():
+    one = 'SELECT "Lead".id FROM "Lead" WHERE "Lead".frn = $1::VARCHAR LIMIT 50'
+    other = 'SELECT "Lead".id FROM "Lead" WHERE "Lead".frn = $1::VARCHAR LIMIT 10'
+    assert fingerprint(one) == fingerprint(other)
+    assert fingerprint(one)[0] == "SELECT"
+
+    assert normalize_statement("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4)") == \
+        normalize_statement("INSERT INTO t (a, b) VALUES ($1, $2), ($3, $4), ($5, $6)")
+    assert normalize_statement("SELECT 1 FROM t WHERE id IN ($1, $2, $3)") == "SELECT ? FROM t WHERE id IN (...)"
+
+@pytest.mark.asyncio
+async def test_middleware_labels_requests_by_route_template(client: AsyncClient):
+    labels = ("GET", "/api/v1/leads/{lead_id}")
+    before = http_duration.count(labels)
+    # Unauthenticated, so 401 without touching the database
+    await client.get("/api/v1/leads/abc")
+    await client.get("/api/v1/leads/def")
+    assert http_duration.count(labels) == before + 2
+    assert http_requests.value((*labels, "401")) >= 2
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'route="/api/v1/leads/{lead_id}"' in response.text
+    assert "crm_db_pool_checkouts_total" in response.text
+
+@pytest.mark.asyncio
+async def test_unmatched_paths_share_one_label():
+    async def not_found(scope, receive, send):
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b"missing"})
+
+    app = TelemetryMiddleware(not_found)
+    before = http_requests.value(("GET", "<unmatched>", "404"))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        await ac.get("/random/1")
+        await ac.get("/random/2")
+    assert http_requests.value(("GET", "<unmatched>", "404")) == before + 2
+
+def test_fingerprint_collapses_typed_in_lists():
+    two = 'SELECT "User".id FROM "User" WHERE "User".id IN ($1::VARCHAR, $2::VARCHAR)'
+    three = 'SELECT "User".id FROM "User" WHERE "User".id IN ($1::VARCHAR, $2::VARCHAR, $3::VARCHAR)'
+    assert fingerprint(two) == fingerprint(three)
+
+def test_const_labels_are_added_to_every_sample():
+    registry = Registry({"worker": "3"})
+    registry.counter("plain_total", "Plain").inc()
+    registry.counter("labeled_total", "Labeled", ("route",)).inc(("/leads",))
+    text = registry.render()
+    assert 'plain_total{worker="3"} 1' in text
+    assert 'labeled_total{worker="3",route="/leads"} 1' in text
+    assert "# TYPE plain_total counter" in text